@@ -0,0 +1 @@
+# Offline benchmarks and load tests against an in-process fake Discord
@@ -0,0 +1,781 @@
+"""Local stand-in for the Discord REST API and gateway.
+
+Speaks enough of the v10 REST and gateway protocol for an unmodified
+discord.py client (and so bot.py with all of its cogs) to log in, connect,
+receive READY/GUILD_CREATE, sync application commands, post and read
+messages, open threads and answer interactions. Every REST response waits a
+configurable latency, and a fraction of requests can be answered with 429s
+carrying the same headers Discord sends, so the client's rate-limit handling
+is exercised too.
+
+Run it on its own and point the bot at it:
+
+    python -m benchmarks.discord_standin --port 8089 --latency-ms 40 --rate-limit 0.02
+    DISCORD_TOKEN=standin DISCORD_API_BASE=http://127.0.0.1:8089/api/v10 \\
+        DISCORD_GATEWAY_URL=ws://127.0.0.1:8089/gateway python bot.py
+
+or drive it from benchmarks/e2e.py, which also injects interactions and
+reconnects and measures the bot's responses.
+
+State lives in memory: one guild built from the channel IDs in config.py and
+utils/constants.py, plus any members added with add_member().
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import random
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+from aiohttp import web, WSMsgType
+
+os.environ.setdefault("DISCORD_TOKEN", "standin")
+
+logger = logging.getLogger(__name__)
+
+API_PREFIX = "/api/v10"
+DISCORD_EPOCH = 1420070400000
+ADMINISTRATOR = str(1 << 3)
+
+# Gateway opcodes
+DISPATCH, HEARTBEAT, IDENTIFY, PRESENCE, RESUME, RECONNECT = 0, 1, 2, 3, 6, 7
+REQUEST_MEMBERS, INVALID_SESSION, HELLO, HEARTBEAT_ACK = 8, 9, 10, 11
+
+# Interaction and callback types
+APPLICATION_COMMAND, MESSAGE_COMPONENT = 2, 3
+CHANNEL_MESSAGE, DEFERRED_CHANNEL_MESSAGE, DEFERRED_UPDATE, UPDATE_MESSAGE, MODAL = 4, 5, 6, 7, 9
+
+
+def json_response(data, status=200, headers=None):
+    # discord.py only decodes bodies whose Content-Type is exactly application/json (no charset)
+    headers = dict(headers or {}, **{"Content-Type": "application/json"})
+    return web.Response(body=json.dumps(data).encode(), status=status, headers=headers)
+
+
+def now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class Snowflakes:
+    """Time-ordered snowflake IDs, so created_at and history ordering behave."""
+
+    def __init__(self):
+        self._counter = itertools.count()
+
+    def __call__(self):
+        ms = int(time.time() * 1000) - DISCORD_EPOCH
+        return str((ms << 22) | (next(self._counter) & 0x3FFFFF))
+
+
+def channel_ids_from_config():
+    """Collect {id: name} for every *_CHANNEL_ID and *_CATEGORY_ID the bot is configured with."""
+    import config
+    from utils import constants
+
+    channels = {}
+    for module in (config, constants):
+        for attr, value in vars(module).items():
+            if attr.endswith(("_CHANNEL_ID", "_CATEGORY_ID")) and isinstance(value, int):
+                name = attr[:-3].lower().replace("_", "-")
+                channels.setdefault(value, name)
+    return channels
+
+
+class Session:
+    """One gateway connection."""
+
+    def __init__(self, ws, session_id, shard=None):
+        self.ws = ws
+        self.session_id = session_id
+        self.sequence = 0
+        self.shard = shard  # [shard_id, shard_count] from IDENTIFY
+
+    def owns(self, guild_id):
+        """Whether Discord would send this guild's events to this connection."""
+        if not self.shard:
+            return True
+        shard_id, shard_count = self.shard
+        return (int(guild_id) >> 22) % shard_count == shard_id
+
+
+class DiscordStandin:
+    def __init__(self, host="127.0.0.1", port=8089, latency=0.0, jitter=0.0,
+                 rate_limit=0.0, retry_after=0.5, heartbeat_interval=41.25, shards=1, seed=None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.heartbeat_interval = heartbeat_interval
+        self.shards = shards
+        self.random = random.Random(seed)
+        self.snowflake = Snowflakes()
+
+        self.bot_user = self._user("Kamas Bot", bot=True)
+        self.application_id = self.bot_user["id"]
+        self.guild_id = None
+        self.guild = None
+        self.roles = []
+        self.members = {}
+        self.channels = {}
+        self.dm_channels = {}
+        self.messages = defaultdict(dict)
+        self.attachments = {}
+        self.commands = []
+
+        self.sessions = {}
+        self.pending_interactions = {}
+        self.message_waiters = []
+        self.stats = Counter()
+        self.rate_limited = Counter()
+        self.unhandled = Counter()
+        self.timeline = {}
+        self.resumes = []
+        self._buckets = {}
+        self._runner = None
+
+    # ----- state -----
+
+    def _user(self, name, bot=False, user_id=None):
+        return {
+            "id": user_id or self.snowflake(), "username": name, "global_name": name,
+            "discriminator": "0", "avatar": None, "bot": bot, "public_flags": 0,
+        }
+
+    def _member(self, user, roles=()):
+        return {
+            "user": user, "roles": list(roles), "joined_at": now_iso(), "nick": None,
+            "deaf": False, "mute": False, "flags": 0, "pending": False,
+        }
+
+    def build_guild(self, guild_id, channels, name="Kamas Trading"):
+        """Create the guild the bot is a member of, with the given {channel_id: name}."""
+        self.guild_id = str(guild_id)
+        everyone = {"id": self.guild_id, "name": "@everyone", "permissions": "1024", "position": 0,
+                    "color": 0, "hoist": False, "managed": False, "mentionable": False, "flags": 0}
+        bot_role = {"id": self.snowflake(), "name": "Kamas Bot", "permissions": ADMINISTRATOR, "position": 1,
+                    "color": 0, "hoist": False, "managed": True, "mentionable": False, "flags": 0}
+        self.roles = [everyone, bot_role]
+        self.members = {self.bot_user["id"]: self._member(self.bot_user, [bot_role["id"]])}
+        for channel_id, channel_name in channels.items():
+            kind = 4 if channel_name.endswith("category") else 0
+            self.channels[str(channel_id)] = self._channel(str(channel_id), channel_name, kind)
+        self.guild = {
+            "id": self.guild_id, "name": name, "icon": None, "splash": None, "discovery_splash": None,
+            "owner_id": self.bot_user["id"], "afk_channel_id": None, "afk_timeout": 300,
+            "verification_level": 0, "default_message_notifications": 0, "explicit_content_filter": 0,
+            "mfa_level": 0, "premium_tier": 0, "premium_subscription_count": 0, "preferred_locale": "en-US",
+            "system_channel_id": None, "system_channel_flags": 0, "rules_channel_id": None,
+            "public_updates_channel_id": None, "nsfw_level": 0, "features": [], "emojis": [],
+            "stickers": [], "application_id": None, "description": None, "banner": None,
+            "vanity_url_code": None, "max_members": 500000, "premium_progress_bar_enabled": False,
+            "large": False, "unavailable": False, "joined_at": now_iso(),
+        }
+
+    def build_default_guild(self):
+        """Build the guild from SERVER_ID and the channel IDs in config.py and utils/constants.py."""
+        from config import SERVER_ID
+        self.build_guild(SERVER_ID, channel_ids_from_config())
+
+    def add_member(self, name, administrator=False):
+        """Add a guild member and return its user payload."""
+        if self.guild is None:
+            self.build_default_guild()
+        user = self._user(name)
+        self.members[user["id"]] = self._member(user)
+        self.members[user["id"]]["administrator"] = administrator
+        return user
+
+    def _channel(self, channel_id, name, kind=0, **extra):
+        channel = {
+            "id": channel_id, "type": kind, "guild_id": self.guild_id, "name": name, "position": 0,
+            "permission_overwrites": [], "parent_id": None, "nsfw": False, "topic": None,
+            "last_message_id": None, "rate_limit_per_user": 0, "flags": 0,
+        }
+        channel.update(extra)
+        return channel
+
+    def _guild_create(self):
+        members = [{k: v for k, v in m.items() if k != "administrator"} for m in self.members.values()]
+        threads = [c for c in self.channels.values() if c["type"] in (11, 12) and not c["thread_metadata"]["archived"]]
+        return dict(
+            self.guild, roles=self.roles, members=members, member_count=len(members),
+            channels=[c for c in self.channels.values() if c["type"] not in (1, 11, 12)],
+            threads=threads, presences=[], voice_states=[], stage_instances=[],
+            guild_scheduled_events=[], soundboard_sounds=[],
+        )
+
+    def _message(self, channel_id, author, payload, attachments=()):
+        message = {
+            "id": self.snowflake(), "channel_id": channel_id, "author": author,
+            "content": payload.get("content") or "", "timestamp": now_iso(), "edited_timestamp": None,
+            "tts": False, "mention_everyone": False, "mentions": [], "mention_roles": [],
+            "attachments": list(attachments), "embeds": payload.get("embeds") or [],
+            "components": payload.get("components") or [], "pinned": False, "type": 0,
+            "flags": payload.get("flags", 0), "reactions": [],
+        }
+        channel = self.channels.get(channel_id)
+        if channel and channel.get("guild_id"):
+            message["guild_id"] = channel["guild_id"]
+            if author["id"] in self.members:
+                message["member"] = {k: v for k, v in self.members[author["id"]].items()
+                                     if k not in ("user", "administrator")}
+        return message
+
+    def seed_message(self, channel_id, content="", author=None, files=()):
+        """Store a message directly (no REST latency), e.g. to pre-populate history."""
+        channel_id = str(channel_id)
+        attachments = [self._store_attachment(channel_id, name, data) for name, data in files]
+        message = self._message(channel_id, author or self.bot_user, {"content": content}, attachments)
+        self.messages[channel_id][message["id"]] = message
+        return message
+
+    def _store_attachment(self, channel_id, filename, data):
+        attachment_id = self.snowflake()
+        self.attachments[attachment_id] = data
+        url = f"{self.http_base}/attachments/{channel_id}/{attachment_id}/{filename}"
+        return {
+            "id": attachment_id, "filename": filename, "size": len(data), "url": url,
+            "proxy_url": url, "content_type": "text/plain",
+        }
+
+    # ----- server lifecycle -----
+
+    @property
+    def http_base(self):
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def api_base(self):
+        return self.http_base + API_PREFIX
+
+    @property
+    def gateway_url(self):
+        return f"ws://{self.host}:{self.port}/gateway"
+
+    def environment(self):
+        """Environment variables that point bot.py at this server."""
+        return {
+            "DISCORD_TOKEN": "standin",
+            "DISCORD_API_BASE": self.api_base,
+            "DISCORD_GATEWAY_URL": self.gateway_url,
+            "KAMAS_LOGO_URL": f"{self.http_base}/assets/kamas.png",
+        }
+
+    async def start(self):
+        if self.guild is None:
+            self.build_default_guild()
+        app = web.Application(middlewares=[self._middleware], client_max_size=32 * 1024 * 1024)
+        api = API_PREFIX
+        app.router.add_get("/gateway", self.gateway)
+        app.router.add_get("/assets/kamas.png", self.asset)
+        app.router.add_get("/attachments/{channel_id}/{attachment_id}/{filename}", self.attachment)
+        app.router.add_get(api + "/users/@me", self.get_me)
+        app.router.add_get(api + "/users/{user_id}", self.get_user)
+        app.router.add_post(api + "/users/@me/channels", self.create_dm)
+        app.router.add_get(api + "/oauth2/applications/@me", self.application_info)
+        app.router.add_get(api + "/gateway", self.get_gateway)
+        app.router.add_get(api + "/gateway/bot", self.get_gateway)
+        app.router.add_put(api + "/applications/{application_id}/commands", self.sync_commands)
+        app.router.add_put(api + "/applications/{application_id}/guilds/{guild_id}/commands", self.sync_commands)
+        app.router.add_get(api + "/guilds/{guild_id}", self.get_guild)
+        app.router.add_get(api + "/guilds/{guild_id}/members/{user_id}", self.get_member)
+        app.router.add_put(api + "/guilds/{guild_id}/members/{user_id}/roles/{role_id}", self.no_content)
+        app.router.add_delete(api + "/guilds/{guild_id}/members/{user_id}/roles/{role_id}", self.no_content)
+        app.router.add_get(api + "/channels/{channel_id}", self.get_channel)
+        app.router.add_patch(api + "/channels/{channel_id}", self.edit_channel)
+        app.router.add_get(api + "/channels/{channel_id}/messages", self.history)
+        app.router.add_post(api + "/channels/{channel_id}/messages", self.send_message)
+        app.router.add_get(api + "/channels/{channel_id}/messages/{message_id}", self.get_message)
+        app.router.add_patch(api + "/channels/{channel_id}/messages/{message_id}", self.edit_message)
+        app.router.add_delete(api + "/channels/{channel_id}/messages/{message_id}", self.delete_message)
+        app.router.add_put(api + "/channels/{channel_id}/messages/{message_id}/reactions/{emoji}/@me",
+                           self.no_content)
+        app.router.add_post(api + "/channels/{channel_id}/threads", self.create_thread)
+        app.router.add_post(api + "/channels/{channel_id}/messages/{message_id}/threads", self.create_thread)
+        app.router.add_put(api + "/channels/{channel_id}/thread-members/{user_id}", self.no_content)
+        app.router.add_post(api + "/interactions/{interaction_id}/{token}/callback", self.interaction_callback)
+        app.router.add_post(api + "/webhooks/{application_id}/{token}", self.followup)
+        app.router.add_patch(api + "/webhooks/{application_id}/{token}/messages/{message_id}", self.followup)
+        app.router.add_route("*", api + "/{tail:.*}", self.not_found)
+
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        if not self.port:
+            self.port = site._server.sockets[0].getsockname()[1]
+        logger.info(f"Discord stand-in listening on {self.http_base}")
+
+    async def stop(self):
+        for session in list(self.sessions.values()):
+            if session.ws is not None:
+                await session.ws.close()
+        if self._runner:
+            await self._runner.cleanup()
+
+    # ----- REST plumbing -----
+
+    @web.middleware
+    async def _middleware(self, request, handler):
+        route = request.match_info.route.resource.canonical if request.match_info.route.resource else "?"
+        key = f"{request.method} {route}"
+        if route == "/gateway":
+            return await handler(request)
+
+        self.stats[key] += 1
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            await asyncio.sleep(delay)
+
+        headers = {"Via": "1.1 google"}
+        if route.startswith(API_PREFIX):
+            bucket = self._buckets.setdefault(route, uuid.uuid4().hex[:16])
+            headers.update({
+                "X-RateLimit-Limit": "50", "X-RateLimit-Remaining": "49",
+                "X-RateLimit-Reset-After": "1.000", "X-RateLimit-Bucket": bucket,
+                "X-RateLimit-Reset": f"{time.time() + 1:.3f}",
+            })
+            if self.rate_limit and self.random.random() < self.rate_limit:
+                self.rate_limited[key] += 1
+                headers.update({
+                    "X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": f"{self.retry_after:.3f}",
+                    "Retry-After": str(max(int(self.retry_after), 1)), "X-RateLimit-Scope": "user",
+                })
+                return json_response(
+                    {"message": "You are being rate limited.", "retry_after": self.retry_after, "global": False},
+                    status=429, headers=headers
+                )
+
+        response = await handler(request)
+        response.headers.update(headers)
+        return response
+
+    async def _payload(self, request):
+        """Return (json payload, [(filename, bytes)]) for JSON or multipart bodies."""
+        if not request.can_read_body:
+            return {}, []
+        if request.content_type.startswith("multipart/"):
+            payload, files = {}, []
+            reader = await request.multipart()
+            async for part in reader:
+                if part.name == "payload_json":
+                    payload = json.loads(await part.text())
+                else:
+                    files.append((part.filename or "file", await part.read()))
+            return payload, files
+        body = await request.read()
+        return (json.loads(body) if body else {}), []
+
+    def _error(self, status, message, code=0):
+        return json_response({"message": message, "code": code}, status=status)
+
+    async def no_content(self, request):
+        return web.Response(status=204)
+
+    async def not_found(self, request):
+        self.unhandled[f"{request.method} {request.path}"] += 1
+        return self._error(404, "404: Not Found")
+
+    # ----- REST handlers -----
+
+    async def asset(self, request):
+        # 1x1 transparent PNG
+        return web.Response(body=bytes.fromhex(
+            "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+            "1f15c4890000000d49444154789c6360000002000100e221bc330000000049454e44ae426082"
+        ), content_type="image/png")
+
+    async def attachment(self, request):
+        data = self.attachments.get(request.match_info["attachment_id"])
+        if data is None:
+            return self._error(404, "Unknown Attachment")
+        return web.Response(body=data)
+
+    async def get_me(self, request):
+        return json_response(self.bot_user)
+
+    async def get_user(self, request):
+        member = self.members.get(request.match_info["user_id"])
+        if not member:
+            return self._error(404, "Unknown User", 10013)
+        return json_response(member["user"])
+
+    async def get_guild(self, request):
+        if request.match_info["guild_id"] != self.guild_id:
+            return self._error(404, "Unknown Guild", 10004)
+        return json_response(dict(self.guild, roles=self.roles))
+
+    async def get_member(self, request):
+        member = self.members.get(request.match_info["user_id"])
+        if not member:
+            return self._error(404, "Unknown Member", 10007)
+        return json_response({k: v for k, v in member.items() if k != "administrator"})
+
+    async def create_dm(self, request):
+        payload, _ = await self._payload(request)
+        recipient = self.members.get(str(payload.get("recipient_id")))
+        if not recipient:
+            return self._error(404, "Unknown User", 10013)
+        user_id = recipient["user"]["id"]
+        if user_id not in self.dm_channels:
+            channel = {"id": self.snowflake(), "type": 1, "recipients": [recipient["user"]], "last_message_id": None}
+            self.dm_channels[user_id] = channel
+            self.channels[channel["id"]] = channel
+        return json_response(self.dm_channels[user_id])
+
+    async def application_info(self, request):
+        return json_response({
+            "id": self.application_id, "name": self.bot_user["username"], "icon": None, "description": "",
+            "rpc_origins": [], "bot_public": True, "bot_require_code_grant": False, "summary": "",
+            "verify_key": uuid.uuid4().hex, "flags": 0, "team": None, "owner": self._user("Owner"),
+            "bot": self.bot_user,
+        })
+
+    async def get_gateway(self, request):
+        return json_response({
+            "url": self.gateway_url, "shards": self.shards,
+            "session_start_limit": {"total": 1000, "remaining": 999, "reset_after": 86400000, "max_concurrency": 1},
+        })
+
+    async def sync_commands(self, request):
+        payload, _ = await self._payload(request)
+        self.commands = [
+            dict(command, id=self.snowflake(), application_id=self.application_id, version=self.snowflake(),
+                 type=command.get("type", 1), description=command.get("description", ""),
+                 options=command.get("options", []), default_member_permissions=None,
+                 dm_permission=True, nsfw=False, guild_id=request.match_info.get("guild_id"))
+            for command in payload
+        ]
+        self.timeline.setdefault("commands_synced", time.perf_counter())
+        return json_response(self.commands)
+
+    async def get_channel(self, request):
+        channel = self.channels.get(request.match_info["channel_id"])
+        if not channel:
+            return self._error(404, "Unknown Channel", 10003)
+        return json_response(channel)
+
+    async def edit_channel(self, request):
+        channel = self.channels.get(request.match_info["channel_id"])
+        if not channel:
+            return self._error(404, "Unknown Channel", 10003)
+        payload, _ = await self._payload(request)
+        metadata = channel.get("thread_metadata")
+        for field in ("name", "topic"):
+            if field in payload:
+                channel[field] = payload[field]
+        if metadata is not None:
+            for field in ("archived", "locked", "auto_archive_duration", "invitable"):
+                if field in payload:
+                    metadata[field] = payload[field]
+            metadata["archive_timestamp"] = now_iso()
+            await self.dispatch("THREAD_UPDATE", channel)
+        else:
+            await self.dispatch("CHANNEL_UPDATE", channel)
+        return json_response(channel)
+
+    async def history(self, request):
+        channel_id = request.match_info["channel_id"]
+        if channel_id not in self.channels:
+            return self._error(404, "Unknown Channel", 10003)
+        limit = min(int(request.query.get("limit", 50)), 100)
+        ordered = sorted(self.messages[channel_id].values(), key=lambda m: int(m["id"]))
+        before, after, around = (request.query.get(k) for k in ("before", "after", "around"))
+        if after:
+            ordered = [m for m in ordered if int(m["id"]) > int(after)][:limit]
+        elif around:
+            index = next((i for i, m in enumerate(ordered) if int(m["id"]) >= int(around)), len(ordered))
+            ordered = ordered[max(index - limit // 2, 0):index + limit // 2]
+        else:
+            if before:
+                ordered = [m for m in ordered if int(m["id"]) < int(before)]
+            ordered = ordered[-limit:]
+        return json_response(list(reversed(ordered)))
+
+    async def send_message(self, request):
+        channel_id = request.match_info["channel_id"]
+        channel = self.channels.get(channel_id)
+        if not channel:
+            return self._error(404, "Unknown Channel", 10003)
+        payload, files = await self._payload(request)
+        attachments = [self._store_attachment(channel_id, name, data) for name, data in files]
+        message = self._message(channel["id"], self.bot_user, payload, attachments)
+        self.messages[channel["id"]][message["id"]] = message
+        channel["last_message_id"] = message["id"]
+        await self.dispatch("MESSAGE_CREATE", message)
+        self._notify_message(message)
+        return json_response(message)
+
+    async def get_message(self, request):
+        message = self.messages[request.match_info["channel_id"]].get(request.match_info["message_id"])
+        if not message:
+            return self._error(404, "Unknown Message", 10008)
+        return json_response(message)
+
+    async def edit_message(self, request):
+        message = self.messages[request.match_info["channel_id"]].get(request.match_info["message_id"])
+        if not message:
+            return self._error(404, "Unknown Message", 10008)
+        payload, files = await self._payload(request)
+        for field in ("content", "embeds", "components", "flags"):
+            if field in payload:
+                message[field] = payload[field]
+        if files:
+            message["attachments"] = [
+                self._store_attachment(message["channel_id"], name, data) for name, data in files
+            ]
+        message["edited_timestamp"] = now_iso()
+        await self.dispatch("MESSAGE_UPDATE", message)
+        return json_response(message)
+
+    async def delete_message(self, request):
+        channel_id = request.match_info["channel_id"]
+        message = self.messages[channel_id].pop(request.match_info["message_id"], None)
+        if not message:
+            return self._error(404, "Unknown Message", 10008)
+        await self.dispatch("MESSAGE_DELETE", {"id": message["id"], "channel_id": channel_id,
+                                               "guild_id": self.guild_id})
+        return web.Response(status=204)
+
+    async def create_thread(self, request):
+        parent_id = request.match_info["channel_id"]
+        if parent_id not in self.channels:
+            return self._error(404, "Unknown Channel", 10003)
+        payload, _ = await self._payload(request)
+        from_message = "message_id" in request.match_info
+        thread_id = request.match_info["message_id"] if from_message else self.snowflake()
+        thread = self._channel(
+            thread_id, payload.get("name", "thread"), 11 if from_message else payload.get("type", 12),
+            parent_id=parent_id, owner_id=self.bot_user["id"], member_count=1, message_count=0,
+            thread_metadata={
+                "archived": False, "locked": False, "archive_timestamp": now_iso(),
+                "auto_archive_duration": payload.get("auto_archive_duration", 1440),
+                "invitable": payload.get("invitable", True),
+            },
+            member={"id": thread_id, "user_id": self.bot_user["id"], "join_timestamp": now_iso(), "flags": 0},
+        )
+        self.channels[thread_id] = thread
+        await self.dispatch("THREAD_CREATE", dict(thread, newly_created=True))
+        return json_response(thread, status=201)
+
+    async def interaction_callback(self, request):
+        interaction_id = request.match_info["interaction_id"]
+        payload, files = await self._payload(request)
+        kind = payload.get("type")
+        data = payload.get("data") or {}
+        pending = self.pending_interactions.get(interaction_id)
+        if pending is None:
+            return self._error(404, "Unknown interaction", 10062)
+        if pending["responded"]:
+            return self._error(400, "Interaction has already been acknowledged.", 40060)
+        pending["responded"] = True
+        if not pending["future"].done():
+            pending["future"].set_result((time.perf_counter(), kind))
+
+        result = {"interaction": {
+            "id": interaction_id, "type": pending["type"],
+            "response_message_loading": kind == DEFERRED_CHANNEL_MESSAGE,
+            "response_message_ephemeral": bool((data.get("flags") or 0) & 64),
+        }, "resource": {"type": kind}}
+        if kind in (CHANNEL_MESSAGE, UPDATE_MESSAGE):
+            attachments = [self._store_attachment(pending["channel_id"], n, d) for n, d in files]
+            message = self._message(pending["channel_id"], self.bot_user, data, attachments)
+            message["interaction"] = {"id": interaction_id, "type": pending["type"], "name": pending["name"],
+                                      "user": pending["user"]}
+            result["interaction"]["response_message_id"] = message["id"]
+            result["resource"]["message"] = message
+        return json_response(result)
+
+    async def followup(self, request):
+        payload, files = await self._payload(request)
+        channel_id = next((p["channel_id"] for p in self.pending_interactions.values()
+                           if p["token"] == request.match_info["token"]), None)
+        if channel_id is None:
+            return self._error(404, "Unknown Webhook", 10015)
+        attachments = [self._store_attachment(channel_id, n, d) for n, d in files]
+        message = self._message(channel_id, self.bot_user, payload, attachments)
+        message["webhook_id"] = self.application_id
+        return json_response(message)
+
+    # ----- gateway -----
+
+    async def gateway(self, request):
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        self.stats["WS connect"] += 1
+        session = None
+        await ws.send_json({"op": HELLO, "d": {"heartbeat_interval": int(self.heartbeat_interval * 1000)},
+                            "s": None, "t": None})
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                continue
+            frame = json.loads(msg.data)
+            op, data = frame.get("op"), frame.get("d")
+            if op == HEARTBEAT:
+                await ws.send_json({"op": HEARTBEAT_ACK, "d": None, "s": None, "t": None})
+            elif op == IDENTIFY:
+                session = Session(ws, uuid.uuid4().hex, data.get("shard"))
+                self.sessions[session.session_id] = session
+                self.timeline.setdefault("identify", time.perf_counter())
+                await self._send_ready(session)
+            elif op == RESUME:
+                previous = self.sessions.pop(data.get("session_id"), None)
+                if previous is None:
+                    await ws.send_json({"op": INVALID_SESSION, "d": False, "s": None, "t": None})
+                    continue
+                session = Session(ws, previous.session_id, previous.shard)
+                session.sequence = max(previous.sequence, data.get("seq") or 0)
+                self.sessions[session.session_id] = session
+                self.resumes.append(time.perf_counter())
+                await self._send(session, "RESUMED", {})
+            elif op == REQUEST_MEMBERS:
+                members = [{k: v for k, v in m.items() if k != "administrator"} for m in self.members.values()]
+                await self._send(session, "GUILD_MEMBERS_CHUNK", {
+                    "guild_id": self.guild_id, "members": members, "chunk_index": 0, "chunk_count": 1,
+                    "nonce": data.get("nonce"),
+                })
+        if session and self.sessions.get(session.session_id) is session:
+            session.ws = None
+        return ws
+
+    async def _send(self, session, event, data):
+        if session is None or session.ws is None or session.ws.closed:
+            return
+        session.sequence += 1
+        await session.ws.send_str(json.dumps({"op": DISPATCH, "t": event, "s": session.sequence, "d": data}))
+
+    async def _send_ready(self, session):
+        owned = session.owns(self.guild_id)
+        await self._send(session, "READY", {
+            "v": 10, "user": self.bot_user, "guilds": [{"id": self.guild_id, "unavailable": True}] if owned else [],
+            "session_id": session.session_id, "resume_gateway_url": self.gateway_url,
+            "application": {"id": self.application_id, "flags": 0}, "private_channels": [],
+            "relationships": [], "user_settings": {}, "shard": session.shard or [0, 1],
+        })
+        if owned:
+            await self._send(session, "GUILD_CREATE", self._guild_create())
+            self.timeline.setdefault("guild_create", time.perf_counter())
+
+    async def dispatch(self, event, data):
+        """Send a DISPATCH event to every session whose shard owns the guild."""
+        for session in list(self.sessions.values()):
+            if session.owns(self.guild_id):
+                await self._send(session, event, data)
+
+    async def request_reconnect(self):
+        """Ask every session to reconnect (op 7), as Discord does before maintenance."""
+        for session in list(self.sessions.values()):
+            if session.ws is not None and not session.ws.closed:
+                await session.ws.send_json({"op": RECONNECT, "d": None, "s": None, "t": None})
+
+    async def drop_connections(self, code=4000):
+        """Close every gateway socket abruptly with a resumable close code."""
+        for session in list(self.sessions.values()):
+            if session.ws is not None and not session.ws.closed:
+                await session.ws.close(code=code)
+
+    # ----- interactions -----
+
+    def _notify_message(self, message):
+        for predicate, future in list(self.message_waiters):
+            if not future.done() and predicate(message):
+                future.set_result(message)
+                self.message_waiters.remove((predicate, future))
+
+    async def wait_for_message(self, predicate, timeout=None):
+        """Wait until the bot posts a message matching predicate(message_payload)."""
+        for channel in self.messages.values():
+            for message in channel.values():
+                if predicate(message):
+                    return message
+        future = asyncio.get_running_loop().create_future()
+        self.message_waiters.append((predicate, future))
+        return await asyncio.wait_for(future, timeout)
+
+    def _interaction(self, kind, user, channel_id, data, message=None):
+        interaction_id, token = self.snowflake(), uuid.uuid4().hex
+        member = dict(self.members[user["id"]])
+        permissions = ADMINISTRATOR if member.pop("administrator", False) else "1024"
+        payload = {
+            "id": interaction_id, "application_id": self.application_id, "type": kind, "token": token,
+            "version": 1, "guild_id": self.guild_id, "channel_id": channel_id,
+            "channel": self.channels[channel_id], "member": dict(member, permissions=permissions),
+            "data": data, "locale": "en-US", "guild_locale": "en-US", "app_permissions": ADMINISTRATOR,
+            "entitlements": [], "authorizing_integration_owners": {"0": self.guild_id}, "context": 0,
+            "attachment_size_limit": 10 * 1024 * 1024,
+        }
+        if message is not None:
+            payload["message"] = message
+        self.pending_interactions[interaction_id] = {
+            "future": asyncio.get_running_loop().create_future(), "responded": False, "type": kind,
+            "token": token, "channel_id": channel_id, "user": user, "name": data.get("name", ""),
+        }
+        return payload
+
+    async def _interact(self, payload, timeout):
+        pending = self.pending_interactions[payload["id"]]
+        start = time.perf_counter()
+        await self.dispatch("INTERACTION_CREATE", payload)
+        try:
+            answered, kind = await asyncio.wait_for(asyncio.shield(pending["future"]), timeout)
+        except asyncio.TimeoutError:
+            return None, None
+        return answered - start, kind
+
+    async def click(self, user, message, custom_id, timeout=5.0):
+        """Press a button on a message; returns (seconds until the bot answered, callback type)."""
+        payload = self._interaction(MESSAGE_COMPONENT, user, message["channel_id"],
+                                    {"custom_id": custom_id, "component_type": 2}, message)
+        return await self._interact(payload, timeout)
+
+    async def command(self, user, channel_id, name, options=(), timeout=5.0):
+        """Invoke a slash command; returns (seconds until the bot answered, callback type)."""
+        registered = next((c for c in self.commands if c["name"] == name), None)
+        data = {"id": registered["id"] if registered else self.snowflake(), "name": name, "type": 1,
+                "options": list(options), "guild_id": self.guild_id}
+        payload = self._interaction(APPLICATION_COMMAND, user, str(channel_id), data)
+        return await self._interact(payload, timeout)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Added to every REST response")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random extra latency, uniform 0..jitter")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Fraction of REST requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=0.5, help="retry_after sent with injected 429s")
+    parser.add_argument("--members", type=int, default=10, help="Extra guild members to create")
+    parser.add_argument("--shards", type=int, default=1, help="Shard count recommended by /gateway/bot")
+    return parser.parse_args(argv)
+
+
+async def serve(args):
+    standin = DiscordStandin(
+        args.host, args.port, latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+        rate_limit=args.rate_limit, retry_after=args.retry_after, shards=args.shards
+    )
+    for i in range(args.members):
+        standin.add_member(f"member{i}", administrator=i == 0)
+    await standin.start()
+    for key, value in standin.environment().items():
+        print(f"{key}={value}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await standin.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(serve(parse_args()))
+    except KeyboardInterrupt:
+        pass
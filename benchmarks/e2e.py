@@ -0,0 +1,232 @@
+"""End-to-end run of bot.py against the local Discord stand-in.
+
+Starts benchmarks/discord_standin.py, launches the real bot.py in a
+subprocess pointed at it, and measures:
+
+* startup: time from process start to IDENTIFY, GUILD_CREATE, application
+  command sync and the trading panel being posted;
+* interactions: button clicks on the panel and slash commands sent through
+  the gateway, timed until the bot's interaction callback reaches the server
+  (throughput, latency percentiles, unanswered and >3s acknowledgements);
+* reconnects: op 7 RECONNECT requests and dropped sockets, timed until the
+  bot has RESUMEd and answered an interaction again.
+
+    python -m benchmarks.e2e --latency-ms 40 --rate-limit 0.02 --interactions 300 --concurrency 25
+
+Nothing leaves the machine; the bot's working directory is a temporary
+directory that is removed afterwards (use --keep to inspect its logs).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import signal
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+from benchmarks.discord_standin import DiscordStandin
+from benchmarks.loadtest import percentiles
+
+BOT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bot.py")
+
+# (kind, target, needs administrator) sent in rotation; buttons are pressed on the panel message
+INTERACTION_MIX = (
+    ("button", "buy_kamas", False),
+    ("button", "sell_kamas", False),
+    ("button", "verify_seller", False),
+    ("command", "loop_health", True),
+)
+
+
+def has_custom_id(message, custom_id):
+    return any(
+        component.get("custom_id") == custom_id
+        for row in message.get("components", [])
+        for component in row.get("components", [])
+    )
+
+
+class EndToEnd:
+    def __init__(self, args):
+        self.args = args
+        self.standin = DiscordStandin(
+            port=args.port, latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+            rate_limit=args.rate_limit, retry_after=args.retry_after, shards=args.shards, seed=args.seed
+        )
+        self.random = random.Random(args.seed)
+        self.process = None
+        self.workdir = None
+
+    async def start_bot(self):
+        self.workdir = tempfile.mkdtemp(prefix="kamas_e2e_")
+        os.makedirs(os.path.join(self.workdir, "logs"))
+        env = dict(os.environ, METRICS_ENABLED="0", LOG_JSON_FILE="", LOG_LEVEL=self.args.log_level,
+                   **self.standin.environment())
+        if self.args.shards > 1:
+            env["SHARD_COUNT"] = str(self.args.shards)
+        # Console output goes next to the bot's own logs for --keep
+        with open(os.path.join(self.workdir, "logs", "console.log"), "wb") as console:
+            self.process = await asyncio.create_subprocess_exec(
+                sys.executable, BOT_PATH, cwd=self.workdir, env=env,
+                stdout=console, stderr=asyncio.subprocess.STDOUT
+            )
+
+    async def stop_bot(self):
+        if self.process and self.process.returncode is None:
+            self.process.send_signal(signal.SIGINT)
+            try:
+                await asyncio.wait_for(self.process.wait(), 10)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+        if self.workdir and not self.args.keep:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+    async def measure_startup(self, started):
+        try:
+            panel = await self.standin.wait_for_message(
+                lambda m: has_custom_id(m, "buy_kamas"), timeout=self.args.startup_timeout
+            )
+        except asyncio.TimeoutError:
+            panel = None
+        timeline = {
+            name: round(at - started, 3) for name, at in sorted(self.standin.timeline.items(), key=lambda i: i[1])
+        }
+        if panel is not None:
+            timeline["panel_posted"] = round(time.perf_counter() - started, 3)
+        return panel, timeline
+
+    async def interact(self, kind, target, user, panel):
+        if kind == "button":
+            return await self.standin.click(user, panel, target, timeout=self.args.ack_timeout)
+        channel_id = panel["channel_id"]
+        return await self.standin.command(user, channel_id, target, timeout=self.args.ack_timeout)
+
+    async def measure_interactions(self, panel, users, admin):
+        latencies = defaultdict(list)
+        callbacks = Counter()
+        unanswered = Counter()
+        semaphore = asyncio.Semaphore(self.args.concurrency)
+
+        async def one(index):
+            kind, target, needs_admin = INTERACTION_MIX[index % len(INTERACTION_MIX)]
+            user = admin if needs_admin else self.random.choice(users)
+            async with semaphore:
+                seconds, callback = await self.interact(kind, target, user, panel)
+            if seconds is None:
+                unanswered[target] += 1
+            else:
+                latencies[target].append(seconds)
+                callbacks[callback] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(self.args.interactions)))
+        elapsed = time.perf_counter() - start
+        answered = [s for samples in latencies.values() for s in samples]
+        return {
+            "sent": self.args.interactions,
+            "answered": len(answered),
+            "elapsed_s": round(elapsed, 3),
+            "acks_per_s": round(len(answered) / elapsed, 3) if elapsed else 0,
+            "ack_latency": percentiles(answered),
+            "by_target": {target: percentiles(samples) for target, samples in latencies.items()},
+            "unanswered": dict(unanswered),
+            "missed_3s_ack": sum(1 for s in answered if s > 3.0) + sum(unanswered.values()),
+            "callback_types": {str(k): v for k, v in callbacks.items()},
+        }
+
+    async def measure_reconnects(self, panel, admin):
+        results = []
+        for i in range(self.args.reconnects):
+            mode = "op7_reconnect" if i % 2 == 0 else "socket_drop"
+            resumes = len(self.standin.resumes)
+            start = time.perf_counter()
+            if mode == "op7_reconnect":
+                await self.standin.request_reconnect()
+            else:
+                await self.standin.drop_connections()
+            entry = {"mode": mode}
+            deadline = start + self.args.reconnect_timeout
+            while len(self.standin.resumes) == resumes and time.perf_counter() < deadline:
+                await asyncio.sleep(0.01)
+            if len(self.standin.resumes) > resumes:
+                entry["resumed_s"] = round(self.standin.resumes[-1] - start, 3)
+                seconds, _ = await self.interact("command", "loop_health", admin, panel)
+                entry["first_ack_s"] = round(time.perf_counter() - start, 3) if seconds is not None else None
+            else:
+                entry["resumed_s"] = None
+            results.append(entry)
+        return results
+
+    async def run(self):
+        users = [self.standin.add_member(f"trader{i}") for i in range(self.args.users)]
+        admin = self.standin.add_member("admin", administrator=True)
+        await self.standin.start()
+        started = time.perf_counter()
+        await self.start_bot()
+        try:
+            panel, timeline = await self.measure_startup(started)
+            report = {
+                "config": {
+                    "latency_ms": self.args.latency_ms, "jitter_ms": self.args.jitter_ms,
+                    "rate_limit": self.args.rate_limit, "retry_after_s": self.args.retry_after,
+                    "interactions": self.args.interactions, "concurrency": self.args.concurrency,
+                    "shards": self.args.shards,
+                },
+                "startup": timeline,
+            }
+            if panel is None:
+                report["error"] = "bot did not post the trading panel before --startup-timeout"
+            else:
+                report["interactions"] = await self.measure_interactions(panel, users, admin)
+                report["reconnects"] = await self.measure_reconnects(panel, admin)
+            report["rest"] = {
+                "requests": sum(v for k, v in self.standin.stats.items() if not k.startswith("WS")),
+                "gateway_connections": self.standin.stats["WS connect"],
+                "injected_429s": dict(self.standin.rate_limited),
+                "unhandled_routes": dict(self.standin.unhandled),
+                "by_route": dict(self.standin.stats.most_common(25)),
+            }
+            return report
+        finally:
+            await self.stop_bot()
+            report_exit = self.process.returncode if self.process else None
+            await self.standin.stop()
+            if report_exit not in (None, 0, -signal.SIGINT):
+                print(f"bot.py exited with {report_exit}", file=sys.stderr)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=0, help="Stand-in port (0 picks a free one)")
+    parser.add_argument("--latency-ms", type=float, default=30.0, help="Added to every REST response")
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Fraction of REST requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=0.5)
+    parser.add_argument("--users", type=int, default=50, help="Guild members that send interactions")
+    parser.add_argument("--interactions", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20, help="Interactions in flight at once")
+    parser.add_argument("--reconnects", type=int, default=2)
+    parser.add_argument("--shards", type=int, default=1, help="Run bot.py as an AutoShardedBot with this many shards")
+    parser.add_argument("--ack-timeout", type=float, default=5.0, help="Seconds before an interaction counts as unanswered")
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    parser.add_argument("--reconnect-timeout", type=float, default=30.0)
+    parser.add_argument("--log-level", default="WARNING", help="LOG_LEVEL for the bot process")
+    parser.add_argument("--keep", action="store_true", help="Keep the bot's working directory and logs")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    report = json.dumps(asyncio.run(EndToEnd(arguments).run()), indent=2)
+    if arguments.output:
+        with open(arguments.output, "w") as f:
+            f.write(report)
+    else:
+        print(report)
@@ -0,0 +1,459 @@
+"""In-process stand-ins for the discord.py objects the bot touches.
+
+Only the surface used by utils.utils and the cogs is implemented: guilds,
+channels, threads, messages, attachments, members and roles. Every network
+round trip (history page, fetch, send, edit, attachment download) awaits a
+configurable latency and is counted, so benchmarks can report both wall time
+and how many calls a function made.
+"""
+import asyncio
+import itertools
+
+import discord
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+HISTORY_PAGE_SIZE = 100
+
+_ids = itertools.count(1_000_000_000_000_000)
+
+
+def next_id():
+    return next(_ids)
+
+
+class Latency:
+    """Simulated network latency in seconds per kind of call."""
+
+    def __init__(self, rest=0.0, history_page=0.0, attachment=0.0):
+        self.rest = rest
+        self.history_page = history_page
+        self.attachment = attachment
+
+
+class CallStats(Counter):
+    """Counts simulated network calls by kind."""
+
+
+class FakeNotFound(Exception):
+    """Raised where discord.py would raise discord.NotFound."""
+
+
+class FakeRole:
+    def __init__(self, name, color=None):
+        self.id = next_id()
+        self.name = name
+        self.color = color
+        self.mention = f"<@&{self.id}>"
+
+
+class FakeUser:
+    def __init__(self, user_id=None, name="user", bot=False):
+        self.id = user_id or next_id()
+        self.name = name
+        self.display_name = name
+        self.bot = bot
+        self.mention = f"<@{self.id}>"
+        self.dms = []
+
+    async def send(self, content=None, **kwargs):
+        self.dms.append((content, kwargs))
+
+
+class FakePermissions:
+    def __init__(self, administrator=False):
+        self.administrator = administrator
+        self.manage_messages = administrator
+
+
+class FakeMember(FakeUser):
+    def __init__(self, guild, user_id=None, name="member", administrator=False):
+        super().__init__(user_id, name)
+        self.guild = guild
+        self.roles = []
+        self.guild_permissions = FakePermissions(administrator)
+
+    async def add_roles(self, *roles):
+        await self.guild.network("rest")
+        self.roles.extend(roles)
+
+    async def remove_roles(self, *roles):
+        await self.guild.network("rest")
+        self.roles = [r for r in self.roles if r not in roles]
+
+
+class FakeAttachment:
+    def __init__(self, filename, content, guild):
+        self.id = next_id()
+        self.filename = filename
+        self._content = content if isinstance(content, bytes) else content.encode()
+        self._guild = guild
+        self.size = len(self._content)
+        self.url = f"https://cdn.example/{self.id}/{filename}"
+
+    async def read(self):
+        await self._guild.network("attachment")
+        return self._content
+
+
+class FakeEmbedField:
+    def __init__(self, name, value, inline=True):
+        self.name = name
+        self.value = value
+        self.inline = inline
+
+
+class FakeEmbed:
+    def __init__(self, title=None, description=None, fields=()):
+        self.title = title
+        self.description = description
+        self.fields = [FakeEmbedField(*f) for f in fields]
+
+
+def _attachments_from_files(files, guild):
+    attachments = []
+    for file in files:
+        file.fp.seek(0)
+        attachments.append(FakeAttachment(file.filename, file.fp.read(), guild))
+    return attachments
+
+
+class FakeMessage:
+    def __init__(self, channel, author, content="", attachments=(), embeds=(), created_at=None,
+                 view=None, components=()):
+        self.id = next_id()
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.content = content
+        self.attachments = list(attachments)
+        self.embeds = list(embeds)
+        self.created_at = created_at or datetime.now(timezone.utc)
+        self.view = view
+        self.components = list(components)
+        self.deleted = False
+
+    @property
+    def jump_url(self):
+        return f"https://discord.com/channels/{self.guild.id}/{self.channel.id}/{self.id}"
+
+    async def edit(self, content=None, attachments=None, view=None, embed=None, **kwargs):
+        await self.guild.network("rest")
+        if content is not None:
+            self.content = content
+        if attachments is not None:
+            self.attachments = _attachments_from_files(attachments, self.guild)
+        if view is not None:
+            self.view = view
+        if embed is not None:
+            self.embeds = [embed]
+        return self
+
+    async def delete(self):
+        await self.guild.network("rest")
+        self.deleted = True
+        self.channel.remove(self)
+
+
+class FakeTextChannel:
+    def __init__(self, guild, channel_id=None, name="channel"):
+        self.id = channel_id or next_id()
+        self.guild = guild
+        self.name = name
+        self.mention = f"<#{self.id}>"
+        self.threads = []
+        # Oldest first, like the server's storage order
+        self._messages = []
+        self._by_id = {}
+
+    def add_message(self, message):
+        self._messages.append(message)
+        self._by_id[message.id] = message
+        return message
+
+    def remove(self, message):
+        if self._by_id.pop(message.id, None) is not None:
+            self._messages.remove(message)
+
+    def seed(self, author, content="", files=(), attachments=(), embeds=(), created_at=None):
+        """Add a message without simulated latency (for building datasets)."""
+        attachments = list(attachments) + [
+            FakeAttachment(name, data, self.guild) for name, data in files
+        ]
+        return self.add_message(FakeMessage(
+            self, author, content, attachments=attachments, embeds=embeds, created_at=created_at
+        ))
+
+    async def history(self, limit=100, before=None, after=None, oldest_first=None):
+        """Yield messages page by page, newest first unless `after` is given."""
+        if oldest_first is None:
+            oldest_first = after is not None
+        messages = self._messages
+        if after is not None:
+            messages = [m for m in messages if m.created_at > _as_datetime(after)]
+        if before is not None:
+            messages = [m for m in messages if m.created_at < _as_datetime(before)]
+        ordered = messages if oldest_first else list(reversed(messages))
+        if limit is not None:
+            ordered = ordered[:limit]
+        for start in range(0, len(ordered), HISTORY_PAGE_SIZE):
+            await self.guild.network("history_page")
+            for message in ordered[start:start + HISTORY_PAGE_SIZE]:
+                yield message
+
+    async def fetch_message(self, message_id):
+        await self.guild.network("rest")
+        message = self._by_id.get(message_id)
+        if message is None:
+            raise FakeNotFound(f"Unknown message {message_id}")
+        return message
+
+    async def send(self, content=None, file=None, files=None, embed=None, view=None, **kwargs):
+        await self.guild.network("rest")
+        uploads = ([file] if file else []) + list(files or [])
+        return self.add_message(FakeMessage(
+            self, self.guild.me, content or "",
+            attachments=_attachments_from_files(uploads, self.guild),
+            embeds=[embed] if embed else [],
+            view=view
+        ))
+
+    async def create_thread(self, name, message=None, type=None, auto_archive_duration=None, **kwargs):
+        await self.guild.network("rest")
+        thread = FakeThread(self.guild, self, name)
+        self.threads.append(thread)
+        self.guild.channels[thread.id] = thread
+        return thread
+
+    def permissions_for(self, member):
+        return FakePermissions(administrator=True)
+
+
+class FakeThread(FakeTextChannel, discord.Thread):
+    """Passes isinstance(channel, discord.Thread) checks; behaviour comes from FakeTextChannel."""
+    # Shadow discord.Thread's read-only properties so plain attributes can be set
+    mention = None
+    parent = None
+    members = None
+    jump_url = None
+
+    def __init__(self, guild, parent, name):
+        super().__init__(guild, name=name)
+        self.parent = parent
+        self.owner_id = guild.me.id
+        self.archived = False
+        self.locked = False
+        self.members = []
+
+    async def add_user(self, user):
+        await self.guild.network("rest")
+        self.members.append(user)
+
+    async def edit(self, archived=None, locked=None, **kwargs):
+        await self.guild.network("rest")
+        if archived is not None:
+            self.archived = archived
+        if locked is not None:
+            self.locked = locked
+        return self
+
+
+class FakeGuild:
+    def __init__(self, guild_id=None, name="guild", latency=None):
+        # Default to the configured server so guild_configs lookups resolve
+        from config import SERVER_ID
+        self.id = guild_id or SERVER_ID
+        self.name = name
+        self.latency = latency or Latency()
+        self.calls = CallStats()
+        self.channels = {}
+        self.members = {}
+        self.roles = []
+        self.me = FakeMember(self, name="KamasBot")
+        self.me.bot = True
+        self.shard_id = 0
+
+    async def network(self, kind):
+        self.calls[kind] += 1
+        # Always yield to the loop, as a real network call would
+        await asyncio.sleep(getattr(self.latency, kind, self.latency.rest))
+
+    def add_channel(self, channel_id=None, name="channel"):
+        channel = FakeTextChannel(self, channel_id, name)
+        self.channels[channel.id] = channel
+        return channel
+
+    def add_member(self, user_id=None, name="member", administrator=False):
+        member = FakeMember(self, user_id, name, administrator)
+        self.members[member.id] = member
+        return member
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    async def fetch_channel(self, channel_id):
+        await self.network("rest")
+        channel = self.channels.get(channel_id)
+        if channel is None:
+            raise FakeNotFound(f"Unknown channel {channel_id}")
+        return channel
+
+    def get_member(self, user_id):
+        return self.members.get(user_id)
+
+    async def fetch_member(self, user_id):
+        await self.network("rest")
+        member = self.members.get(user_id)
+        if member is None:
+            raise FakeNotFound(f"Unknown member {user_id}")
+        return member
+
+    async def create_role(self, name, color=None, **kwargs):
+        await self.network("rest")
+        role = FakeRole(name, color)
+        self.roles.append(role)
+        return role
+
+
+class FakeBot:
+    """Client/bot stand-in that serves channels from a set of fake guilds."""
+
+    def __init__(self, *guilds):
+        self.guilds = list(guilds)
+        self.user = guilds[0].me if guilds else FakeUser(name="KamasBot", bot=True)
+        self._closed = False
+        self.added_views = []
+
+    def _find_channel(self, channel_id):
+        for guild in self.guilds:
+            channel = guild.get_channel(channel_id)
+            if channel is not None:
+                return guild, channel
+        return None, None
+
+    def get_channel(self, channel_id):
+        return self._find_channel(channel_id)[1]
+
+    async def fetch_channel(self, channel_id):
+        guild, channel = self._find_channel(channel_id)
+        if guild is None:
+            raise FakeNotFound(f"Unknown channel {channel_id}")
+        await guild.network("rest")
+        return channel
+
+    def get_guild(self, guild_id):
+        return next((g for g in self.guilds if g.id == guild_id), None)
+
+    def get_user(self, user_id):
+        for guild in self.guilds:
+            if user_id in guild.members:
+                return guild.members[user_id]
+        return None
+
+    async def fetch_user(self, user_id):
+        for guild in self.guilds:
+            if user_id in guild.members:
+                await guild.network("rest")
+                return guild.members[user_id]
+        return FakeUser(user_id)
+
+    def add_view(self, view, message_id=None):
+        self.added_views.append((view, message_id))
+
+    async def wait_until_ready(self):
+        return None
+
+    def is_closed(self):
+        return self._closed
+
+    @property
+    def loop(self):
+        return asyncio.get_running_loop()
+
+
+def _as_datetime(value):
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    # discord.Object or snowflake-like values are not needed by the benchmarks
+    raise TypeError(f"Unsupported history bound {value!r}")
+
+
+def spread_timestamps(count, days=30, end=None):
+    """Timestamps evenly spread over the last `days` days, oldest first."""
+    end = end or datetime.now(timezone.utc)
+    step = timedelta(days=days) / max(count, 1)
+    start = end - timedelta(days=days)
+    return (start + step * i for i in range(count))
+
+
+class FakeInteractionResponded(Exception):
+    """Raised where discord.py would raise discord.InteractionResponded."""
+
+
+class FakeInteractionResponse:
+    def __init__(self, interaction):
+        self._interaction = interaction
+        self._done = False
+        self.sent = []
+        self.modal = None
+        self.deferred = False
+
+    def is_done(self):
+        return self._done
+
+    async def _respond(self):
+        if self._done:
+            raise FakeInteractionResponded("This interaction has already been responded to before")
+        self._done = True
+        self._interaction.responded_at = asyncio.get_running_loop().time()
+        await self._interaction.guild.network("rest")
+
+    async def send_message(self, content=None, **kwargs):
+        await self._respond()
+        self.sent.append((content, kwargs))
+
+    async def send_modal(self, modal):
+        await self._respond()
+        self.modal = modal
+
+    async def defer(self, **kwargs):
+        await self._respond()
+        self.deferred = True
+
+    async def edit_message(self, **kwargs):
+        await self._respond()
+        self.sent.append((kwargs.get("content"), kwargs))
+
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self._interaction = interaction
+        self.sent = []
+
+    async def send(self, content=None, **kwargs):
+        await self._interaction.guild.network("rest")
+        self.sent.append((content, kwargs))
+
+
+class FakeInteraction:
+    """An interaction from `user` in `channel`, optionally on `message`."""
+
+    def __init__(self, client, guild, user, channel, message=None, custom_id=None):
+        self.id = next_id()
+        self.client = client
+        self.guild = guild
+        self.user = user
+        self.channel = channel
+        self.message = message
+        self.command = None
+        self.data = {"custom_id": custom_id} if custom_id else {}
+        self.created_at = datetime.now(timezone.utc)
+        self.created_loop_time = asyncio.get_running_loop().time()
+        self.responded_at = None
+        self.response = FakeInteractionResponse(self)
+        self.followup = FakeFollowup(self)
+        self.original_edits = []
+
+    async def edit_original_response(self, **kwargs):
+        await self.guild.network("rest")
+        self.original_edits.append(kwargs)
@@ -0,0 +1,255 @@
+"""Concurrent BUY/SELL load generator for the listing flow.
+
+Each virtual user repeatedly walks the real handlers against the fake Discord:
+
+    KamasView BUY/SELL button -> KamasModal.on_submit
+    -> PrivateThreadButton.create_thread_button -> (hold) -> ThreadManagementView.close_thread_button
+
+while process_transaction_queue drains TRANSACTION_QUEUE in the background.
+The report (JSON on stdout) gives throughput, latency percentiles per step,
+time-to-first-response, queue wait time, peak queue depth and error rates.
+
+    python -m benchmarks.loadtest --users 200 --iterations 3 --latency-ms 40
+
+Virtual users are guild administrators so they can close the threads the bot
+creates (the bot owns them, as it does on Discord).
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import shutil
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+os.environ.setdefault("DISCORD_TOKEN", "benchmark")
+
+from utils.constants import TICKET_CHANNEL_ID  # noqa: E402
+from benchmarks.fake_discord import FakeGuild, FakeBot, FakeInteraction, Latency  # noqa: E402
+
+STEPS = ("panel_button", "modal_submit", "queued_process", "create_thread", "close_thread")
+
+
+def percentiles(samples):
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return round(ordered[min(int(q * len(ordered)), len(ordered) - 1)] * 1000, 3)
+
+    return {
+        "count": len(ordered),
+        "p50_ms": pick(0.50), "p90_ms": pick(0.90), "p99_ms": pick(0.99),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+class ErrorLog(logging.Handler):
+    """Counts ERROR records from the cogs, since handlers log and swallow most failures."""
+
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.counts = Counter()
+
+    def emit(self, record):
+        self.counts[f"{record.name}: {record.getMessage().split(':')[0][:80]}"] += 1
+
+
+class LoadTest:
+    def __init__(self, args):
+        self.args = args
+        self.latency = Latency(rest=args.latency_ms / 1000, history_page=args.latency_ms / 1000)
+        self.guild = FakeGuild(latency=self.latency)
+        self.bot = FakeBot(self.guild)
+        self.ticket_channel = self.guild.add_channel(TICKET_CHANNEL_ID, "tickets")
+        self.panel_channel = self.guild.add_channel(name="panel")
+        self.users = [
+            self.guild.add_member(name=f"vu{i}", administrator=True) for i in range(args.users)
+        ]
+        self.latencies = defaultdict(list)
+        self.first_response = []
+        self.exceptions = defaultdict(Counter)
+        self.queue_waits = []
+        self.outcomes = Counter()
+        self.peak_queue = 0
+        self.completed_flows = 0
+
+    async def timed_step(self, step, handler, interaction):
+        start = time.perf_counter()
+        try:
+            await handler(interaction)
+        except Exception as e:
+            self.exceptions[step][type(e).__name__] += 1
+        finally:
+            self.latencies[step].append(time.perf_counter() - start)
+            if interaction.responded_at is not None:
+                self.first_response.append(interaction.responded_at - interaction.created_loop_time)
+
+    def watch_queue(self, modal):
+        """Measure how long a queued modal waits before _process_transaction runs."""
+        enqueued = time.perf_counter()
+        original = modal._process_transaction
+
+        async def process(interaction):
+            self.queue_waits.append(time.perf_counter() - enqueued)
+            self.outcomes["dequeued"] += 1
+            start = time.perf_counter()
+            try:
+                return await original(interaction)
+            except Exception as e:
+                self.exceptions["queued_process"][type(e).__name__] += 1
+                raise
+            finally:
+                self.latencies["queued_process"].append(time.perf_counter() - start)
+
+        modal._process_transaction = process
+
+    async def flow(self, user):
+        from cogs.panel import KamasView
+        from cogs.tickets import PrivateThreadButton, ThreadManagementView, TRANSACTION_QUEUE, KamasModal
+
+        kind = random.choice(("BUY", "SELL"))
+        view = KamasView()
+        button = view.buy_button if kind == "BUY" else view.sell_button
+        click = FakeInteraction(self.bot, self.guild, user, self.panel_channel, custom_id=button.custom_id)
+        await self.timed_step("panel_button", button.callback, click)
+        modal = click.response.modal or KamasModal(kind)
+
+        modal.kamas_amount._value = f"{random.randint(1, 200)}M"
+        modal.price_per_million._value = f"{random.uniform(2, 9):.2f}"
+        modal.payment_method._value = random.choice(("PayPal", "Bank Transfer", "Crypto"))
+        modal.contact_info._value = user.name
+        modal.notes._value = ""
+
+        submit = FakeInteraction(self.bot, self.guild, user, self.ticket_channel)
+        await self.timed_step("modal_submit", modal.on_submit, submit)
+        self.peak_queue = max(self.peak_queue, len(TRANSACTION_QUEUE))
+        if any(entry[1] is modal for entry in TRANSACTION_QUEUE):
+            self.outcomes["queued"] += 1
+            self.watch_queue(modal)
+        else:
+            self.outcomes["admitted"] += 1
+
+        listing = self.ticket_channel.seed(self.guild.me, f"{kind} listing by {user.mention}")
+        thread_view = PrivateThreadButton(seller_id=user.id, transaction_type=kind)
+        open_thread = FakeInteraction(self.bot, self.guild, user, self.ticket_channel, listing)
+        await self.timed_step("create_thread", thread_view.create_thread_button.callback, open_thread)
+
+        # The handler records the thread it created in thread_<custom_id>.txt
+        try:
+            with open(f"thread_{thread_view.custom_id}.txt") as f:
+                thread = self.guild.get_channel(int(f.read().strip()))
+        except (OSError, ValueError):
+            thread = None
+        if thread is None:
+            return
+        await asyncio.sleep(self.args.hold)
+        close = FakeInteraction(self.bot, self.guild, user, thread)
+        await self.timed_step("close_thread", ThreadManagementView().close_thread_button.callback, close)
+        self.completed_flows += 1
+
+    async def virtual_user(self, user, index):
+        await asyncio.sleep(index * self.args.ramp / max(len(self.users), 1))
+        for _ in range(self.args.iterations):
+            await self.flow(user)
+            await asyncio.sleep(random.uniform(0, self.args.think))
+
+    async def run(self):
+        import cogs.tickets as tickets
+
+        tickets.QUEUE_CHECK_INTERVAL = self.args.queue_interval
+        if self.args.max_transactions is not None:
+            tickets.MAX_TRANSACTIONS = self.args.max_transactions
+        tickets.TRANSACTION_QUEUE.clear()
+
+        errors = ErrorLog()
+        logging.getLogger().addHandler(errors)
+        queue_worker = asyncio.create_task(tickets.process_transaction_queue(self.bot))
+        start = time.perf_counter()
+        await asyncio.gather(*(self.virtual_user(u, i) for i, u in enumerate(self.users)))
+        elapsed = time.perf_counter() - start
+        drain_deadline = time.perf_counter() + self.args.drain_timeout
+        while tickets.TRANSACTION_QUEUE and time.perf_counter() < drain_deadline:
+            await asyncio.sleep(0.1)
+        drain_time = time.perf_counter() - start - elapsed
+        queue_worker.cancel()
+        logging.getLogger().removeHandler(errors)
+
+        total_steps = sum(len(v) for v in self.latencies.values())
+        total_exceptions = sum(sum(c.values()) for c in self.exceptions.values())
+        total_logged = sum(errors.counts.values())
+        return {
+            "config": {
+                "users": self.args.users, "iterations": self.args.iterations,
+                "latency_ms": self.args.latency_ms, "hold_s": self.args.hold,
+                "max_transactions": tickets.MAX_TRANSACTIONS,
+                "queue_check_interval_s": self.args.queue_interval,
+            },
+            "elapsed_s": round(elapsed, 3),
+            "queue_drain_s": round(drain_time, 3),
+            "throughput": {
+                "flows_per_s": round(self.completed_flows / elapsed, 3) if elapsed else 0,
+                "submissions_per_s": round(len(self.latencies["modal_submit"]) / elapsed, 3) if elapsed else 0,
+                "completed_flows": self.completed_flows,
+            },
+            "latency": {step: percentiles(self.latencies[step]) for step in STEPS},
+            "time_to_first_response": percentiles(self.first_response),
+            "missed_3s_ack": sum(1 for t in self.first_response if t > 3.0),
+            "admission": dict(self.outcomes, peak_queue_depth=self.peak_queue,
+                              left_in_queue=len(tickets.TRANSACTION_QUEUE)),
+            "queue_wait": percentiles(self.queue_waits),
+            "errors": {
+                "exception_rate": round(total_exceptions / total_steps, 4) if total_steps else 0,
+                "logged_error_rate": round(total_logged / total_steps, 4) if total_steps else 0,
+                "exceptions": {step: dict(c) for step, c in self.exceptions.items()},
+                "logged": dict(errors.counts.most_common(20)),
+            },
+            "rest_calls": dict(self.guild.calls),
+        }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100, help="Concurrent virtual users")
+    parser.add_argument("--iterations", type=int, default=1, help="Flows per virtual user")
+    parser.add_argument("--ramp", type=float, default=1.0, help="Seconds over which users start")
+    parser.add_argument("--think", type=float, default=0.0, help="Max random pause between flows")
+    parser.add_argument("--hold", type=float, default=0.5, help="Seconds a thread stays open before closing")
+    parser.add_argument("--latency-ms", type=float, default=30.0, help="Simulated Discord latency per call")
+    parser.add_argument("--queue-interval", type=float, default=1.0,
+                        help="Override QUEUE_CHECK_INTERVAL (production uses 300s)")
+    parser.add_argument("--max-transactions", type=int, default=None, help="Override MAX_TRANSACTIONS")
+    parser.add_argument("--drain-timeout", type=float, default=60.0,
+                        help="Seconds to keep draining TRANSACTION_QUEUE after the last flow")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    return parser.parse_args(argv)
+
+
+async def main(args):
+    random.seed(args.seed)
+    workdir = tempfile.mkdtemp(prefix="kamas_load_")
+    previous = os.getcwd()
+    # Handlers write listing_/thread_ files to the working directory
+    os.chdir(workdir)
+    try:
+        return await LoadTest(args).run()
+    finally:
+        os.chdir(previous)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    # Keep handler logs quiet but let ERROR records reach the ErrorLog counter
+    logging.basicConfig(level=logging.ERROR, handlers=[logging.NullHandler()])
+    arguments = parse_args()
+    report = json.dumps(asyncio.run(main(arguments)), indent=2)
+    if arguments.output:
+        with open(arguments.output, "w") as f:
+            f.write(report)
+    else:
+        print(report)
@@ -0,0 +1,193 @@
+"""Resident memory per record for the in-memory indexes the bot keeps.
+
+Usage:
+    python -m benchmarks.memory                      # 100k and 1M records
+    python -m benchmarks.memory --sizes 100000 order_book price_alerts
+    python -m benchmarks.memory --output mem.json --compare old.json
+
+Each case fills one structure with synthetic records and reports the bytes
+allocated per record (tracemalloc, after garbage collection), so runs from
+different commits can be compared like benchmarks.run results.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+os.environ.setdefault("DISCORD_TOKEN", "benchmark")
+
+from benchmarks.run import _commit  # noqa: E402
+from utils.analytics import TradeColumns  # noqa: E402
+from utils.leaderboard import SellerLeaderboard  # noqa: E402
+from utils.listing_similarity import ListingSimilarityIndex  # noqa: E402
+from utils.order_book import Order, OrderBook  # noqa: E402
+from utils.price_alerts import PriceAlertIndex  # noqa: E402
+from utils.reputation import ReputationScores, ReputationVotes  # noqa: E402
+from utils.verified_sellers import SellerProfile, VerifiedSellerIndex  # noqa: E402
+
+DEFAULT_SIZES = (100_000, 1_000_000)
+GUILD_ID = 1217700740949348443
+BASE_ID = 1300000000000000000  # Snowflake-sized ids, as Discord hands out
+CURRENCIES = ("USD", "EUR", "GBP")
+NOW = time.time()
+
+
+def _scratch_path():
+    """A path in a fresh directory, so persisted indexes start empty."""
+    return os.path.join(tempfile.mkdtemp(prefix="kamas_mem_"), "data.json")
+
+
+def fill_order_book(count):
+    book = OrderBook()
+    for i in range(count):
+        book.add(Order(
+            BASE_ID + i, GUILD_ID, BASE_ID, "SELL" if i % 2 else "BUY", BASE_ID + i % 5000,
+            CURRENCIES[i % 3], 2 + (i % 40) * 0.05, 1_000_000 * (1 + i % 50)
+        ))
+    return book
+
+
+def fill_price_alerts(count):
+    index = PriceAlertIndex()
+    for i in range(count):
+        index.subscribe(GUILD_ID, BASE_ID + i, "SELL" if i % 2 else "BUY", CURRENCIES[i % 3], 2 + (i % 40) * 0.05)
+    return index
+
+
+def fill_reputation_votes(count):
+    votes = ReputationVotes(ReputationScores(_scratch_path(), leaderboard=SellerLeaderboard()), _scratch_path())
+    for i in range(count):
+        votes.recorded.set((BASE_ID + i // 10, BASE_ID + i), "positive" if i % 5 else "negative", NOW - i)
+    return votes
+
+
+def fill_reputation_scores(count):
+    scores = ReputationScores(_scratch_path(), leaderboard=SellerLeaderboard())
+    for i in range(count):
+        scores.apply(GUILD_ID, BASE_ID + i, "positive" if i % 5 else "negative", NOW - i)
+    return scores
+
+
+def fill_verified_sellers(count):
+    index = VerifiedSellerIndex(_scratch_path())
+    for i in range(count):
+        index.add(SellerProfile(GUILD_ID, BASE_ID + i, {
+            "user_id": BASE_ID + i, "username": f"seller{i}", "social_platform": "Twitter",
+            "social_handle": f"seller{i}", "trading_experience": "2 years", "additional_info": None,
+            "application_date": "2026-01-01T00:00:00", "verified_date": "2026-01-02T00:00:00",
+            "verified_by": BASE_ID
+        }, BASE_ID + i))
+    return index
+
+
+def fill_listing_similarity(count):
+    index = ListingSimilarityIndex(_scratch_path(), max_listings=count)
+    for i in range(count):
+        index.add(BASE_ID + i, GUILD_ID, BASE_ID + i % 5000, "https://discord.com/channels/1/2/3",
+                  f"PayPal\ndiscord: seller{i}#{i % 9973:04d}\nfast delivery, {i % 97} listings done")
+    return index
+
+
+def fill_trade_columns(count):
+    return TradeColumns.from_rows(
+        (1_000_000 * (1 + i % 50), 2 + (i % 7) * 0.25, CURRENCIES[i % 3], NOW - i * 60,
+         BASE_ID + i % 5000, "PayPal")
+        for i in range(count)
+    )
+
+
+CASES = {
+    "order_book": fill_order_book,
+    "price_alerts": fill_price_alerts,
+    "reputation_votes": fill_reputation_votes,
+    "reputation_scores": fill_reputation_scores,
+    "verified_sellers": fill_verified_sellers,
+    "listing_similarity": fill_listing_similarity,
+    "trade_columns": fill_trade_columns,
+}
+
+
+def measure(name, count):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    structure = CASES[name](count)
+    seconds = time.perf_counter() - start
+    gc.collect()
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del structure
+    return {
+        "benchmark": name,
+        "records": count,
+        "bytes": allocated,
+        "bytes_per_record": round(allocated / count, 1),
+        "seconds": round(seconds, 3),
+    }
+
+
+def compare(current, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    old = {(r["benchmark"], r["records"]): r for r in baseline["results"]}
+    print(f"{'benchmark':<20}{'records':>9}{'old B/rec':>11}{'new B/rec':>11}{'ratio':>8}", file=sys.stderr)
+    for result in current["results"]:
+        previous = old.get((result["benchmark"], result["records"]))
+        if not previous:
+            continue
+        print(
+            f"{result['benchmark']:<20}{result['records']:>9}{previous['bytes_per_record']:>11.1f}"
+            f"{result['bytes_per_record']:>11.1f}{result['bytes'] / previous['bytes']:>8.2f}",
+            file=sys.stderr
+        )
+
+
+def main(args):
+    results = []
+    for name in args.benchmarks or list(CASES):
+        for count in args.sizes:
+            entry = measure(name, count)
+            print(
+                f"{name:<20}{count:>9} records  {entry['bytes_per_record']:>8.1f} B/record  "
+                f"{entry['bytes'] / 2**20:>8.1f} MiB",
+                file=sys.stderr
+            )
+            results.append(entry)
+    return {
+        "commit": _commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "results": results,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("benchmarks", nargs="*", help=f"Subset to run: {', '.join(CASES)}")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args(argv)
+    unknown = set(args.benchmarks) - set(CASES)
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+    return args
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    report = main(arguments)
+    text = json.dumps(report, indent=2)
+    if arguments.output:
+        with open(arguments.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    if arguments.compare:
+        compare(report, arguments.compare)
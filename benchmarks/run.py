@@ -0,0 +1,290 @@
+"""Benchmark the storage helpers against an in-process fake Discord.
+
+Usage:
+    python -m benchmarks.run                       # 1k, 10k and 100k records
+    python -m benchmarks.run --sizes 1000 --latency-ms 20 --output bench.json
+    python -m benchmarks.run --compare old.json    # print ratios against an earlier run
+
+Results are JSON: one entry per (benchmark, records) with wall time, the
+simulated network calls made (history pages, REST calls, attachment reads)
+and whether the function returned a usable result. The current commit is
+recorded so runs from different commits can be compared.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+os.environ.setdefault("DISCORD_TOKEN", "benchmark")
+
+from config import (  # noqa: E402
+    REPUTATION_CHANNEL_ID, ARCHIVE_CHANNEL_ID, ESCROW_CHANNEL_ID,
+    VERIFIED_DATA_CHANNEL_ID, TRANSLATIONS_CHANNEL_ID
+)
+from utils.constants import TICKET_CHANNEL_ID  # noqa: E402
+from utils.constants import (  # noqa: E402
+    LISTING_SELLER_FIELD, LISTING_AMOUNT_FIELD, LISTING_PRICE_FIELD, LISTING_CURRENCY_FIELD, LISTING_METHOD_FIELD
+)
+from utils import utils  # noqa: E402
+from utils.records import encode as encode_records  # noqa: E402
+from benchmarks.fake_discord import FakeGuild, FakeBot, FakeEmbed, Latency, spread_timestamps  # noqa: E402
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+PAYMENT_METHODS = ("PayPal", "Bank", "Crypto", "Revolut")
+CURRENCIES = ("USD", "EUR", "GBP")
+
+
+def _sellers(guild, count):
+    return [guild.add_member(name=f"seller{i}") for i in range(count)]
+
+
+def build_reputation(records, latency):
+    guild = FakeGuild(latency=latency)
+    channel = guild.add_channel(REPUTATION_CHANNEL_ID, "reputation")
+    sellers = _sellers(guild, max(records // 50, 1))
+    for i, created in enumerate(spread_timestamps(records)):
+        seller = sellers[i % len(sellers)]
+        vote = "positive" if i % 5 else "negative"
+        if i % 2:
+            # Legacy ledger line
+            ledger = f"{created.isoformat()},{vote}"
+        else:
+            ledger = encode_records("reputation", [{"timestamp": created.isoformat(), "vote": vote}]).decode()
+        channel.seed(guild.me, f"Reputation update for {seller.mention}",
+                     files=[(f"reputation_{seller.id}.txt", ledger)],
+                     created_at=created)
+    return guild, (sellers[0].id, guild)
+
+
+def build_archive(records, latency):
+    guild = FakeGuild(latency=latency)
+    channel = guild.add_channel(ARCHIVE_CHANNEL_ID, "archive")
+    sellers = _sellers(guild, max(records // 20, 1))
+    for i, created in enumerate(spread_timestamps(records, days=21)):
+        seller = sellers[i % len(sellers)]
+        kamas = 1_000_000 * (1 + i % 50)
+        method = PAYMENT_METHODS[i % len(PAYMENT_METHODS)]
+        if i % 2:
+            # Legacy archive: amount and method only in the file name
+            channel.seed(seller, f"Archived transaction from {seller.mention}",
+                         files=[(f"txn_{i}_{kamas}_{method}.txt", f"Transaction {i}")],
+                         created_at=created)
+            continue
+        currency = CURRENCIES[i % len(CURRENCIES)]
+        embed = FakeEmbed("Sell Kamas", fields=[
+            (LISTING_SELLER_FIELD, f"{seller.mention}\nID: {seller.id}"),
+            (LISTING_AMOUNT_FIELD, f"{kamas // 1_000_000}M"),
+            (LISTING_PRICE_FIELD, f"{2 + (i % 7) * 0.25:.2f} {currency}"),
+            (LISTING_CURRENCY_FIELD, currency),
+            (LISTING_METHOD_FIELD, method),
+        ])
+        channel.seed(guild.me, f"Archived transaction from {seller.mention}", embeds=[embed],
+                     files=[(f"txn_{i}.txt", f"Transaction {i}")], created_at=created)
+    return guild
+
+
+def build_market(records, latency):
+    guild = build_archive(records, latency)
+    return guild, (guild,)
+
+
+def build_search(records, latency):
+    guild = build_archive(records, latency)
+    return guild, (guild, "txn_43_")
+
+
+def build_escrows(records, latency):
+    guild = FakeGuild(latency=latency)
+    channel = guild.add_channel(ESCROW_CHANNEL_ID, "escrow")
+    members = _sellers(guild, 30)
+    for i, created in enumerate(spread_timestamps(records)):
+        buyer, seller, middleman = members[i % 30], members[(i + 1) % 30], members[(i + 2) % 30]
+        escrow = {
+            "buyer_id": buyer.id, "seller_id": seller.id, "middleman_id": middleman.id,
+            "amount": 10_000_000, "fee": 100_000,
+            "created_at": created.isoformat(), "status": "completed" if i % 3 else "pending"
+        }
+        if i % 2:
+            # Legacy JSON object with the old key names
+            legacy = {"buyer": buyer.id, "seller": seller.id, "middleman": middleman.id,
+                      **{k: v for k, v in escrow.items() if not k.endswith("_id")}}
+            files = [(f"escrow_{buyer.id}_{seller.id}_{i}.json", json.dumps(legacy))]
+        else:
+            files = [(f"escrow_{buyer.id}_{seller.id}_{i}.txt", encode_records("escrow", [escrow]).decode())]
+        channel.seed(guild.me, "New escrow created", files=files, created_at=created)
+    return guild, (guild,)
+
+
+def build_translate(records, latency):
+    guild = FakeGuild(latency=latency)
+    data_channel = guild.add_channel(VERIFIED_DATA_CHANNEL_ID, "verified-data")
+    translations = guild.add_channel(TRANSLATIONS_CHANNEL_ID, "translations")
+    for lang in ("en", "fr", "es"):
+        strings = {f"key_{k}": f"{lang} text {k} {{name}}" for k in range(200)}
+        translations.seed(guild.me, files=[(f"{lang}.json", json.dumps(strings))])
+    users = []
+    for i, created in enumerate(spread_timestamps(records)):
+        user_id = 10_000 + i
+        users.append(user_id)
+        language = ("en", "fr", "es")[i % 3]
+        if i % 2:
+            content = language  # Legacy bare language code
+        else:
+            content = encode_records("language", [{"user_id": user_id, "language": language}]).decode()
+        data_channel.seed(guild.me, files=[(f"lang_{user_id}.txt", content)], created_at=created)
+    # Oldest preference: the worst case for a newest-first scan
+    return guild, ("key_7", guild, users[0])
+
+
+async def call_translate(key, guild, user_id):
+    return await utils.translate(key, guild, user_id, name="bench")
+
+
+def build_restore(records, latency):
+    guild = FakeGuild(latency=latency)
+    channel = guild.add_channel(TICKET_CHANNEL_ID, "tickets")
+    sellers = _sellers(guild, max(records // 10, 1))
+    workdir = tempfile.mkdtemp(prefix="kamas_bench_")
+    for i in range(records):
+        seller = sellers[i % len(sellers)]
+        message = channel.seed(seller, f"Listing {i}")
+        kind = "SELL" if i % 2 else "BUY"
+        with open(os.path.join(workdir, f"listing_{kind}-{seller.id}-{i}.txt"), "w") as f:
+            f.write(str(message.id))
+    return guild, (FakeBot(guild), workdir)
+
+
+async def call_restore(bot, workdir):
+    from cogs.tickets import restore_views
+    previous = os.getcwd()
+    os.chdir(workdir)
+    try:
+        await restore_views(bot, bot.guilds)
+    finally:
+        os.chdir(previous)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return True
+
+
+BENCHMARKS = {
+    "calculate_reputation": (build_reputation, utils.calculate_reputation),
+    "collect_market_data": (build_market, utils.collect_market_data),
+    "search_archives": (build_search, utils.search_archives),
+    "get_escrow_transactions": (build_escrows, utils.get_escrow_transactions),
+    "translate": (build_translate, call_translate),
+    "restore_active_views": (build_restore, call_restore),
+}
+
+
+def _result_ok(value):
+    return value is not None and value is not False
+
+
+async def run_case(name, records, latency, timeout):
+    build, func = BENCHMARKS[name]
+    guild, args = build(records, latency)
+    guild.calls.clear()
+    entry = {"benchmark": name, "records": records}
+    start = time.perf_counter()
+    try:
+        value = await asyncio.wait_for(func(*args), timeout)
+        entry["ok"] = _result_ok(value)
+        if isinstance(value, (list, dict)):
+            entry["result_size"] = len(value)
+    except asyncio.TimeoutError:
+        entry["ok"] = False
+        entry["timed_out"] = True
+    entry["seconds"] = round(time.perf_counter() - start, 6)
+    entry["calls"] = dict(guild.calls)
+    return entry
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    old = {(r["benchmark"], r["records"]): r for r in baseline["results"]}
+    print(f"{'benchmark':<26}{'records':>9}{'old s':>11}{'new s':>11}{'ratio':>8}", file=sys.stderr)
+    for result in current["results"]:
+        previous = old.get((result["benchmark"], result["records"]))
+        if not previous:
+            continue
+        ratio = result["seconds"] / previous["seconds"] if previous["seconds"] else float("inf")
+        print(
+            f"{result['benchmark']:<26}{result['records']:>9}"
+            f"{previous['seconds']:>11.4f}{result['seconds']:>11.4f}{ratio:>8.2f}",
+            file=sys.stderr
+        )
+
+
+async def main(args):
+    latency = Latency(
+        rest=args.latency_ms / 1000,
+        history_page=args.latency_ms / 1000,
+        attachment=args.attachment_latency_ms / 1000
+    )
+    names = args.benchmarks or list(BENCHMARKS)
+    results = []
+    for name in names:
+        for records in args.sizes:
+            entry = await run_case(name, records, latency, args.timeout)
+            print(
+                f"{name:<26}{records:>9} records  {entry['seconds']:>10.4f}s  "
+                f"{'ok' if entry['ok'] else 'FAILED'}  {entry['calls']}",
+                file=sys.stderr
+            )
+            results.append(entry)
+    return {
+        "commit": _commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "latency_ms": args.latency_ms,
+        "attachment_latency_ms": args.attachment_latency_ms,
+        "results": results,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("benchmarks", nargs="*", help=f"Subset to run: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated REST and history page latency")
+    parser.add_argument("--attachment-latency-ms", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds before a case is abandoned")
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args(argv)
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+    return args
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.CRITICAL)
+    arguments = parse_args()
+    report = asyncio.run(main(arguments))
+    text = json.dumps(report, indent=2)
+    if arguments.output:
+        with open(arguments.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    if arguments.compare:
+        compare(report, arguments.compare)
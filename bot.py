@@ -1,23 +1,26 @@
 """Main bot file using config.py."""
 import discord
 from discord.ext import commands
+from discord.gateway import DiscordWebSocket
 import logging
-from pathlib import Path
-
-# Ensure logs directory exists
-Path("logs").mkdir(exist_ok=True)
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("logs/kamasbot.log"),
-        logging.StreamHandler()
-    ]
-)
+import yarl
+
+from utils.logging_setup import setup_logging
+from utils.metrics import instrument_http, start_metrics_server, watch_shard, SHARD_DISCONNECTS, SHARD_INTERACTIONS
+from config import METRICS_ENABLED, METRICS_HOST, METRICS_PORT, DISCORD_API_BASE, DISCORD_GATEWAY_URL
+from config import SHARD_COUNT, SHARD_IDS, BACKGROUND_JOBS, JOBS_SOCKET
+from utils.jobs import job_server
+
+# Configure queue-based logging (formatting and file I/O run off the event loop)
+setup_logging()
 logger = logging.getLogger(__name__)
 
+# Alternative Discord endpoints (e.g. the local stand-in used for end-to-end benchmarks)
+if DISCORD_API_BASE:
+    discord.http.Route.BASE = DISCORD_API_BASE.rstrip('/')
+if DISCORD_GATEWAY_URL:
+    DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(DISCORD_GATEWAY_URL)
+
 # Bot setup
 intents = discord.Intents.default()
 intents.message_content = True
@@ -25,32 +28,87 @@ intents.members = True
 intents.messages = True
 intents.guilds = True
 
-bot = commands.Bot(
-    command_prefix='!',
-    intents=intents,
-    help_command=None
-)
+if SHARD_COUNT:
+    # One gateway connection per shard; SHARD_IDS lets several processes split the shards
+    if SHARD_IDS and SHARD_COUNT == 'auto':
+        raise ValueError("SHARD_IDS needs a numeric SHARD_COUNT")
+    bot = commands.AutoShardedBot(
+        command_prefix='!',
+        intents=intents,
+        help_command=None,
+        shard_count=None if SHARD_COUNT == 'auto' else int(SHARD_COUNT),
+        shard_ids=SHARD_IDS or None
+    )
+else:
+    bot = commands.Bot(
+        command_prefix='!',
+        intents=intents,
+        help_command=None
+    )
+
+# Count and time every REST request for the metrics endpoint
+instrument_http(bot.http)
 
 @bot.event
 async def on_ready():
     logger.info(f'Bot is ready! Logged in as {bot.user}')
     
+    # A plain Bot reports as shard 0
+    for shard_id in getattr(bot, 'shards', None) or (0,):
+        watch_shard(bot, shard_id)
+    
+    if METRICS_ENABLED:
+        try:
+            await start_metrics_server(METRICS_HOST, METRICS_PORT)
+        except Exception as e:
+            # A taken port must not keep the cogs from loading
+            logger.exception(f"Could not start the metrics endpoint on {METRICS_HOST}:{METRICS_PORT}: {e}")
+    
     # Load cogs
     from cogs.panel import PanelCog
     from cogs.tickets import TicketsCog
     from cogs.verification import VerificationCog
     from cogs.middleman_verification import MiddlemanVerificationCog
     from cogs.verification import VerificationCog
+    from cogs.diagnostics import DiagnosticsCog
+    from cogs.alerts import PriceAlertsCog
+    from cogs.moderation import ModerationCog
     
     await bot.add_cog(PanelCog(bot))
     await bot.add_cog(TicketsCog(bot))
     await bot.add_cog(VerificationCog(bot))
     await bot.add_cog(MiddlemanVerificationCog(bot))
+    await bot.add_cog(DiagnosticsCog(bot))
+    await bot.add_cog(PriceAlertsCog(bot))
+    await bot.add_cog(ModerationCog(bot))
     
     # Sync commands
     await bot.tree.sync()
     logger.info('Application commands synced')
+    
+    # Background jobs run in worker.py, which connects here
+    if BACKGROUND_JOBS == 'worker':
+        await job_server.start(JOBS_SOCKET)
+
+@bot.event
+async def on_shard_ready(shard_id):
+    logger.info(f'Shard {shard_id} ready')
+
+@bot.event
+async def on_shard_disconnect(shard_id):
+    SHARD_DISCONNECTS.inc(shard=shard_id)
+
+@bot.event
+async def on_disconnect():
+    # Only a plain Bot; AutoShardedBot reports through on_shard_disconnect
+    if not SHARD_COUNT:
+        SHARD_DISCONNECTS.inc(shard=0)
+
+@bot.event
+async def on_interaction(interaction):
+    SHARD_INTERACTIONS.inc(shard=interaction.guild.shard_id if interaction.guild else 0)
 
 if __name__ == '__main__':
     from config import DISCORD_TOKEN, SERVER_ID
-    bot.run(DISCORD_TOKEN)
+    # Logging is already configured; keep discord.py from adding its own handler
+    bot.run(DISCORD_TOKEN, log_handler=None)
@@ -0,0 +1,83 @@
+"""Price alert commands."""
+import logging
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from config import MAX_PRICE_ALERTS_PER_USER
+from utils.metrics import track
+from utils.price_alerts import price_alerts
+from utils.utils import parse_kamas_amount, validate_kamas_amount
+
+logger = logging.getLogger(__name__)
+
+CURRENCY_CHOICES = [
+    app_commands.Choice(name=currency, value=currency) for currency in ("USD", "EUR", "GBP", "CAD", "OTHER")
+]
+
+class PriceAlertsCog(commands.Cog):
+    """DM notifications when a listing matches a user's price."""
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    @app_commands.command(name="price_alert", description="Get a DM when a listing matches your price")
+    @app_commands.describe(
+        side="SELL: listings at or below your price; BUY: listings at or above it",
+        currency="Listing currency",
+        price="Price per million",
+        min_amount="Smallest kamas amount to be notified about (e.g. 10M)"
+    )
+    @app_commands.choices(side=[
+        app_commands.Choice(name="SELL listings at or below my price", value="SELL"),
+        app_commands.Choice(name="BUY listings at or above my price", value="BUY")
+    ], currency=CURRENCY_CHOICES)
+    @track("PriceAlertsCog.price_alert")
+    async def price_alert(self, interaction: discord.Interaction, side: str, currency: str, price: float,
+                          min_amount: str = "0"):
+        """Subscribe to listings matching a price."""
+        if not validate_kamas_amount(min_amount):
+            await interaction.response.send_message(
+                "Invalid kamas amount format. Please use format like '10M' or '500K'.", ephemeral=True
+            )
+            return
+        if len(price_alerts.for_user(interaction.guild.id, interaction.user.id)) >= MAX_PRICE_ALERTS_PER_USER:
+            await interaction.response.send_message(
+                f"You already have {MAX_PRICE_ALERTS_PER_USER} price alerts. Remove one with /remove_price_alert.",
+                ephemeral=True
+            )
+            return
+
+        alert = price_alerts.subscribe(
+            interaction.guild.id, interaction.user.id, side, currency, price, parse_kamas_amount(min_amount)
+        )
+        price_alerts.save()
+        logger.info(f"Price alert {alert.alert_id} added by {interaction.user.id}")
+        await interaction.response.send_message(
+            f"Alert added. You'll get a DM for {alert.describe()}", ephemeral=True
+        )
+
+    @app_commands.command(name="my_price_alerts", description="List your price alerts")
+    @track("PriceAlertsCog.my_price_alerts")
+    async def my_price_alerts(self, interaction: discord.Interaction):
+        alerts = price_alerts.for_user(interaction.guild.id, interaction.user.id)
+        if not alerts:
+            await interaction.response.send_message("You have no price alerts.", ephemeral=True)
+            return
+        await interaction.response.send_message("\n".join(a.describe() for a in alerts), ephemeral=True)
+
+    @app_commands.command(name="remove_price_alert", description="Remove one of your price alerts")
+    @app_commands.describe(alert_id="Alert number from /my_price_alerts")
+    @track("PriceAlertsCog.remove_price_alert")
+    async def remove_price_alert(self, interaction: discord.Interaction, alert_id: int):
+        alert = price_alerts.alerts.get(alert_id)
+        if alert is None or alert.user_id != interaction.user.id:
+            await interaction.response.send_message("You have no alert with that number.", ephemeral=True)
+            return
+        price_alerts.remove(alert_id)
+        price_alerts.save()
+        await interaction.response.send_message(f"Removed alert #{alert_id}.", ephemeral=True)
+
+async def setup(bot):
+    """Add the cog to the bot."""
+    await bot.add_cog(PriceAlertsCog(bot))
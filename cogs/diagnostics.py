@@ -0,0 +1,84 @@
+"""Runtime diagnostics for administrators."""
+import logging
+from io import BytesIO
+from datetime import datetime
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from utils.loop_monitor import get_monitor
+from utils.metrics import track
+from utils.tracing import tracer, to_jsonl, to_chrome
+
+logger = logging.getLogger(__name__)
+
+class DiagnosticsCog(commands.Cog):
+    """Event-loop health reporting and trace export."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.monitor = get_monitor()
+        self.monitor.start(self.bot.loop)
+
+    @app_commands.command(name="loop_health", description="Show event loop lag and recent slow handlers")
+    @app_commands.checks.has_permissions(administrator=True)
+    @track("DiagnosticsCog.loop_health")
+    async def loop_health(self, interaction: discord.Interaction):
+        """Display loop lag and the slowest recent loop steps."""
+        snapshot = self.monitor.snapshot()
+        slow = snapshot['slow_callbacks']
+
+        healthy = snapshot['max_lag'] < snapshot['slow_threshold'] and not slow
+        embed = discord.Embed(
+            title="Event Loop Health",
+            color=discord.Color.green() if healthy else discord.Color.orange()
+        )
+        embed.add_field(name="Current Lag", value=f"{snapshot['last_lag'] * 1000:.1f}ms")
+        embed.add_field(name="Max Lag", value=f"{snapshot['max_lag'] * 1000:.1f}ms")
+        embed.add_field(name="Slow Threshold", value=f"{snapshot['slow_threshold'] * 1000:.0f}ms")
+
+        if not slow:
+            embed.add_field(name="Slow Steps", value="None recorded", inline=False)
+        for entry in sorted(slow, key=lambda e: e['duration'], reverse=True)[:5]:
+            stack_tail = "\n".join(entry['stack'].strip().splitlines()[-4:]) or "no stack captured"
+            embed.add_field(
+                name=f"{entry['duration'] * 1000:.0f}ms - {entry['handler']}"[:256],
+                value=f"<t:{int(entry['at'].timestamp())}:R>\n```{stack_tail[:900]}```",
+                inline=False
+            )
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="export_traces", description="Download recent interaction traces")
+    @app_commands.describe(
+        export_format="jsonl (one span per line) or chrome (open in chrome://tracing or Perfetto)",
+        min_ms="Only include traces at least this long"
+    )
+    @app_commands.choices(export_format=[
+        app_commands.Choice(name="JSON lines", value="jsonl"),
+        app_commands.Choice(name="Chrome trace events", value="chrome")
+    ])
+    @app_commands.checks.has_permissions(administrator=True)
+    @track("DiagnosticsCog.export_traces")
+    async def export_traces(self, interaction: discord.Interaction, export_format: str = "jsonl", min_ms: int = 0):
+        """Send recent traces as a file."""
+        traces = tracer.traces(min_duration=min_ms / 1000)
+        if not traces:
+            await interaction.response.send_message("No traces recorded yet.", ephemeral=True)
+            return
+
+        if export_format == "chrome":
+            content, extension = to_chrome(traces), "json"
+        else:
+            content, extension = to_jsonl(traces), "jsonl"
+        filename = f"traces_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+
+        await interaction.response.send_message(
+            f"{len(traces)} traces",
+            file=discord.File(BytesIO(content.encode()), filename=filename),
+            ephemeral=True
+        )
+
+async def setup(bot):
+    """Add the cog to the bot."""
+    await bot.add_cog(DiagnosticsCog(bot))
@@ -8,15 +8,14 @@ import asyncio
 from io import BytesIO
 from datetime import datetime
 
-from utils.utils import get_escrow_transactions, assign_middleman_badge
+from utils.utils import get_escrow_transactions, assign_middleman_badge, resolve_channel
+from utils.metrics import track, background_run
+from utils.guild_config import guild_configs
 from config import (
-    MIDDLEMAN_APPLICATION_CHANNEL_ID,
     MIN_ESCROWS_FOR_APPLICATION,
     MIN_SUCCESS_RATE_FOR_APPLICATION,
-    VERIFICATION_INTERVIEW_CHANNEL_ID,
     MIDDLEMAN_BADGES,
-    MIDDLEMAN_REMINDERS_CHANNEL_ID,
-    GUIDELINE_REMINDER_FREQ_DAYS
+    BACKGROUND_JOBS
 )
 
 logger = logging.getLogger(__name__)
@@ -26,44 +25,31 @@ class MiddlemanVerificationCog(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
-        self.bot.loop.create_task(self.send_guideline_reminders())
+        if BACKGROUND_JOBS != 'worker':  # Otherwise worker.py sends them
+            self.bot.loop.create_task(self.send_guideline_reminders())
 
     async def send_guideline_reminders(self):
-        """Send weekly guideline reminders to middlemen."""
+        """Run the weekly guideline reminder for every configured guild concurrently."""
         await self.bot.wait_until_ready()
-        
-        from config import MIDDLEMAN_REMINDERS_CHANNEL_ID, GUIDELINE_REMINDER_FREQ_DAYS
+        await asyncio.gather(*(
+            self.guideline_reminder_loop(guild) for guild in guild_configs.configured_guilds(self.bot)
+        ))
+
+    async def guideline_reminder_loop(self, guild):
+        """Send guideline reminders to one guild's middlemen."""
+        config = guild_configs.for_guild(guild)
         
         while not self.bot.is_closed():
             try:
-                try:
-                    channel = self.bot.get_channel(MIDDLEMAN_REMINDERS_CHANNEL_ID)
-                    if not channel:
-                        channel = await self.bot.fetch_channel(MIDDLEMAN_REMINDERS_CHANNEL_ID)
-                    if channel is None:
-                        raise ValueError("Middleman reminders channel not found")
-                except Exception as e:
-                    logger.error(f"Failed to fetch middleman reminders channel: {e}")
-                    await asyncio.sleep(3600)
-                    continue
-                
-                reminder = (
-                    "🔔 **Weekly Middleman Reminder** 🔔\n\n"
-                    "Please review our guidelines:\n"
-                    "1. Always verify both parties\n"
-                    "2. Document every step\n"
-                    "3. Escalate disputes promptly\n"
-                    "4. Maintain professional conduct\n\n"
-                    "See #middleman-guidelines for details"
-                )
-                
-                await channel.send(reminder)
-                await asyncio.sleep(GUIDELINE_REMINDER_FREQ_DAYS * 86400)
+                with background_run("send_guideline_reminders"):
+                    await send_guideline_reminder(guild)
+                await asyncio.sleep(config.guideline_reminder_freq_days * 86400)
             except Exception as e:
-                logger.error(f"Guideline reminder failed: {e}")
+                logger.error(f"Guideline reminder failed for guild {guild.id}: {e}")
                 await asyncio.sleep(3600)  # Retry after 1 hour on error
 
     @app_commands.command(name="apply_middleman", description="Apply to become a verified middleman")
+    @track("MiddlemanVerificationCog.apply_middleman")
     async def apply_middleman(self, interaction: discord.Interaction):
         """Handle middleman applications."""
         from utils.utils import get_escrow_transactions
@@ -91,9 +77,10 @@ class MiddlemanVerificationCog(commands.Cog):
             )
         
         # Create application
-        channel = interaction.guild.get_channel(MIDDLEMAN_APPLICATION_CHANNEL_ID)
+        config = guild_configs.for_guild(interaction.guild)
+        channel = interaction.guild.get_channel(config.middleman_application_channel_id)
         if not channel:
-            channel = await interaction.guild.fetch_channel(MIDDLEMAN_APPLICATION_CHANNEL_ID)
+            channel = await interaction.guild.fetch_channel(config.middleman_application_channel_id)
         
         embed = discord.Embed(
             title=f"Middleman Application: {interaction.user.display_name}",
@@ -119,6 +106,22 @@ class MiddlemanVerificationCog(commands.Cog):
             ephemeral=True
         )
 
+async def send_guideline_reminder(guild):
+    """Post the weekly guideline reminder in one guild's middleman reminders channel."""
+    config = guild_configs.for_guild(guild)
+    channel = await resolve_channel(guild, config.middleman_reminders_channel_id)
+    
+    reminder = (
+        "🔔 **Weekly Middleman Reminder** 🔔\n\n"
+        "Please review our guidelines:\n"
+        "1. Always verify both parties\n"
+        "2. Document every step\n"
+        "3. Escalate disputes promptly\n"
+        "4. Maintain professional conduct\n\n"
+        "See #middleman-guidelines for details"
+    )
+    await channel.send(reminder)
+
 async def setup(bot):
     """Add the cog to the bot."""
     await bot.add_cog(MiddlemanVerificationCog(bot))
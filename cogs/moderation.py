@@ -0,0 +1,57 @@
+"""Scam pattern commands for the duplicate-listing check."""
+import logging
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from utils.metrics import track
+from utils.listing_similarity import listing_similarity, MIN_SHINGLES
+
+logger = logging.getLogger(__name__)
+
+class ModerationCog(commands.Cog):
+    """Known scam texts that new listings are compared with."""
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    @app_commands.command(name="add_scam_pattern", description="Report new listings similar to a known scam text")
+    @app_commands.describe(text="Contact info, payment method or notes from a scam listing")
+    @app_commands.checks.has_permissions(administrator=True)
+    @track("ModerationCog.add_scam_pattern")
+    async def add_scam_pattern(self, interaction: discord.Interaction, text: str):
+        pattern_id = listing_similarity.add_pattern(interaction.guild.id, text)
+        if pattern_id is None:
+            await interaction.response.send_message(
+                f"That text is too short to compare; use at least {MIN_SHINGLES + 3} characters.", ephemeral=True
+            )
+            return
+        listing_similarity.save()
+        logger.info(f"Scam pattern {pattern_id} added by {interaction.user.id}")
+        await interaction.response.send_message(f"Added scam pattern #{pattern_id}.", ephemeral=True)
+
+    @app_commands.command(name="scam_patterns", description="List the known scam texts")
+    @app_commands.checks.has_permissions(administrator=True)
+    @track("ModerationCog.scam_patterns")
+    async def scam_patterns(self, interaction: discord.Interaction):
+        patterns = listing_similarity.patterns_for(interaction.guild.id)
+        if not patterns:
+            await interaction.response.send_message("No scam patterns.", ephemeral=True)
+            return
+        lines = [f"#{pattern_id}: {text[:200]}" for pattern_id, text in patterns]
+        await interaction.response.send_message("\n".join(lines)[:2000], ephemeral=True)
+
+    @app_commands.command(name="remove_scam_pattern", description="Remove a known scam text")
+    @app_commands.describe(pattern_id="Pattern number from /scam_patterns")
+    @app_commands.checks.has_permissions(administrator=True)
+    @track("ModerationCog.remove_scam_pattern")
+    async def remove_scam_pattern(self, interaction: discord.Interaction, pattern_id: int):
+        if not listing_similarity.remove_pattern(interaction.guild.id, pattern_id):
+            await interaction.response.send_message("There is no scam pattern with that number.", ephemeral=True)
+            return
+        listing_similarity.save()
+        await interaction.response.send_message(f"Removed scam pattern #{pattern_id}.", ephemeral=True)
+
+async def setup(bot):
+    """Add the cog to the bot."""
+    await bot.add_cog(ModerationCog(bot))
@@ -1,9 +1,13 @@
 import logging
+import os
+import asyncio
 import discord
 from discord import ui, app_commands
 from discord.ext import commands
 from utils.utils import rate_limited, fetch_kamas_logo
-from utils.constants import PANEL_CHANNEL_ID, SERVER_ID, KAMAS_LOGO_URL
+from utils.metrics import track
+from utils.constants import KAMAS_LOGO_URL
+from utils.guild_config import guild_configs
 from utils.utils import (
     parse_kamas_amount, 
     format_kamas_amount, 
@@ -23,6 +27,7 @@ class KamasView(ui.View):
     
     @rate_limited()
     @discord.ui.button(label="BUY KAMAS", style=discord.ButtonStyle.primary, custom_id="buy_kamas", emoji="💰")
+    @track("KamasView.buy_button")
     async def buy_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         try:
             await interaction.response.send_modal(KamasModal("BUY"))
@@ -35,6 +40,7 @@ class KamasView(ui.View):
     
     @rate_limited()
     @discord.ui.button(label="SELL KAMAS", style=discord.ButtonStyle.success, custom_id="sell_kamas", emoji="💎")
+    @track("KamasView.sell_button")
     async def sell_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         try:
             await interaction.response.send_modal(KamasModal("SELL"))
@@ -47,6 +53,7 @@ class KamasView(ui.View):
     
     @rate_limited()
     @discord.ui.button(label="BECOME VERIFIED SELLER", style=discord.ButtonStyle.secondary, custom_id="verify_seller", emoji="🏆")
+    @track("KamasView.verify_button")
     async def verify_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         try:
             await interaction.response.send_modal(VerificationModal())
@@ -72,16 +79,24 @@ class PanelCog(commands.Cog):
     
     def __init__(self, bot):
         self.bot = bot
-        self.panel_message = None
+        self.panel_messages = {}  # guild id -> current panel message
         self.bot.loop.create_task(self.setup_panel())
     
     async def setup_panel(self):
+        """Post the panel in every configured guild concurrently."""
         await self.bot.wait_until_ready()
+        await asyncio.gather(*(
+            self.post_panel(guild) for guild in guild_configs.configured_guilds(self.bot)
+        ))
+    
+    async def post_panel(self, guild):
+        """Replace the trading panel in one guild's panel channel."""
         try:
-            logger.info(f"Looking for channel with ID: {PANEL_CHANNEL_ID}")
-            panel_channel = self.bot.get_channel(PANEL_CHANNEL_ID)
+            config = guild_configs.for_guild(guild)
+            logger.info(f"Looking for channel with ID: {config.panel_channel_id}")
+            panel_channel = guild.get_channel(config.panel_channel_id)
             if not panel_channel:
-                panel_channel = await self.bot.fetch_channel(PANEL_CHANNEL_ID)
+                panel_channel = await guild.fetch_channel(config.panel_channel_id)
             
             logger.info(f"Found channel: {panel_channel.name} in guild: {panel_channel.guild}")
             logger.info(f"Bot permissions in channel: {panel_channel.permissions_for(panel_channel.guild.me)}")
@@ -121,9 +136,14 @@ class PanelCog(commands.Cog):
             embed.add_field(name="🔒 Secure & Private Communications", value="\u200b", inline=False)
             embed.add_field(name="👥 Trusted Intermediary Service", value="\u200b", inline=False)
             
+            thresholds = config.badge_thresholds
             embed.add_field(
                 name="Seller Badges", 
-                value="» 🥉 Bronze (10+ trades)\n» 🥈 Silver (30+)\n» 🥇 Gold (50+)",
+                value=(
+                    f"» 🥉 Bronze ({thresholds['BRONZE']}+ trades)\n"
+                    f"» 🥈 Silver ({thresholds['SILVER']}+)\n"
+                    f"» 🥇 Gold ({thresholds['GOLD']}+)"
+                ),
                 inline=False
             )
             
@@ -143,20 +163,22 @@ class PanelCog(commands.Cog):
             embed.set_footer(text="AFL Wall Street - Making transactions secure since Today we are just Testing this Idea")
             
             # Post new panel
-            self.panel_message = await panel_channel.send(embed=embed, view=KamasView())
-            logger.info(f"Created new kamas panel: {self.panel_message.id}")
+            message = await panel_channel.send(embed=embed, view=KamasView())
+            self.panel_messages[guild.id] = message
+            logger.info(f"Created new kamas panel in {guild.name}: {message.id}")
             
         except Exception as e:
-            logger.exception(f"Error setting up kamas panel: {e}")
+            logger.exception(f"Error setting up kamas panel in guild {guild.id}: {e}")
     
     @app_commands.command(name="wallstreet_reset", description="Reset the AFL Wall Street kamas trading panel")
     @app_commands.checks.has_permissions(administrator=True)
+    @track("PanelCog.reset_panel")
     async def reset_panel(self, interaction: discord.Interaction):
         try:
             panel_file_path = "kamas_panel_id.txt"
             if os.path.exists(panel_file_path):
                 os.remove(panel_file_path)
-            await self.setup_panel()
+            await self.post_panel(interaction.guild)
             await interaction.response.send_message("AFL Wall Street trading panel has been reset!", ephemeral=True)
         except Exception as e:
             logger.exception(f"Error resetting AFL Wall Street panel: {e}")
@@ -8,20 +8,49 @@ import uuid
 import aiohttp
 from io import BytesIO
 import logging
-import json
 import asyncio
+import time
 from dotenv import load_dotenv
 from utils.utils import archive_transaction, search_archives, generate_market_report
-from utils.constants import TICKET_CHANNEL_ID, CURRENCY_SYMBOLS, ARCHIVE_AFTER_DAYS
+from utils.constants import CURRENCY_SYMBOLS
+from utils.constants import (
+    LISTING_SELLER_FIELD, LISTING_AMOUNT_FIELD, LISTING_PRICE_FIELD, LISTING_CURRENCY_FIELD, LISTING_METHOD_FIELD,
+    LISTING_CONTACT_FIELD
+)
+from utils.guild_config import guild_configs
 from utils.utils import parse_kamas_amount, format_kamas_amount, store_verification_data, validate_kamas_amount
+from utils.utils import resolve_channel, iter_history, calculate_reputation
+from utils.utils import create_escrow, parse_archived_trade
+from utils.logging_setup import interaction_context
+from utils.metrics import track, background_run, QUEUE_DEPTH
+from utils.jobs import job_server, run_for_guilds, seconds_until_weekly_report
+from utils.sketches import price_sketches
+from utils.order_book import Order, order_book
+from utils.price_alerts import price_alerts, dm_batcher
+from utils.reputation import reputation_votes, reputation_scores, VOTE_EMOJIS
+from utils.leaderboard import seller_leaderboard
+from utils.verified_sellers import verified_sellers
+from utils.listing_similarity import listing_similarity, listing_text
+from utils.sessions import listing_sessions
+from utils import records
+from config import BACKGROUND_JOBS, REPUTATION_HALF_LIFE_DAYS, LISTING_SESSION_TTL
+from utils.tracing import span, traced
 from datetime import timedelta
 import asyncio
 from collections import deque
 
+SELLER_LEADERBOARD_LABELS = {
+    "score": "positive minus negative votes",
+    "positive": "positive votes",
+    "decayed": f"recent score ({REPUTATION_HALF_LIFE_DAYS}-day half-life)",
+    "volume": "kamas in archived listings"
+}
+
 # Transaction queue system
 TRANSACTION_QUEUE = deque()
 MAX_TRANSACTIONS = 50  # Maximum active transactions allowed
 QUEUE_CHECK_INTERVAL = 300  # 5 minutes between queue checks
+QUEUE_DEPTH.set_function(lambda: len(TRANSACTION_QUEUE))
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +71,7 @@ class CurrencySelect(discord.ui.Select):
             options=options
         )
     
+    @track("CurrencySelect.callback")
     async def callback(self, interaction: discord.Interaction):
         await interaction.response.defer()
         self.view.currency = self.values[0]
@@ -95,22 +125,22 @@ class KamasModal(ui.Modal):
             max_length=500
         )
         
-        # Currency dropdown
-        self.currency_select = CurrencySelect()
-        
-        # Add fields to modal
+        # Add fields to modal (Discord allows at most five; currency is chosen in the next step)
         self.add_item(self.kamas_amount)
         self.add_item(self.price_per_million)
         self.add_item(self.payment_method)
         self.add_item(self.contact_info)
         self.add_item(self.notes)
-        self.add_item(self.currency_select)
     
+    @track("KamasModal.on_submit", auto_defer=True)
     async def on_submit(self, interaction: discord.Interaction):
+        started = time.perf_counter()
         try:
-            channel = interaction.guild.get_channel(TICKET_CHANNEL_ID) or \
-                     await interaction.guild.fetch_channel(TICKET_CHANNEL_ID)
-            active_threads = len([t for t in channel.threads if not t.archived])
+            config = guild_configs.for_guild(interaction.guild)
+            channel = await resolve_channel(interaction.guild, config.ticket_channel_id)
+            with span("count_threads") as current:
+                active_threads = len([t for t in channel.threads if not t.archived])
+                current.set(active_threads=active_threads)
             
             if active_threads >= MAX_TRANSACTIONS:
                 TRANSACTION_QUEUE.append((interaction, self))
@@ -120,18 +150,26 @@ class KamasModal(ui.Modal):
                     "You'll be notified when your transaction can be processed.",
                     ephemeral=True
                 )
-                logger.info(f"Added transaction to queue (Position: {len(TRANSACTION_QUEUE)})")
+                logger.info(
+                    f"Added transaction to queue (Position: {len(TRANSACTION_QUEUE)})",
+                    extra=interaction_context(interaction, started)
+                )
                 return
                 
             await self._process_transaction(interaction)
+            logger.info(
+                f"{self.transaction_type} submission processed",
+                extra=interaction_context(interaction, started)
+            )
             
         except Exception as e:
-            logger.error(f"Modal submission error: {e}")
+            logger.error(f"Modal submission error: {e}", extra=interaction_context(interaction, started))
             await interaction.response.send_message(
                 "An error occurred. Please try again later.",
                 ephemeral=True
             )
 
+    @traced("KamasModal._process_transaction")
     async def _process_transaction(self, interaction):
         """Handle actual transaction processing"""
         try:
@@ -149,7 +187,7 @@ class KamasModal(ui.Modal):
             payment_method = self.children[2].value
             contact_info = self.children[3].value
             additional_info = self.children[4].value
-            currency = self.children[5].values[0]
+            currency = self.currency
             
             # Validate kamas amount
             kamas_amount = parse_kamas_amount(amount)
@@ -191,26 +229,27 @@ class KamasModal(ui.Modal):
                 "currency": currency
             }
             
-            temp_file_name = f"temp_form_{interaction.user.id}.txt"
-            with open(temp_file_name, "w") as f:
-                for key, value in form_data.items():
-                    f.write(f"{key}:{value}\n")
+            # Keyed by this submission, so a second form from the same user gets its own session
+            session_id = interaction.id
+            listing_sessions.put(session_id, form_data)
             
-            view = ui.View(timeout=300)
+            view = ui.View(timeout=LISTING_SESSION_TTL)
             currency_select = CurrencySelect()
             view.add_item(currency_select)
             
+            @track("KamasModal.currency_callback", auto_defer=True)
             async def currency_callback(interaction: discord.Interaction):
                 selected_currency = currency_select.values[0]
-                await process_listing(interaction, selected_currency, temp_file_name)
+                await process_listing(interaction, selected_currency, session_id)
                 
             currency_select.callback = currency_callback
             
-            await interaction.response.send_message(
-                "Please select the currency for your transaction:", 
-                view=view,
-                ephemeral=True
-            )
+            with span("send_currency_select"):
+                await interaction.response.send_message(
+                    "Please select the currency for your transaction:", 
+                    view=view,
+                    ephemeral=True
+                )
             
         except Exception as e:
             logger.error(f"Modal submission error: {e}")
@@ -219,6 +258,110 @@ class KamasModal(ui.Modal):
                 ephemeral=True
             )
 
+@traced("process_listing")
+async def process_listing(interaction: discord.Interaction, currency: str, session_id: int):
+    """Post a listing from the modal form in its session once its currency is chosen."""
+    try:
+        # Popped up front, so a second click on the select cannot post the listing twice
+        form_data = listing_sessions.pop(session_id)
+        if form_data is None:
+            await interaction.response.edit_message(
+                content="This listing form has expired or was already posted. Please submit it again.", view=None
+            )
+            return
+
+        transaction_type = form_data["transaction_type"]
+        user_id = form_data["user_id"]
+        price_per_m = form_data["price_per_m"]
+
+        embed = discord.Embed(
+            title=f"{transaction_type} Kamas Listing",
+            description=form_data.get("additional_info") or None,
+            color=discord.Color.green() if transaction_type == "SELL" else discord.Color.blue(),
+            timestamp=datetime.now(timezone.utc)
+        )
+        embed.add_field(name=LISTING_SELLER_FIELD, value=f"<@{user_id}>\nID: {user_id}", inline=True)
+        embed.add_field(name=LISTING_AMOUNT_FIELD, value=form_data["kamas_amount_str"], inline=True)
+        embed.add_field(name=LISTING_PRICE_FIELD, value=f"{price_per_m:g} {currency}", inline=True)
+        embed.add_field(name=LISTING_CURRENCY_FIELD, value=currency, inline=True)
+        embed.add_field(name=LISTING_METHOD_FIELD, value=form_data["payment_method"], inline=True)
+        embed.add_field(name=LISTING_CONTACT_FIELD, value=form_data["contact_info"], inline=True)
+        profile = verified_sellers.get(interaction.guild.id, user_id)
+        if profile:
+            embed.add_field(name="Verified Seller", value=profile.badge(), inline=True)
+
+        config = guild_configs.for_guild(interaction.guild)
+        channel = await resolve_channel(interaction.guild, config.ticket_channel_id)
+        view = PrivateThreadButton(seller_id=user_id, transaction_type=transaction_type)
+        message = await channel.send(embed=embed, view=view)
+
+        reputation_votes.add_listing(interaction.guild.id, message.id, user_id)
+
+        # restore_views() reattaches the button after a restart
+        listing_file = f"listing_{transaction_type}-{user_id}-{message.id}.txt"
+        with span("listing_file_write", path=listing_file):
+            with open(listing_file, "w") as f:
+                f.write(str(message.id))
+
+        # Saved by the periodic sketch flush, not per listing
+        price_sketches.add(currency, price_per_m)
+
+        order = Order(
+            message.id, interaction.guild.id, channel.id, transaction_type, user_id,
+            currency, price_per_m, float(form_data["kamas_amount"])
+        )
+        matches = order_book.matches(order)
+        order_book.add(order)
+
+        text = listing_text(form_data["payment_method"], form_data["contact_info"], form_data.get("additional_info"))
+        with span("duplicate_check"):
+            similar = listing_similarity.similar(interaction.guild.id, user_id, text)
+            listing_similarity.add(message.id, interaction.guild.id, user_id, message.jump_url, text)
+        if similar:
+            await report_similar_listing(interaction.guild, message, user_id, similar)
+
+        for alert in price_alerts.matching(order):
+            dm_batcher.queue(
+                interaction.client, alert.user_id,
+                f"🔔 {transaction_type} {format_kamas_amount(order.amount)} at {price_per_m:g} {currency} "
+                f"(alert #{alert.alert_id}): {message.jump_url}"
+            )
+
+        content = f"Your listing has been posted: {message.jump_url}"
+        if matches:
+            content += "\n\n**Best matching listings:**\n" + "\n".join(
+                f"• {format_kamas_amount(m.amount)} at {m.price_per_m:g} {m.currency} by <@{m.user_id}>: {m.jump_url}"
+                for m in matches
+            )
+        await interaction.response.edit_message(content=content, view=None)
+
+    except Exception as e:
+        logger.error(f"Listing creation failed: {e}")
+        await interaction.response.send_message(
+            "An error occurred while posting your listing. Please try again later.",
+            ephemeral=True
+        )
+
+async def report_similar_listing(guild, message, user_id, similar):
+    """Send moderators a new listing's near-duplicates and scam pattern matches."""
+    try:
+        config = guild_configs.for_guild(guild)
+        channel = await resolve_channel(guild, config.moderation_channel_id)
+        embed = discord.Embed(
+            title="🚩 Possible Duplicate Listing",
+            description=f"Listing by <@{user_id}>: {message.jump_url}",
+            color=discord.Color.red()
+        )
+        for match in similar[:10]:
+            name = "Scam pattern" if match.pattern_id is not None else "Similar listing"
+            embed.add_field(name=f"{name} ({match.similarity:.0%})", value=match.describe(), inline=False)
+        if len(similar) > 10:
+            embed.set_footer(text=f"{len(similar) - 10} more similar listings not shown")
+        await channel.send(embed=embed)
+        logger.warning(f"Listing {message.id} by {user_id} matches {len(similar)} listings or scam patterns")
+    except Exception as e:
+        logger.error(f"Failed to report similar listing {message.id}: {e}")
+
 class PrivateThreadButton(ui.View):
     """Button to create a private thread for transactions."""
     
@@ -231,6 +374,7 @@ class PrivateThreadButton(ui.View):
         self.create_thread_button.custom_id = self.custom_id
     
     @discord.ui.button(label="Start Private Discussion", style=discord.ButtonStyle.primary, emoji="🔒", custom_id="private_thread")
+    @track("PrivateThreadButton.create_thread_button", auto_defer=True)
     async def create_thread_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         try:
             if not (interaction.user.guild_permissions.administrator or 
@@ -247,8 +391,9 @@ class PrivateThreadButton(ui.View):
             
             if os.path.exists(thread_file_path):
                 try:
-                    with open(thread_file_path, "r") as f:
-                        existing_thread_id = int(f.read().strip())
+                    with span("thread_file_read", path=thread_file_path):
+                        with open(thread_file_path, "r") as f:
+                            existing_thread_id = int(f.read().strip())
                     try:
                         thread = await interaction.guild.fetch_channel(existing_thread_id)
                         await interaction.response.send_message(
@@ -272,15 +417,17 @@ class PrivateThreadButton(ui.View):
                 auto_archive_duration=10080
             )
             
-            with open(thread_file_path, "w") as f:
-                f.write(str(thread.id))
+            with span("thread_file_write", path=thread_file_path):
+                with open(thread_file_path, "w") as f:
+                    f.write(str(thread.id))
             
+            # Independent REST calls: fetch both users at once, then add both at once
+            participants = [self.seller_id] + ([self.buyer_id] if self.buyer_id else [])
+            users = {}
             try:
-                seller = await interaction.client.fetch_user(self.seller_id)
-                await thread.add_user(seller)
-                if self.buyer_id:
-                    buyer = await interaction.client.fetch_user(self.buyer_id)
-                    await thread.add_user(buyer)
+                fetched = await asyncio.gather(*(interaction.client.fetch_user(user_id) for user_id in participants))
+                users = dict(zip(participants, fetched))
+                await asyncio.gather(*(thread.add_user(user) for user in fetched))
             except Exception as e:
                 logger.error(f"Error adding users to thread: {e}")
             
@@ -292,21 +439,28 @@ class PrivateThreadButton(ui.View):
             transaction_text = "listing" if not self.transaction_type else self.transaction_type.lower()
             thread_management = ThreadManagementView()
             
-            seller = await interaction.client.fetch_user(self.seller_id)
+            seller = users.get(self.seller_id) or await interaction.client.fetch_user(self.seller_id)
             seller_info = f"**Seller:** {seller.mention} (ID: {seller.id})\n"
             
             buyer_info = ""
             if self.buyer_id:
-                buyer = await interaction.client.fetch_user(self.buyer_id)
+                buyer = users.get(self.buyer_id) or await interaction.client.fetch_user(self.buyer_id)
                 buyer_info = f"**Buyer:** {buyer.mention} (ID: {buyer.id})\n"
             
+            # The listing embed is the only record of the trade terms
+            embeds = interaction.message.embeds if interaction.message else []
+            listing = {field.name: field.value for field in embeds[0].fields} if embeds else {}
+            amount_str = listing.get(LISTING_AMOUNT_FIELD, "Unknown")
+            
             # Add payment split information if applicable
             payment_info = ""
-            if form_data.get("payment_split"):
+            kamas_amount = parse_kamas_amount(amount_str) if validate_kamas_amount(amount_str) else None
+            if kamas_amount and kamas_amount > 50000000:  # 50MK
+                half_amount = kamas_amount / 2
                 payment_info = (
                     f"**Payment Split Required:**\n"
-                    f"• First half: {format_kamas_amount(payment_split['first_half'])}\n"
-                    f"• Second half: {format_kamas_amount(payment_split['second_half'])}\n\n"
+                    f"• First half: {format_kamas_amount(half_amount)}\n"
+                    f"• Second half: {format_kamas_amount(kamas_amount - half_amount)}\n\n"
                 )
             
             await thread.send(
@@ -314,9 +468,9 @@ class PrivateThreadButton(ui.View):
                 f"{seller_info}{buyer_info}"
                 f"{payment_info}"
                 f"**Transaction Details:**\n"
-                f"• Amount: {form_data['kamas_amount_str']}\n"
-                f"• Price per Million: {form_data['price_per_m']}\n"
-                f"• Payment Method: {form_data['payment_method']}\n\n"
+                f"• Amount: {amount_str}\n"
+                f"• Price per Million: {listing.get(LISTING_PRICE_FIELD, 'Unknown')}\n"
+                f"• Payment Method: {listing.get(LISTING_METHOD_FIELD, 'Unknown')}\n\n"
                 f"**Guidelines:**\n"
                 f"• Verify payment details\n"
                 f"• Complete transaction in order\n"
@@ -339,6 +493,7 @@ class ThreadManagementView(ui.View):
         super().__init__(timeout=None)
 
     @discord.ui.button(label="Close Transaction", style=discord.ButtonStyle.danger, emoji="🔒", custom_id="close_thread")
+    @track("ThreadManagementView.close_thread_button")
     async def close_thread_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         try:
             if not (interaction.user.guild_permissions.administrator or 
@@ -357,23 +512,28 @@ class ThreadManagementView(ui.View):
                 )
                 return
             
-            thread_file_paths = [f for f in os.listdir() if f.startswith("thread_") and f.endswith(".txt")]
-            for file_path in thread_file_paths:
-                try:
-                    with open(file_path, "r") as f:
-                        thread_id = int(f.read().strip())
-                        if thread_id == thread.id:
-                            os.remove(file_path)
-                            logger.info(f"Removed thread file {file_path}")
-                            break
-                except:
-                    pass
+            with span("thread_file_scan") as current:
+                thread_file_paths = [f for f in os.listdir() if f.startswith("thread_") and f.endswith(".txt")]
+                current.set(files=len(thread_file_paths))
+                for file_path in thread_file_paths:
+                    try:
+                        with open(file_path, "r") as f:
+                            thread_id = int(f.read().strip())
+                            if thread_id == thread.id:
+                                os.remove(file_path)
+                                logger.info(f"Removed thread file {file_path}")
+                                break
+                    except:
+                        pass
             
             await interaction.response.send_message("Closing this transaction thread. Thank you for using AFL Wall Street!")
             
             await asyncio.sleep(3)
             
             await thread.edit(archived=True, locked=True)
+            # Threads are started from the listing message and share its id
+            order_book.remove(thread.id)
+            listing_similarity.remove(thread.id)
             logger.info(f"Thread {thread.id} has been closed and archived")
             
         except Exception as e:
@@ -388,28 +548,57 @@ class TicketsCog(commands.Cog):
     
     def __init__(self, bot):
         self.bot = bot
-        self.bot.add_listener(self.on_reaction_add, 'on_reaction_add')
-        self.bot.loop.create_task(self.check_old_tickets())  # Start auto-archive
-        self.bot.loop.create_task(self.weekly_market_report())
-        self.bot.loop.create_task(self.check_escrow_timeouts())  # Add this line
-        self.bot.loop.create_task(self.restore_active_views())
-        self.bot.loop.create_task(self.process_transaction_queue(bot))
+        self.bot.add_listener(self.on_raw_reaction_add, 'on_raw_reaction_add')
+        self.bot.add_listener(self.on_raw_reaction_remove, 'on_raw_reaction_remove')
+        if BACKGROUND_JOBS == 'worker':
+            # worker.py runs the scheduled jobs; it restores views whenever it (re)connects
+            job_server.on_connect(self.restore_views_in_worker)
+            job_server.on("listings_closed", self.close_worker_orders)
+        else:
+            self.bot.loop.create_task(self.check_old_tickets())  # Start auto-archive
+            self.bot.loop.create_task(self.weekly_market_report())
+            self.bot.loop.create_task(self.check_escrow_timeouts())
+            self.bot.loop.create_task(self.restore_active_views())
+        # Queue entries hold live interactions, so the queue is always drained here
+        self.bot.loop.create_task(process_transaction_queue(bot))
+        # Reactions arrive here, so their ledger writes are batched here too
+        self.reputation_flush = self.bot.loop.create_task(reputation_votes.run(bot))
+        self.sketch_flush = self.bot.loop.create_task(price_sketches.run())
+    
+    async def cog_unload(self):
+        self.reputation_flush.cancel()
+        self.sketch_flush.cancel()
+        await reputation_votes.flush(self.bot)
+        await price_sketches.flush()
     
-    async def on_reaction_add(self, reaction, user):
-        """Handle reputation updates from reactions."""
+    def _listing_vote(self, payload):
+        """The vote a reaction event casts on a listing, or None if it is not a listing vote."""
+        if payload.guild_id is None:
+            return None
+        config = guild_configs.get(payload.guild_id)
+        if not config or payload.channel_id != config.ticket_channel_id:
+            return None
+        return VOTE_EMOJIS.get(str(payload.emoji))
+    
+    @track("TicketsCog.on_raw_reaction_add")
+    async def on_raw_reaction_add(self, payload):
+        """Count 👍/👎 on listings as reputation votes, including listings no longer in the message cache."""
         try:
-            if user.bot:
-                return
-                
-            if reaction.message.channel.id != TICKET_CHANNEL_ID:
+            if payload.member is not None and payload.member.bot:
                 return
-                
-            if str(reaction.emoji) == '👍':
-                seller_id = reaction.message.embeds[0].fields[0].value.split(':')[1].strip()
-                await update_reputation(reaction.message, int(seller_id), True)
-            elif str(reaction.emoji) == '👎':
-                seller_id = reaction.message.embeds[0].fields[0].value.split(':')[1].strip()
-                await update_reputation(reaction.message, int(seller_id), False)
+            vote = self._listing_vote(payload)
+            if vote:
+                reputation_votes.vote(payload.message_id, payload.user_id, vote)
+        except Exception as e:
+            logger.error(f"Reaction handling failed: {e}")
+    
+    @track("TicketsCog.on_raw_reaction_remove")
+    async def on_raw_reaction_remove(self, payload):
+        """Withdraw a vote when its reaction is removed."""
+        try:
+            vote = self._listing_vote(payload)
+            if vote:
+                reputation_votes.withdraw(payload.message_id, payload.user_id, vote)
         except Exception as e:
             logger.error(f"Reaction handling failed: {e}")
 
@@ -430,96 +619,90 @@ class TicketsCog(commands.Cog):
         embed.add_field(name="Positive", value=str(rep['positive']))
         embed.add_field(name="Negative", value=str(rep['negative']))
         
+        decayed = reputation_scores.get(interaction.guild.id, seller_id)
+        embed.add_field(name="Recent Score", value=f"{decayed['decayed_score']:.1f}")
+        embed.add_field(
+            name="Recent Votes",
+            value=f"👍 {decayed['decayed_positive']:.1f} · 👎 {decayed['decayed_negative']:.1f}"
+        )
+        embed.set_footer(text=f"Recent values count a vote half as much after {REPUTATION_HALF_LIFE_DAYS} days")
+        
         await interaction.response.send_message(embed=embed)
 
+    @app_commands.command(name="seller_reputation", description="Show a seller's trading reputation")
+    @track("TicketsCog.seller_reputation")
+    async def seller_reputation(self, interaction: discord.Interaction, seller: discord.Member):
+        await self.show_seller_reputation(interaction, seller.id)
+
+    @app_commands.command(name="seller_leaderboard", description="Top sellers by reputation or traded volume")
+    @app_commands.describe(metric="What to rank sellers by", count="Sellers to show (up to 100)")
+    @app_commands.choices(metric=[
+        app_commands.Choice(name="Score (positive minus negative votes)", value="score"),
+        app_commands.Choice(name="Positive votes", value="positive"),
+        app_commands.Choice(name="Recent score", value="decayed"),
+        app_commands.Choice(name="Traded volume", value="volume")
+    ])
+    @track("TicketsCog.seller_leaderboard")
+    async def seller_leaderboard(self, interaction: discord.Interaction, metric: str = "score",
+                                 count: app_commands.Range[int, 1, 100] = 10):
+        """Display the seller leaderboard from the incrementally maintained rankings."""
+        top = seller_leaderboard.top(interaction.guild.id, metric, count)
+        if not top:
+            await interaction.response.send_message("No sellers have been ranked yet.", ephemeral=True)
+            return
+
+        decay = reputation_scores.decay()
+        lines = []
+        for i, (seller_id, value) in enumerate(top, 1):
+            if metric == "volume":
+                shown = f"{format_kamas_amount(value)} kamas"
+            elif metric == "decayed":
+                shown = f"{value * decay:.1f}"
+            else:
+                shown = str(value)
+            lines.append(f"**#{i}** <@{seller_id}> — {shown}")
+
+        # 25 lines per embed keeps each description well under Discord's limit
+        embeds = [
+            discord.Embed(title="Top Sellers", color=0xFFD700, description="\n".join(lines[start:start + 25]))
+            for start in range(0, len(lines), 25)
+        ]
+        embeds[0].set_footer(text=f"Ranked by {SELLER_LEADERBOARD_LABELS[metric]}")
+        await interaction.response.send_message(embeds=embeds)
+
     async def restore_active_views(self):
+        await self.bot.wait_until_ready()
+        with background_run("restore_active_views"):
+            restored = await restore_views(self.bot, guild_configs.configured_guilds(self.bot))
+        register_restored_views(self.bot, restored)
+
+    async def restore_views_in_worker(self):
+        """Have a newly connected worker restore listing views, then route their clicks here."""
         await self.bot.wait_until_ready()
         try:
-            ticket_channel = self.bot.get_channel(TICKET_CHANNEL_ID)
-            if not ticket_channel:
-                ticket_channel = await self.bot.fetch_channel(TICKET_CHANNEL_ID)
-            
-            listing_files = [f for f in os.listdir() if f.startswith("listing_")]
-            
-            for file in listing_files:
-                try:
-                    with open(file, "r") as f:
-                        message_id = int(f.read().strip())
-                    
-                    parts = file.replace("listing_", "").replace(".txt", "").split("-")
-                    transaction_type = parts[0]
-                    seller_id = int(parts[1])
-                    
-                    try:
-                        message = await ticket_channel.fetch_message(message_id)
-                        thread_files = [tf for tf in os.listdir() if tf.startswith(f"thread_private_thread_{seller_id}_")]
-                        buyer_id = None
-                        
-                        if thread_files and not thread_files[0].endswith("_0.txt"):
-                            buyer_part = thread_files[0].split("_")[-1].replace(".txt", "")
-                            if buyer_part != "0":
-                                buyer_id = int(buyer_part)
-                        
-                        view = PrivateThreadButton(seller_id=seller_id, buyer_id=buyer_id, transaction_type=transaction_type)
-                        await message.edit(view=view)
-                        logger.info(f"Restored view for listing {file}")
-                    except discord.NotFound:
-                        os.remove(file)
-                        logger.info(f"Removed stale listing file {file}")
-                    except Exception as e:
-                        logger.error(f"Error restoring view for {file}: {e}")
-                except Exception as e:
-                    logger.error(f"Error processing listing file {file}: {e}")
-            
-            thread_files = [f for f in os.listdir() if f.startswith("thread_private_thread_")]
-            for file in thread_files:
-                try:
-                    with open(file, "r") as f:
-                        thread_id = int(f.read().strip())
-                    
-                    try:
-                        thread = await self.bot.fetch_channel(thread_id)
-                        messages = [msg async for msg in thread.history(limit=10)]
-                        has_management_view = False
-                        
-                        for msg in messages:
-                            if msg.author.id == self.bot.user.id and "Secure Transaction Thread" in msg.content and msg.components:
-                                has_management_view = True
-                                break
-                        
-                        if not has_management_view:
-                            await thread.send(
-                                "**Transaction Thread Management**\n\n"
-                                "Use the button below to close this thread when your transaction is complete:",
-                                view=ThreadManagementView()
-                            )
-                    except discord.NotFound:
-                        os.remove(file)
-                    except Exception as e:
-                        logger.error(f"Error restoring thread management for {file}: {e}")
-                except Exception as e:
-                    logger.error(f"Error processing thread file {file}: {e}")
-            
-            logger.info("Completed restoration of active views and threads")
-            
+            restored = await job_server.request("restore_views")
+            register_restored_views(self.bot, restored)
+            logger.info(f"Registered {len(restored)} listing views restored by the job worker")
         except Exception as e:
-            logger.exception(f"Error in restore_active_views: {e}")
+            logger.error(f"Worker view restore failed: {e}")
+
+    async def close_worker_orders(self, message):
+        """Apply listings the job worker archived to this process's order book and leaderboard."""
+        await close_listings(message["guild_id"], message["listings"])
+
+    async def for_each_guild(self, func):
+        """Run func(guild) concurrently for every configured guild this process's shards own."""
+        return await run_for_guilds(guild_configs.configured_guilds(self.bot), func)
 
     async def check_old_tickets(self):
-        """Auto-archive tickets older than ARCHIVE_AFTER_DAYS."""
+        """Auto-archive tickets older than each guild's archive_after_days."""
         await self.bot.wait_until_ready()
         while not self.bot.is_closed():
             try:
-                channel = self.bot.get_channel(TICKET_CHANNEL_ID)
-                if not channel:
-                    channel = await self.bot.fetch_channel(TICKET_CHANNEL_ID)
-                
-                now = datetime.now(timezone.utc)
-                archive_cutoff = now - timedelta(days=ARCHIVE_AFTER_DAYS)
-                
-                async for message in channel.history(limit=1000):
-                    if message.created_at < archive_cutoff:
-                        await archive_transaction(message)
+                with background_run("check_old_tickets"):
+                    for guild, archived in await self.for_each_guild(archive_old_tickets):
+                        if isinstance(archived, list):
+                            await close_listings(guild.id, archived)
                         
                 # Check daily
                 await asyncio.sleep(86400)  
@@ -532,16 +715,8 @@ class TicketsCog(commands.Cog):
         await self.bot.wait_until_ready()
         while not self.bot.is_closed():
             try:
-                from config import ESCROW_TIMEOUT_HOURS
-                from utils.utils import get_escrow_transactions
-                
-                escrows = await get_escrow_transactions(self.bot.guilds[0])
-                for escrow in escrows:
-                    if escrow['status'] == 'pending':
-                        created_at = datetime.fromisoformat(escrow['created_at'])
-                        if (datetime.now(timezone.utc) - created_at).total_seconds() > ESCROW_TIMEOUT_HOURS * 3600:
-                            # Mark as expired in the file
-                            await self.expire_escrow(escrow)
+                with background_run("check_escrow_timeouts"):
+                    await self.for_each_guild(expire_old_escrows)
             
                 # Check hourly
                 await asyncio.sleep(3600)
@@ -549,48 +724,16 @@ class TicketsCog(commands.Cog):
                 logger.error(f"Escrow timeout check failed: {e}")
                 await asyncio.sleep(3600)
 
-    async def expire_escrow(self, escrow_data):
-        """Mark an escrow as expired."""
-        from config import ESCROW_CHANNEL_ID
-        try:
-            escrow_data['status'] = 'expired'
-            channel = self.bot.get_channel(ESCROW_CHANNEL_ID)
-            if not channel:
-                channel = await self.bot.fetch_channel(ESCROW_CHANNEL_ID)
-        
-            # Find and update the original message
-            async for message in channel.history(limit=200):
-                if message.attachments:
-                    for att in message.attachments:
-                        if f"escrow_{escrow_data['buyer']}_{escrow_data['seller']}" in att.filename:
-                            await message.edit(
-                                content=f"ESCROW EXPIRED - {message.content}",
-                                attachments=[discord.File(
-                                    BytesIO(json.dumps(escrow_data).encode()),
-                                    filename=att.filename
-                                )]
-                            )
-                            return True
-            return False
-        except Exception as e:
-            logger.error(f"Escrow expiration failed: {e}")
-            return False
-
     async def weekly_market_report(self):
         """Generate and post weekly market analysis report."""
         while True:
             try:
                 # Wait until next Monday
-                now = datetime.now(timezone.utc)
-                next_monday = now + timedelta(days=(7 - now.weekday()))
-                next_monday = next_monday.replace(hour=9, minute=0, second=0, microsecond=0)
-                wait_seconds = (next_monday - now).total_seconds()
-                await asyncio.sleep(wait_seconds)
+                await asyncio.sleep(seconds_until_weekly_report())
                 
-                # Generate and post report
-                report = await generate_market_report(self.bot)
-                channel = self.bot.get_channel(TICKET_CHANNEL_ID)
-                await channel.send(embed=report)
+                # Generate and post reports (generate_market_report posts to each guild's stats channel)
+                with background_run("weekly_market_report"):
+                    await self.for_each_guild(generate_market_report)
                 
             except Exception as e:
                 logger.error(f"Weekly market report failed: {e}")
@@ -598,11 +741,16 @@ class TicketsCog(commands.Cog):
 
     @app_commands.command(name="generate_report", description="Generate a market report manually")
     @app_commands.checks.has_permissions(administrator=True)
+    @track("TicketsCog.generate_report")
     async def generate_report(self, interaction: discord.Interaction):
         """Manually generate a market report."""
         await interaction.response.defer()
         try:
-            success = await generate_market_report(interaction.guild)
+            if job_server.connected:
+                # Reports read the whole archive channel; keep that off the gateway process
+                success = await job_server.request("run", job="generate_market_report", guild_id=interaction.guild.id)
+            else:
+                success = await generate_market_report(interaction.guild)
             if success:
                 await interaction.followup.send("Market report generated successfully!", ephemeral=True)
             else:
@@ -612,6 +760,7 @@ class TicketsCog(commands.Cog):
             await interaction.followup.send("An error occurred. Check logs.", ephemeral=True)
 
     @app_commands.command(name="create_escrow", description="Create an escrow for a high-value trade")
+    @track("TicketsCog.create_escrow")
     async def create_escrow(
         self, 
         interaction: discord.Interaction,
@@ -620,11 +769,11 @@ class TicketsCog(commands.Cog):
         amount: int
     ):
         """Create an escrow transaction."""
-        from config import MIN_ESCROW_AMOUNT
+        min_amount = guild_configs.for_guild(interaction.guild).min_escrow_amount
         
-        if amount < MIN_ESCROW_AMOUNT:
+        if amount < min_amount:
             return await interaction.response.send_message(
-                f"Escrow only available for trades of {MIN_ESCROW_AMOUNT:,}+ kamas",
+                f"Escrow only available for trades of {min_amount:,}+ kamas",
                 ephemeral=True
             )
             
@@ -644,16 +793,15 @@ class TicketsCog(commands.Cog):
 
     @app_commands.command(name="complete_escrow", description="Mark an escrow as completed")
     @app_commands.checks.has_permissions(manage_messages=True)
+    @track("TicketsCog.complete_escrow")
     async def complete_escrow(self, interaction: discord.Interaction, escrow_id: str):
         """Mark an escrow as completed."""
-        from config import ESCROW_CHANNEL_ID
         from utils.utils import assign_middleman_badge
         await interaction.response.defer()
         
         try:
-            channel = interaction.guild.get_channel(ESCROW_CHANNEL_ID)
-            if not channel:
-                channel = await interaction.guild.fetch_channel(ESCROW_CHANNEL_ID)
+            config = guild_configs.for_guild(interaction.guild)
+            channel = await resolve_channel(interaction.guild, config.escrow_channel_id)
             
             # Find and update escrow file
             async for message in channel.history(limit=200):
@@ -661,13 +809,13 @@ class TicketsCog(commands.Cog):
                     for att in message.attachments:
                         if escrow_id in att.filename:
                             content = await att.read()
-                            escrow = json.loads(content.decode())
+                            escrow = records.decode("escrow", content)[0]
                             escrow['status'] = 'completed'
                             
                             await message.edit(
                                 content=f"COMPLETED - {message.content}",
                                 attachments=[discord.File(
-                                    BytesIO(json.dumps(escrow).encode()),
+                                    BytesIO(records.encode("escrow", [escrow])),
                                     filename=att.filename
                                 )]
                             )
@@ -689,6 +837,7 @@ class TicketsCog(commands.Cog):
             await interaction.followup.send("Failed to complete escrow", ephemeral=True)
 
     @app_commands.command(name="cancel_escrow", description="Cancel an escrow transaction")
+    @track("TicketsCog.cancel_escrow")
     async def cancel_escrow(self, interaction: discord.Interaction, escrow_id: str):
         """Cancel an escrow transaction."""
         await interaction.response.defer()
@@ -696,15 +845,14 @@ class TicketsCog(commands.Cog):
         await interaction.followup.send("Escrow cancelled", ephemeral=True)
 
     @app_commands.command(name="dispute_escrow", description="File a dispute for an escrow transaction")
+    @track("TicketsCog.dispute_escrow")
     async def dispute_escrow(self, interaction: discord.Interaction, escrow_id: str, reason: str):
         """File an escrow dispute."""
-        from config import ESCROW_CHANNEL_ID
         await interaction.response.defer()
         
         try:
-            channel = interaction.guild.get_channel(ESCROW_CHANNEL_ID)
-            if not channel:
-                channel = await interaction.guild.fetch_channel(ESCROW_CHANNEL_ID)
+            config = guild_configs.for_guild(interaction.guild)
+            channel = await resolve_channel(interaction.guild, config.escrow_channel_id)
             
             # Find and update escrow file
             async for message in channel.history(limit=200):
@@ -712,7 +860,7 @@ class TicketsCog(commands.Cog):
                     for att in message.attachments:
                         if escrow_id in att.filename:
                             content = await att.read()
-                            escrow = json.loads(content.decode())
+                            escrow = records.decode("escrow", content)[0]
                             escrow['dispute'] = {
                                 "filed_by": interaction.user.id,
                                 "reason": reason,
@@ -723,7 +871,7 @@ class TicketsCog(commands.Cog):
                             await message.edit(
                                 content=f"DISPUTE FILED - {message.content}",
                                 attachments=[discord.File(
-                                    BytesIO(json.dumps(escrow).encode()),
+                                    BytesIO(records.encode("escrow", [escrow])),
                                     filename=att.filename
                                 )]
                             )
@@ -740,6 +888,7 @@ class TicketsCog(commands.Cog):
             await interaction.followup.send("Failed to file dispute", ephemeral=True)
 
     @app_commands.command(name="middleman_stats", description="View middleman performance statistics")
+    @track("TicketsCog.middleman_stats")
     async def middleman_stats(self, interaction: discord.Interaction, middleman: discord.Member):
         """Display middleman performance metrics."""
         from utils.utils import get_escrow_transactions
@@ -756,7 +905,7 @@ class TicketsCog(commands.Cog):
             )
             
         completed = sum(1 for e in middleman_escrows if e['status'] == 'completed')
-        disputed = sum(1 for e in middleman_escrows if 'dispute' in e)
+        disputed = sum(1 for e in middleman_escrows if e['dispute'])
         success_rate = (completed / len(middleman_escrows)) * 100
         
         # Determine badge
@@ -783,6 +932,7 @@ class TicketsCog(commands.Cog):
         await interaction.followup.send(embed=embed)
 
     @app_commands.command(name="middleman_leaderboard", description="Top middlemen by performance")
+    @track("TicketsCog.middleman_leaderboard")
     async def middleman_leaderboard(self, interaction: discord.Interaction):
         """Display middleman leaderboard."""
         from utils.utils import get_escrow_transactions
@@ -800,7 +950,7 @@ class TicketsCog(commands.Cog):
             middlemen[mid]["total"] += 1
             if escrow['status'] == 'completed':
                 middlemen[mid]["completed"] += 1
-            if 'dispute' in escrow:
+            if escrow['dispute']:
                 middlemen[mid]["disputed"] += 1
         
         # Calculate scores and sort
@@ -836,16 +986,227 @@ async def process_transaction_queue(bot):
     while not bot.is_closed():
         try:
             if TRANSACTION_QUEUE:
-                channel = bot.get_channel(TICKET_CHANNEL_ID) or \
-                         await bot.fetch_channel(TICKET_CHANNEL_ID)
-                active_threads = len([t for t in channel.threads if not t.archived])
-                
-                if active_threads < MAX_TRANSACTIONS:
-                    interaction, modal = TRANSACTION_QUEUE.popleft()
-                    await modal._process_transaction(interaction)
-                    logger.info(f"Processed queued transaction (Remaining: {len(TRANSACTION_QUEUE)})")
+                with background_run("process_transaction_queue"):
+                    # Capacity is per guild: take the oldest entry whose guild has a free slot
+                    has_capacity = {}
+                    for entry in list(TRANSACTION_QUEUE):
+                        guild = entry[0].guild
+                        if guild.id not in has_capacity:
+                            config = guild_configs.for_guild(guild)
+                            channel = await resolve_channel(guild, config.ticket_channel_id)
+                            active_threads = len([t for t in channel.threads if not t.archived])
+                            has_capacity[guild.id] = active_threads < MAX_TRANSACTIONS
+                        
+                        if has_capacity[guild.id]:
+                            TRANSACTION_QUEUE.remove(entry)
+                            interaction, modal = entry
+                            await modal._process_transaction(interaction)
+                            logger.info(f"Processed queued transaction (Remaining: {len(TRANSACTION_QUEUE)})")
+                            break
             
             await asyncio.sleep(QUEUE_CHECK_INTERVAL)
         except Exception as e:
             logger.error(f"Queue processing error: {e}")
             await asyncio.sleep(60)
+
+async def restore_views(client, guilds):
+    """Reattach listing buttons and thread management messages after a restart.
+
+    Uses REST only, so bot.py or worker.py can run it. Returns the restored
+    listings for register_restored_views().
+    """
+    restored = []
+    try:
+        # Listing files only record the message id, so look in every configured ticket channel
+        ticket_channels = [
+            await resolve_channel(guild, guild_configs.for_guild(guild).ticket_channel_id)
+            for guild in guilds
+        ]
+        
+        listing_files = [f for f in os.listdir() if f.startswith("listing_")]
+        
+        for file in listing_files:
+            try:
+                with open(file, "r") as f:
+                    message_id = int(f.read().strip())
+                
+                parts = file.replace("listing_", "").replace(".txt", "").split("-")
+                transaction_type = parts[0]
+                seller_id = int(parts[1])
+                
+                try:
+                    message = await fetch_listing_message(ticket_channels, message_id)
+                    if message is None:
+                        os.remove(file)
+                        logger.info(f"Removed stale listing file {file}")
+                        continue
+                    thread_files = [tf for tf in os.listdir() if tf.startswith(f"thread_private_thread_{seller_id}_")]
+                    buyer_id = None
+                    
+                    if thread_files and not thread_files[0].endswith("_0.txt"):
+                        buyer_part = thread_files[0].split("_")[-1].replace(".txt", "")
+                        if buyer_part != "0":
+                            buyer_id = int(buyer_part)
+                    
+                    view = PrivateThreadButton(seller_id=seller_id, buyer_id=buyer_id, transaction_type=transaction_type)
+                    await message.edit(view=view)
+                    listing = {
+                        "message_id": message_id, "guild_id": message.guild.id, "seller_id": seller_id,
+                        "buyer_id": buyer_id, "transaction_type": transaction_type
+                    }
+                    trade = parse_archived_trade(message)
+                    if trade and trade[1] is not None:
+                        amount, price_per_m, currency = trade[:3]
+                        listing.update(
+                            channel_id=message.channel.id, amount=amount, price_per_m=price_per_m, currency=currency
+                        )
+                    if message.embeds:
+                        fields = {field.name: field.value for field in message.embeds[0].fields}
+                        listing.update(jump_url=message.jump_url, text=listing_text(
+                            fields.get(LISTING_METHOD_FIELD), fields.get(LISTING_CONTACT_FIELD),
+                            message.embeds[0].description
+                        ))
+                    restored.append(listing)
+                    logger.info(f"Restored view for listing {file}")
+                except discord.NotFound:
+                    os.remove(file)
+                    logger.info(f"Removed stale listing file {file}")
+                except Exception as e:
+                    logger.error(f"Error restoring view for {file}: {e}")
+            except Exception as e:
+                logger.error(f"Error processing listing file {file}: {e}")
+        
+        thread_files = [f for f in os.listdir() if f.startswith("thread_private_thread_")]
+        for file in thread_files:
+            try:
+                with open(file, "r") as f:
+                    thread_id = int(f.read().strip())
+                
+                try:
+                    thread = await client.fetch_channel(thread_id)
+                    messages = [msg async for msg in thread.history(limit=10)]
+                    has_management_view = False
+                    
+                    for msg in messages:
+                        if msg.author.id == client.user.id and "Secure Transaction Thread" in msg.content and msg.components:
+                            has_management_view = True
+                            break
+                    
+                    if not has_management_view:
+                        await thread.send(
+                            "**Transaction Thread Management**\n\n"
+                            "Use the button below to close this thread when your transaction is complete:",
+                            view=ThreadManagementView()
+                        )
+                except discord.NotFound:
+                    os.remove(file)
+                except Exception as e:
+                    logger.error(f"Error restoring thread management for {file}: {e}")
+            except Exception as e:
+                logger.error(f"Error processing thread file {file}: {e}")
+        
+        logger.info("Completed restoration of active views and threads")
+        
+    except Exception as e:
+        logger.exception(f"Error in restore_active_views: {e}")
+    return restored
+
+async def fetch_listing_message(ticket_channels, message_id):
+    """Fetch a listing message from whichever ticket channel holds it, or None."""
+    for channel in ticket_channels:
+        try:
+            return await channel.fetch_message(message_id)
+        except discord.NotFound:
+            continue
+    return None
+
+def register_restored_views(bot, restored):
+    """Route clicks on restored listings and thread management messages to this process's views."""
+    bot.add_view(ThreadManagementView())
+    for listing in restored:
+        view = PrivateThreadButton(
+            seller_id=listing["seller_id"], buyer_id=listing["buyer_id"],
+            transaction_type=listing["transaction_type"]
+        )
+        bot.add_view(view, message_id=listing["message_id"])
+        reputation_votes.add_listing(listing["guild_id"], listing["message_id"], listing["seller_id"])
+        if "price_per_m" in listing:
+            order_book.add(Order(
+                listing["message_id"], listing["guild_id"], listing["channel_id"], listing["transaction_type"],
+                listing["seller_id"], listing["currency"], listing["price_per_m"], listing["amount"]
+            ))
+        if "text" in listing:
+            listing_similarity.add(
+                listing["message_id"], listing["guild_id"], listing["seller_id"], listing["jump_url"], listing["text"]
+            )
+
+async def archive_old_tickets(guild):
+    """Archive one guild's listings older than its archive_after_days.
+
+    Returns [{"order_id", "seller_id", "amount"}] for the archived listings; the
+    caller passes them to close_listings in the process that owns the order book.
+    """
+    config = guild_configs.for_guild(guild)
+    channel = await resolve_channel(guild, config.ticket_channel_id)
+    
+    now = datetime.now(timezone.utc)
+    archive_cutoff = now - timedelta(days=config.archive_after_days)
+    
+    archived = []
+    async for message in iter_history(channel, limit=1000):
+        if message.created_at < archive_cutoff:
+            trade = parse_archived_trade(message)
+            if await archive_transaction(message):
+                archived.append({
+                    "order_id": message.id,
+                    "seller_id": trade[4] if trade else None,
+                    "amount": trade[0] if trade else 0
+                })
+    return archived
+
+async def close_listings(guild_id, listings):
+    """Drop archived listings from the listing indexes and add them to their sellers' traded volume."""
+    for listing in listings:
+        order_book.remove(listing["order_id"])
+        listing_similarity.remove(listing["order_id"])
+        if listing["seller_id"] and listing["amount"]:
+            reputation_scores.add_volume(guild_id, listing["seller_id"], listing["amount"])
+    if listings:
+        await reputation_scores.flush()
+
+async def expire_old_escrows(guild):
+    """Expire one guild's pending escrows older than its escrow_timeout_hours."""
+    from utils.utils import get_escrow_transactions
+    timeout_hours = guild_configs.for_guild(guild).escrow_timeout_hours
+    
+    escrows = await get_escrow_transactions(guild)
+    for escrow in escrows:
+        if escrow['status'] == 'pending':
+            created_at = datetime.fromisoformat(escrow['created_at'])
+            if (datetime.now(timezone.utc) - created_at).total_seconds() > timeout_hours * 3600:
+                # Mark as expired in the file
+                await expire_escrow(guild, escrow)
+
+async def expire_escrow(guild, escrow_data):
+    """Mark an escrow as expired."""
+    try:
+        escrow_data['status'] = 'expired'
+        channel = await resolve_channel(guild, guild_configs.for_guild(guild).escrow_channel_id)
+    
+        # Find and update the original message
+        async for message in channel.history(limit=200):
+            if message.attachments:
+                for att in message.attachments:
+                    if f"escrow_{escrow_data['buyer_id']}_{escrow_data['seller_id']}" in att.filename:
+                        await message.edit(
+                            content=f"ESCROW EXPIRED - {message.content}",
+                            attachments=[discord.File(
+                                BytesIO(records.encode("escrow", [escrow_data])),
+                                filename=att.filename
+                            )]
+                        )
+                        return True
+        return False
+    except Exception as e:
+        logger.error(f"Escrow expiration failed: {e}")
+        return False
@@ -3,23 +3,28 @@ from discord.ext import commands
 from discord import ui
 from datetime import datetime
 import os
+import time
+import re
 import logging
 
-from utils.constants import VERIFIED_DATA_CHANNEL_ID, KAMAS_LOGO_URL, TICKET_CHANNEL_ID, VERIFICATION_CHANNEL_ID
+from utils.constants import KAMAS_LOGO_URL
+from utils.guild_config import guild_configs
 from utils.utils import (
     parse_kamas_amount, 
     format_kamas_amount, 
     validate_kamas_amount,
     store_verification_data,
-    fetch_kamas_logo
+    fetch_kamas_logo,
+    resolve_channel
 )
+from utils.logging_setup import interaction_context
+from utils.metrics import track, background_run
+from utils.jobs import run_for_guilds
+from utils.verified_sellers import verified_sellers
+from utils.phone_registry import phone_registry, hash_phone
 
 logger = logging.getLogger(__name__)
 
-def hash_sensitive_data(data: str) -> str:
-    """Hash sensitive data using SHA-256."""
-    import hashlib
-    return hashlib.sha256(data.encode()).hexdigest()
 
 class VerificationModal(ui.Modal, title="Seller Verification Application"):
     """Modal for seller verification submission."""
@@ -60,7 +65,9 @@ class VerificationModal(ui.Modal, title="Seller Verification Application"):
         max_length=500
     )
     
+    @track("VerificationModal.on_submit", auto_defer=True)
     async def on_submit(self, interaction: discord.Interaction):
+        started = time.perf_counter()
         try:
             if not all([
                 self.social_media_handle.value,
@@ -74,7 +81,8 @@ class VerificationModal(ui.Modal, title="Seller Verification Application"):
                 return
             
             try:
-                verification_channel = await interaction.client.fetch_channel(VERIFICATION_CHANNEL_ID)
+                config = guild_configs.for_guild(interaction.guild)
+                verification_channel = await resolve_channel(interaction.guild, config.verification_channel_id)
                 if verification_channel is None:
                     raise ValueError("Verification channel not found")
             except Exception as e:
@@ -96,10 +104,17 @@ class VerificationModal(ui.Modal, title="Seller Verification Application"):
                 return
             
             user_id = str(interaction.user.id)
+            phone_hash = hash_phone(self.phone_number.value)
+            shared_with = [
+                other for other in phone_registry.linked_users(interaction.guild.id, phone_hash)
+                if other != interaction.user.id
+            ]
+            # Registered before any await, so a second application with this number is flagged too
+            registered = phone_registry.register(interaction.guild.id, phone_hash, interaction.user.id)
             verification_entry = {
                 'user_id': user_id,
                 'username': interaction.user.display_name,
-                'phone_hash': hash_sensitive_data(self.phone_number.value),
+                'phone_hash': phone_hash,
                 'social_platform': platform.capitalize(),
                 'social_handle': self.social_media_handle.value.strip(),
                 'trading_experience': self.trading_experience.value,
@@ -122,11 +137,31 @@ class VerificationModal(ui.Modal, title="Seller Verification Application"):
             if self.additional_info.value:
                 admin_embed.add_field(name="Additional Info", value=self.additional_info.value, inline=False)
             
+            if shared_with:
+                admin_embed.color = discord.Color.red()
+                admin_embed.add_field(
+                    name="⚠️ Phone Number Shared",
+                    value="Also used by " + ", ".join(f"<@{other}>" for other in shared_with[:20]),
+                    inline=False
+                )
+                logger.warning(f"Verification application from {user_id} shares a phone number with {shared_with}")
+
             admin_embed.add_field(name="Application ID", value=f"`{user_id}`", inline=False)
             admin_embed.set_footer(text=f"Applied on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
             
             admin_view = VerificationAdminView(user_id)
-            await verification_channel.send(embed=admin_embed, view=admin_view)
+            try:
+                await verification_channel.send(embed=admin_embed, view=admin_view)
+            except Exception:
+                # Only applications that reached the admins stay registered
+                if registered:
+                    phone_registry.unregister(interaction.guild.id, phone_hash, interaction.user.id)
+                raise
+
+            try:
+                await phone_registry.flush()
+            except OSError as e:
+                logger.error(f"Failed to save the phone registry: {e}")
             
             await interaction.response.send_message(
                 "✅ **Verification Application Submitted!**\n\n"
@@ -140,10 +175,16 @@ class VerificationModal(ui.Modal, title="Seller Verification Application"):
                 ephemeral=True
             )
             
-            logger.info(f"Verification application submitted by user {user_id}")
+            logger.info(
+                f"Verification application submitted by user {user_id}",
+                extra=interaction_context(interaction, started)
+            )
             
         except Exception as e:
-            logger.exception(f"Error processing verification application: {e}")
+            logger.exception(
+                f"Error processing verification application: {e}",
+                extra=interaction_context(interaction, started)
+            )
             await interaction.response.send_message(
                 "There was an error processing your application. Please try again later.",
                 ephemeral=True
@@ -157,14 +198,25 @@ class VerificationAdminView(ui.View):
         self.applicant_user_id = applicant_user_id
         
     @discord.ui.button(label="Approve", style=discord.ButtonStyle.success, emoji="✅")
+    @track("VerificationAdminView.approve_verification", auto_defer=True)
     async def approve_verification(self, interaction: discord.Interaction, button: discord.ui.Button):
         if not interaction.user.guild_permissions.administrator:
             await interaction.response.send_message("Only administrators can approve verifications.", ephemeral=True)
             return
         
         try:
+            # The application itself is only kept in this embed
+            application = interaction.message.embeds[0]
+            fields = {field.name: field.value for field in application.fields}
+            platform, _, handle = fields.get("Social Media", "").partition(": @")
+            username = re.search(r"\((.*)\)$", application.description or "")
             if await store_verification_data(interaction, self.applicant_user_id, {
                 'user_id': self.applicant_user_id,
+                'username': username.group(1) if username else self.applicant_user_id,
+                'social_platform': platform or 'Unknown',
+                'social_handle': handle or 'Unknown',
+                'trading_experience': fields.get("Trading Experience", 'Unknown'),
+                'additional_info': fields.get("Additional Info", ''),
                 'verified': True,
                 'verified_date': datetime.now().isoformat(),
                 'verified_by': str(interaction.user.id)
@@ -197,6 +249,7 @@ class VerificationAdminView(ui.View):
             await interaction.response.send_message("Error processing approval.", ephemeral=True)
     
     @discord.ui.button(label="Reject", style=discord.ButtonStyle.danger, emoji="❌")
+    @track("VerificationAdminView.reject_verification")
     async def reject_verification(self, interaction: discord.Interaction, button: discord.ui.Button):
         if not interaction.user.guild_permissions.administrator:
             await interaction.response.send_message("Only administrators can reject verifications.", ephemeral=True)
@@ -219,6 +272,7 @@ class RejectionReasonModal(ui.Modal, title="Rejection Reason"):
         super().__init__()
         self.applicant_user_id = applicant_user_id
     
+    @track("RejectionReasonModal.on_submit")
     async def on_submit(self, interaction: discord.Interaction):
         try:
             embed = interaction.message.embeds[0]
@@ -249,8 +303,18 @@ class VerificationCog(commands.Cog):
     
     def __init__(self, bot):
         self.bot = bot
+        self.bot.loop.create_task(self.sync_verified_sellers())
+
+    async def sync_verified_sellers(self):
+        """Index verification files posted since the last run."""
+        await self.bot.wait_until_ready()
+        with background_run("sync_verified_sellers"):
+            results = await run_for_guilds(guild_configs.configured_guilds(self.bot), verified_sellers.sync)
+        added = sum(result for _, result in results if isinstance(result, int))
+        logger.info(f"Verified seller index: {len(verified_sellers)} profiles, {added} new")
         
     @commands.command()
+    @track("VerificationCog.verify")
     async def verify(self, ctx):
         """Start the seller verification process."""
         modal = VerificationModal()
@@ -258,6 +322,7 @@ class VerificationCog(commands.Cog):
         
     @commands.command()
     @commands.has_permissions(administrator=True)
+    @track("VerificationCog.verify_admin")
     async def verify_admin(self, ctx):
         """Admin command to manage verifications."""
         await ctx.send("Verification admin panel coming soon!")
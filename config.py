@@ -9,16 +9,24 @@ BADGES_CHANNEL_ID = 1383214869926383696       # Example ID
 ARCHIVE_CHANNEL_ID = 1383214911378690210      # Example ID
 STATS_CHANNEL_ID = 1383214960766619789        # Example ID
 REMINDERS_CHANNEL_ID = 1383215218455207990  # Channel for reminders
+TICKETS_CATEGORY_ID = 1358383554798817410  # Category for ticket channels
+VERIFICATION_CHANNEL_ID = 1383654027765612554  # Channel for verification applications
+MIDDLEMAN_GUIDELINES_CHANNEL_ID = 1383216489565524122  # Channel for middleman guidelines
+MODERATION_CHANNEL_ID = VERIFICATION_CHANNEL_ID  # Duplicate-listing reports; admins review applications there too
 
 # Discord Configuration
 import os
 DISCORD_TOKEN = os.getenv('DISCORD_TOKEN')  # From GitHub Actions secrets
 SERVER_ID = 1217700740949348443  # Your server ID
-KAMAS_LOGO_URL = ""  # Empty string since logo not needed
+KAMAS_LOGO_URL = os.getenv('KAMAS_LOGO_URL', "https://static.wikia.nocookie.net/dofus/images/1/1e/Kama.png")
 
 if not DISCORD_TOKEN and __name__ != "__main__":
     raise ValueError("Discord token not found in environment variables")
 
+# Discord endpoints; leave empty for discord.com. Point both at benchmarks/discord_standin.py for offline runs.
+DISCORD_API_BASE = os.getenv('DISCORD_API_BASE', '')  # e.g. http://127.0.0.1:8089/api/v10
+DISCORD_GATEWAY_URL = os.getenv('DISCORD_GATEWAY_URL', '')  # e.g. ws://127.0.0.1:8089/gateway
+
 # Security Settings
 RATE_LIMIT_WINDOW = 60  # Seconds
 RATE_LIMIT_MAX = 5      # Max requests per window
@@ -26,10 +34,14 @@ RATE_LIMIT_MAX = 5      # Max requests per window
 # Badge Thresholds
 BADGE_THRESHOLDS = {
     "BRONZE": 10,   # Min 10 positive transactions
-    "SILVER": 30,
-    "GOLD": 50
+    "SILVER": 50,
+    "GOLD": 100
 }
 
+# What BADGE_THRESHOLDS are compared with: 'positive' (positive votes in the ledger) or
+# 'decayed' (time-decayed positive minus negative votes, see REPUTATION_HALF_LIFE_DAYS)
+BADGE_CRITERION = 'positive'
+
 # Badge Colors
 BADGE_COLORS = {
     "BRONZE": 0xcd7f32,
@@ -56,7 +68,8 @@ MIDDLEMAN_REMINDERS_CHANNEL_ID = 1383215218455207990  # Channel for automated re
 GUIDELINE_REMINDER_FREQ_DAYS = 7  # Send reminders weekly
 
 # Archive Settings
-ARCHIVE_AFTER_DAYS = 7  # Auto-archive transactions after this period
+ARCHIVE_AFTER_DAYS = 30  # Auto-archive transactions after this period
+MARKET_HISTORY_LIMIT = 1000  # Archived trades read for each market report
 
 # Escrow Settings
 ESCROW_CHANNEL_ID = 1383215018455207987  # Example ID - replace with your channel
@@ -67,3 +80,102 @@ MIN_ESCROW_AMOUNT = 10000  # Minimum kamas amount for escrow
 # Language Settings
 TRANSLATIONS_CHANNEL_ID = 1383215130346786966  # Example ID - replace with your channel
 SUPPORTED_LANGUAGES = ['en', 'fr', 'es']  # English, French, Spanish
+
+# Logging Settings
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_FILE = "logs/kamasbot.log"
+LOG_JSON_FILE = os.getenv('LOG_JSON_FILE', "logs/kamasbot.jsonl")  # Empty string disables JSON-lines output
+LOG_MAX_BYTES = 10 * 1024 * 1024  # Rotate when a log file reaches 10 MB
+LOG_ROTATE_WHEN = "midnight"  # ...and at least once a day
+LOG_BACKUP_COUNT = 14  # Rotated files to keep
+
+# Metrics Settings
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') == '1'
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')  # Local only; scrape from the same host
+METRICS_PORT = int(os.getenv('METRICS_PORT', '9108'))
+
+# Event Loop Monitoring
+LOOP_LAG_INTERVAL = 0.5  # Seconds between loop-lag probes
+SLOW_CALLBACK_THRESHOLD = 0.25  # Seconds a single loop step may block before it is reported
+SLOW_CALLBACK_HISTORY = 50  # Slow steps kept for /loop_health
+
+# Interaction Deadlines
+# Handlers tracked with auto_defer are deferred when they have not responded this many seconds
+# after starting; Discord drops interactions that are not acknowledged within 3 seconds.
+INTERACTION_DEFER_AFTER = 2.0
+
+# Tracing Settings
+TRACING_ENABLED = os.getenv('TRACING_ENABLED', '1') == '1'
+TRACE_BUFFER_SIZE = 200  # Finished traces kept in memory for /export_traces
+TRACE_SLOW_SECONDS = 2.0  # Traces at least this long are also appended to TRACE_FILE
+TRACE_FILE = "logs/traces.jsonl"
+TRACE_MAX_SPANS = 500  # Spans kept per trace; extra spans are counted and dropped
+
+# Multi-guild Settings
+# YAML file with per-guild channel IDs and overrides (see utils/guild_config.py).
+# When it is missing the bot serves SERVER_ID only, using the values above.
+GUILDS_CONFIG_FILE = os.getenv('GUILDS_CONFIG_FILE', 'guilds.yaml')
+
+# Sharding Settings
+# SHARD_COUNT runs an AutoShardedBot: a number, or 'auto' for Discord's recommended count.
+# Leave it empty for a single gateway connection.
+SHARD_COUNT = os.getenv('SHARD_COUNT', '')
+# Comma-separated shard ids this process runs (requires a numeric SHARD_COUNT);
+# empty runs every shard. Give each process its own METRICS_PORT.
+SHARD_IDS = [int(shard_id) for shard_id in os.getenv('SHARD_IDS', '').split(',') if shard_id.strip()]
+
+# Background Jobs
+# 'local' runs archive sweeps, escrow timeouts, market reports, guideline reminders and the
+# startup view restore inside bot.py. 'worker' leaves them to worker.py, a separate REST-only
+# process that talks to bot.py over JOBS_SOCKET (both must share a working directory).
+BACKGROUND_JOBS = os.getenv('BACKGROUND_JOBS', 'local')
+JOBS_SOCKET = os.getenv('JOBS_SOCKET', 'kamasbot-jobs.sock')
+JOB_REQUEST_TIMEOUT = 600  # Seconds bot.py waits for the worker to answer (e.g. /generate_report)
+WORKER_LOG_FILE = "logs/worker.log"
+WORKER_LOG_JSON_FILE = "logs/worker.jsonl" if LOG_JSON_FILE else ""
+
+# Listing Sessions (listing forms waiting for their currency to be chosen)
+LISTING_SESSION_TTL = 300  # Seconds; also the currency select's timeout
+MAX_LISTING_SESSIONS = 5000  # Oldest forms are dropped beyond this
+
+# Order Book
+ORDER_MATCH_SUGGESTIONS = 3  # Best-priced counterparties suggested for a new listing
+
+# Reputation Votes
+REPUTATION_FLUSH_SECONDS = 30  # Reaction votes are written to the ledger in batches this often
+REPUTATION_VOTES_FILE = 'reputation_votes.json'  # Votes already written, one per user per listing
+REPUTATION_SCORES_FILE = 'reputation_scores.json'  # Per-seller vote counts and decayed sums
+REPUTATION_HALF_LIFE_DAYS = 90  # A vote counts half as much in the decayed score after this long
+
+# Verified Sellers
+VERIFIED_SELLERS_FILE = 'verified_sellers.json'  # Index of approved verification files, by user
+
+# Phone Registry (hashed phone numbers from verification applications)
+PHONE_REGISTRY_FILE = 'phone_registry.json'
+PHONE_BLOOM_CAPACITY = 100_000  # Expected applications; the filter gets less selective beyond this
+PHONE_BLOOM_ERROR_RATE = 0.01  # Share of unseen numbers that still need an exact lookup
+
+# Duplicate Listings (MinHash LSH over each listing's payment method, contact and notes)
+LISTING_SIMILARITY_THRESHOLD = 0.7  # Estimated similarity at which a listing is reported to moderators
+# Listings are compared when all ROWS hashes of one of the BANDS agree, which becomes likely from
+# about (1 / BANDS) ** (1 / ROWS) = 0.5 similarity
+LISTING_MINHASH_BANDS = 16
+LISTING_MINHASH_ROWS = 4
+MAX_INDEXED_LISTINGS = 20_000  # Open listings kept in the index; the oldest are evicted first
+SCAM_PATTERNS_FILE = 'scam_patterns.json'  # Known scam texts added with /add_scam_pattern
+
+# Price Alerts
+PRICE_ALERTS_FILE = 'price_alerts.json'
+MAX_PRICE_ALERTS_PER_USER = 10
+DM_BATCH_SECONDS = 5  # Alerts for one user within this window are sent as one DM
+DM_CONCURRENCY = 5  # Alert DMs in flight at once
+
+# Price Sketches (streaming price-per-million quantiles of new listings)
+PRICE_SKETCH_FILE = 'price_sketches.json'
+PRICE_SKETCH_K = 200  # Larger is more accurate; memory per sketch is about 3 * k prices
+PRICE_SKETCH_WEEKS = 12  # Weekly windows kept per currency
+PRICE_SKETCH_FLUSH_SECONDS = 60  # New listings' prices are saved to PRICE_SKETCH_FILE this often
+
+# Report Charts (needs matplotlib; reports are text-only without it)
+CHART_WORKERS = 1  # Processes rendering charts off the event loop
+CHART_CACHE_SIZE = 16  # Rendered reports kept, keyed by report window and data hash
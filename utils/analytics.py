@@ -0,0 +1,164 @@
+"""Columnar market analytics over archived trades.
+
+Trades are loaded once into parallel NumPy arrays (TradeColumns) and every
+statistic is a vectorized pass over them: per-currency VWAP and price
+percentiles, daily volume, hour x weekday heatmaps and per-seller totals. The
+cost per trade is a few array operations, so reports stay fast with hundreds
+of thousands of archived trades.
+"""
+import numpy as np
+
+SECONDS_PER_DAY = 86400
+# 1970-01-01 was a Thursday; shift so Monday is 0
+EPOCH_WEEKDAY = 3
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+
+class TradeColumns:
+    """Archived trades as parallel arrays.
+
+    amount and seller are int64, price_per_m float64 (NaN when unknown),
+    timestamp float64 UNIX seconds; currency and method are integer codes into
+    the currencies and methods tuples.
+    """
+
+    def __init__(self, amount, price_per_m, currency, timestamp, seller, method, currencies, methods):
+        self.amount = amount
+        self.price_per_m = price_per_m
+        self.currency = currency
+        self.timestamp = timestamp
+        self.seller = seller
+        self.method = method
+        self.currencies = currencies
+        self.methods = methods
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from (amount, price_per_m, currency, timestamp, seller, method) tuples."""
+        if not rows:
+            empty_int, empty_float = np.zeros(0, np.int64), np.zeros(0, np.float64)
+            return cls(empty_int, empty_float, empty_int, empty_float, empty_int, empty_int, (), ())
+        amount, price, currency, timestamp, seller, method = zip(*rows)
+        currencies, currency_codes = np.unique(np.array(currency, dtype=str), return_inverse=True)
+        methods, method_codes = np.unique(np.array(method, dtype=str), return_inverse=True)
+        return cls(
+            np.array(amount, dtype=np.int64),
+            np.array([np.nan if p is None else p for p in price], dtype=np.float64),
+            currency_codes.astype(np.int64),
+            np.array(timestamp, dtype=np.float64),
+            np.array(seller, dtype=np.int64),
+            method_codes.astype(np.int64),
+            tuple(currencies.tolist()),
+            tuple(methods.tolist()),
+        )
+
+    def __len__(self):
+        return len(self.amount)
+
+    def hours(self):
+        return ((self.timestamp // 3600) % 24).astype(np.int64)
+
+    def weekdays(self):
+        return ((self.timestamp // SECONDS_PER_DAY + EPOCH_WEEKDAY) % 7).astype(np.int64)
+
+    def days(self):
+        return (self.timestamp // SECONDS_PER_DAY).astype(np.int64)
+
+
+def currency_price_stats(trades):
+    """Return {currency: {count, volume, vwap, median, p90}} over trades with a known price."""
+    stats = {}
+    priced = ~np.isnan(trades.price_per_m)
+    for code, currency in enumerate(trades.currencies):
+        mask = priced & (trades.currency == code)
+        if not mask.any():
+            continue
+        prices = trades.price_per_m[mask]
+        amounts = trades.amount[mask].astype(np.float64)
+        volume = amounts.sum()
+        median, p90 = np.percentile(prices, [50, 90])
+        stats[currency] = {
+            "count": int(mask.sum()),
+            "volume": int(volume),
+            "vwap": float((prices * amounts).sum() / volume) if volume else float(prices.mean()),
+            "median": float(median),
+            "p90": float(p90),
+        }
+    return stats
+
+
+def activity_heatmap(trades, weights=None):
+    """7 x 24 array (weekday x UTC hour) of trade counts, or of weights (e.g. amount) if given."""
+    slots = trades.weekdays() * 24 + trades.hours()
+    return np.bincount(slots, weights=weights, minlength=7 * 24).reshape(7, 24)
+
+
+def daily_volume(trades):
+    """{'YYYY-MM-DD': kamas} for each day with trades."""
+    if not len(trades):
+        return {}
+    days, inverse = np.unique(trades.days(), return_inverse=True)
+    volumes = np.bincount(inverse, weights=trades.amount)
+    dates = days.astype("datetime64[D]").astype(str)
+    return {date: int(volume) for date, volume in zip(dates.tolist(), volumes.tolist())}
+
+
+def seller_stats(trades):
+    """{seller_id: {'count', 'volume'}}."""
+    if not len(trades):
+        return {}
+    sellers, inverse = np.unique(trades.seller, return_inverse=True)
+    counts = np.bincount(inverse)
+    volumes = np.bincount(inverse, weights=trades.amount)
+    return {
+        int(seller): {"count": int(count), "volume": int(volume)}
+        for seller, count, volume in zip(sellers.tolist(), counts.tolist(), volumes.tolist())
+    }
+
+
+def price_ranges(trades, bucket=1000):
+    """{'lo-hi': count} of kamas amounts in buckets of `bucket`."""
+    if not len(trades):
+        return {}
+    buckets, counts = np.unique(trades.amount // bucket, return_counts=True)
+    return {f"{b * bucket}-{(b + 1) * bucket}": int(c) for b, c in zip(buckets.tolist(), counts.tolist())}
+
+
+def new_sellers(trades, now, days=7):
+    """Sellers active in the last `days` days who were not active in the `days` before."""
+    recent = trades.timestamp >= now - days * SECONDS_PER_DAY
+    previous = ~recent & (trades.timestamp >= now - 2 * days * SECONDS_PER_DAY)
+    return set(np.setdiff1d(trades.seller[recent], trades.seller[previous]).tolist())
+
+
+def summarize(trades, now):
+    """Market report data in the shape collect_market_data() returns."""
+    hours = trades.hours()
+    hour_counts = np.bincount(hours, minlength=24)
+    method_counts = np.bincount(trades.method, minlength=len(trades.methods))
+    heatmap = activity_heatmap(trades)
+    fresh = new_sellers(trades, now)
+    total = len(trades)
+    total_kamas = int(trades.amount.sum())
+
+    busiest_slot = None
+    if total:
+        weekday, hour = np.unravel_index(int(heatmap.argmax()), heatmap.shape)
+        busiest_slot = (WEEKDAYS[weekday], int(hour))
+
+    return {
+        'total_transactions': total,
+        'total_kamas': total_kamas,
+        'payment_methods': {m: int(c) for m, c in zip(trades.methods, method_counts.tolist()) if c},
+        'daily_volume': daily_volume(trades),
+        'seller_stats': seller_stats(trades),
+        'price_ranges': price_ranges(trades),
+        'transaction_times': hours.tolist(),
+        'new_sellers': fresh,
+        'avg_kamas_per_txn': total_kamas / total if total else 0,
+        'busiest_hour': int(hour_counts.argmax()) if total else None,
+        'new_sellers_count': len(fresh),
+        'currency_stats': currency_price_stats(trades),
+        'heatmap': heatmap.astype(np.int64).tolist(),
+        'busiest_slot': busiest_slot,
+    }
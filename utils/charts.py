@@ -0,0 +1,119 @@
+"""Market report charts, rendered in a process pool.
+
+Rendering a figure takes tens to hundreds of milliseconds of pure CPU, which
+would stall every interaction if it ran on the event loop. render_market_charts
+sends the aggregated report data to a ProcessPoolExecutor and caches the PNG by
+report window and data hash, so repeated /generate_report calls in the same
+week reuse it.
+
+matplotlib is in requirements.txt but optional: without it reports stay text-only,
+which is logged as a warning at import.
+"""
+import asyncio
+import hashlib
+import importlib.util
+import json
+import logging
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from config import CHART_WORKERS, CHART_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+CHART_FILENAME = "market_report.png"
+HAS_MATPLOTLIB = importlib.util.find_spec("matplotlib") is not None
+if not HAS_MATPLOTLIB:
+    logger.warning("matplotlib is not installed; market reports will be text-only")
+
+_pool = None
+_cache = OrderedDict()
+
+
+def chart_data(data):
+    """Reduce collect_market_data() output to what the charts plot (small and picklable)."""
+    hours = [0] * 24
+    for hour in data.get('transaction_times', []):
+        hours[hour] += 1
+    return {
+        "daily_volume": sorted(data.get('daily_volume', {}).items()),
+        # Range keys look like "12000-13000"; order them by lower bound
+        "price_ranges": sorted(data.get('price_ranges', {}).items(), key=lambda item: int(item[0].split('-')[0])),
+        "hours": hours,
+    }
+
+
+def data_hash(chart_input):
+    return hashlib.sha256(json.dumps(chart_input, sort_keys=True).encode()).hexdigest()
+
+
+def render_charts_png(chart_input):
+    """Draw daily volume, price distribution and busiest hours into one PNG. Runs in a worker process."""
+    from io import BytesIO
+
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    figure, (volume_ax, price_ax, hours_ax) = plt.subplots(3, 1, figsize=(8, 10))
+    try:
+        if chart_input["daily_volume"]:
+            days, volumes = zip(*chart_input["daily_volume"])
+            volume_ax.bar(range(len(days)), volumes, color="#2ecc71")
+            step = max(len(days) // 10, 1)
+            volume_ax.set_xticks(range(0, len(days), step))
+            volume_ax.set_xticklabels(days[::step], rotation=45, ha="right", fontsize=8)
+        volume_ax.set_title("Volume per day (kamas)")
+
+        if chart_input["price_ranges"]:
+            ranges, counts = zip(*chart_input["price_ranges"])
+            price_ax.bar(range(len(ranges)), counts, color="#3498db")
+            step = max(len(ranges) // 10, 1)
+            price_ax.set_xticks(range(0, len(ranges), step))
+            price_ax.set_xticklabels(ranges[::step], rotation=45, ha="right", fontsize=8)
+        price_ax.set_title("Transactions by amount")
+
+        hours_ax.bar(range(24), chart_input["hours"], color="#f1c40f")
+        hours_ax.set_xticks(range(0, 24, 2))
+        hours_ax.set_title("Transactions by hour (UTC)")
+
+        figure.tight_layout()
+        buffer = BytesIO()
+        figure.savefig(buffer, format="png", dpi=100)
+        return buffer.getvalue()
+    finally:
+        plt.close(figure)
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=CHART_WORKERS)
+    return _pool
+
+
+async def render_market_charts(data, window):
+    """Return PNG bytes for a report's charts, or None if charts are unavailable.
+
+    window identifies the report period (e.g. "2026-W42"); together with the
+    data hash it keys the cache.
+    """
+    if not HAS_MATPLOTLIB:
+        return None
+    chart_input = chart_data(data)
+    key = (window, data_hash(chart_input))
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+
+    try:
+        png = await asyncio.get_running_loop().run_in_executor(_get_pool(), render_charts_png, chart_input)
+    except Exception as e:
+        logger.error(f"Chart rendering failed: {e}")
+        return None
+
+    _cache[key] = png
+    while len(_cache) > CHART_CACHE_SIZE:
+        _cache.popitem(last=False)
+    return png
+
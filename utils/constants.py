@@ -1,34 +1,21 @@
-# Modified by Cascade on 2025-06-14 to test git push
-"""Constants that reference configuration values and Discord IDs"""
+"""Constants that reference configuration values and Discord IDs.
 
-# Discord server and channel IDs
-SERVER_ID = 1217700740949348443  # Discord server ID
-PANEL_CHANNEL_ID = 1383214622290481252  # Main trading panel channel
-TICKET_CHANNEL_ID = 1383214670348943470  # Channel for creating tickets
-TICKETS_CATEGORY_ID = 1358383554798817410  # Category for ticket channels
-VERIFIED_DATA_CHANNEL_ID = 1383214781162459256  # Channel for storing verification data
-VERIFICATION_CHANNEL_ID = 1383654027765612554  # Channel for verification applications
-MIDDLEMAN_GUIDELINES_CHANNEL_ID = 1383216489565524122  # Channel for middleman guidelines
-REPUTATION_CHANNEL_ID = 1383214819158786108  # Channel for reputation tracking
-BADGES_CHANNEL_ID = 1383214869926383696  # Channel for badge assignments
-ARCHIVE_CHANNEL_ID = 1383214911378690210  # Channel for archiving transactions
+config.py is the single source of these values; they are re-exported here for
+existing imports. Per-guild channel IDs live in utils.guild_config.
+"""
+from config import (  # noqa: F401
+    SERVER_ID, PANEL_CHANNEL_ID, TICKET_CHANNEL_ID, TICKETS_CATEGORY_ID,
+    VERIFIED_DATA_CHANNEL_ID, VERIFICATION_CHANNEL_ID, MIDDLEMAN_GUIDELINES_CHANNEL_ID,
+    REPUTATION_CHANNEL_ID, BADGES_CHANNEL_ID, ARCHIVE_CHANNEL_ID,
+    KAMAS_LOGO_URL, BADGE_THRESHOLDS, BADGE_COLORS, ARCHIVE_AFTER_DAYS
+)
 
-# URLs
-KAMAS_LOGO_URL = "https://static.wikia.nocookie.net/dofus/images/1/1e/Kama.png"
-
-# Badge thresholds and colors
-BADGE_THRESHOLDS = {
-    "BRONZE": 10,
-    "SILVER": 50,
-    "GOLD": 100
-}
-
-BADGE_COLORS = {
-    "BRONZE": 0xcd7f32,
-    "SILVER": 0xc0c0c0,
-    "GOLD": 0xffd700
-}
-
-# Other constants
-ARCHIVE_AFTER_DAYS = 30  # Days before archiving transactions
 CURRENCY_SYMBOLS = ["k", "m", "b"]  # Kamas amount symbols
+
+# Listing embed fields; archived listings keep the embed, and market analytics read these back
+LISTING_SELLER_FIELD = "Seller"
+LISTING_AMOUNT_FIELD = "Amount"
+LISTING_PRICE_FIELD = "Price per M"
+LISTING_CURRENCY_FIELD = "Currency"
+LISTING_METHOD_FIELD = "Payment Method"
+LISTING_CONTACT_FIELD = "Contact"
@@ -0,0 +1,149 @@
+"""Per-guild configuration registry.
+
+Each trading guild the bot serves has a GuildConfig with its channel IDs and
+trading settings. Defaults come from config.py, so the original server works
+without any file; GUILDS_CONFIG_FILE adds guilds and overrides fields:
+
+    guilds:
+      1217700740949348443: {}              # config.py values
+      1400000000000000000:
+        panel_channel_id: 1400000000000000001
+        ticket_channel_id: 1400000000000000002
+        archive_after_days: 14
+
+Lookups are a dict access by guild id.
+"""
+import logging
+import os
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Field name -> config.py constant supplying the default
+CHANNEL_FIELDS = {
+    "panel_channel_id": "PANEL_CHANNEL_ID",
+    "ticket_channel_id": "TICKET_CHANNEL_ID",
+    "tickets_category_id": "TICKETS_CATEGORY_ID",
+    "verified_data_channel_id": "VERIFIED_DATA_CHANNEL_ID",
+    "verification_channel_id": "VERIFICATION_CHANNEL_ID",
+    "reputation_channel_id": "REPUTATION_CHANNEL_ID",
+    "badges_channel_id": "BADGES_CHANNEL_ID",
+    "archive_channel_id": "ARCHIVE_CHANNEL_ID",
+    "stats_channel_id": "STATS_CHANNEL_ID",
+    "escrow_channel_id": "ESCROW_CHANNEL_ID",
+    "translations_channel_id": "TRANSLATIONS_CHANNEL_ID",
+    "middleman_application_channel_id": "MIDDLEMAN_APPLICATION_CHANNEL_ID",
+    "middleman_reminders_channel_id": "MIDDLEMAN_REMINDERS_CHANNEL_ID",
+    "middleman_guidelines_channel_id": "MIDDLEMAN_GUIDELINES_CHANNEL_ID",
+    "verification_interview_channel_id": "VERIFICATION_INTERVIEW_CHANNEL_ID",
+    "moderation_channel_id": "MODERATION_CHANNEL_ID",
+}
+SETTING_FIELDS = {
+    "badge_thresholds": "BADGE_THRESHOLDS",
+    "badge_criterion": "BADGE_CRITERION",
+    "archive_after_days": "ARCHIVE_AFTER_DAYS",
+    "escrow_fee_percent": "ESCROW_FEE_PERCENT",
+    "escrow_timeout_hours": "ESCROW_TIMEOUT_HOURS",
+    "min_escrow_amount": "MIN_ESCROW_AMOUNT",
+    "guideline_reminder_freq_days": "GUIDELINE_REMINDER_FREQ_DAYS",
+}
+
+
+class UnknownGuildError(KeyError):
+    """Raised when a guild has no configuration."""
+
+
+class GuildConfig:
+    """Channel IDs and trading settings for one guild."""
+
+    def __init__(self, guild_id, **overrides):
+        unknown = set(overrides) - set(CHANNEL_FIELDS) - set(SETTING_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown guild config fields for {guild_id}: {', '.join(sorted(unknown))}")
+
+        self.guild_id = int(guild_id)
+        for field, default in {**CHANNEL_FIELDS, **SETTING_FIELDS}.items():
+            value = overrides.get(field, getattr(config, default))
+            if field in CHANNEL_FIELDS:
+                value = int(value)
+            elif field == "badge_thresholds":
+                value = {**config.BADGE_THRESHOLDS, **value}
+            setattr(self, field, value)
+
+    def channel_ids(self):
+        """Return {field: channel id} for every configured channel."""
+        return {field: getattr(self, field) for field in CHANNEL_FIELDS}
+
+    def __repr__(self):
+        return f"<GuildConfig guild_id={self.guild_id}>"
+
+
+class GuildConfigRegistry:
+    """GuildConfig objects keyed by guild id."""
+
+    def __init__(self, configs=()):
+        self._configs = {}
+        for guild_config in configs:
+            self.add(guild_config)
+
+    def add(self, guild_config):
+        self._configs[guild_config.guild_id] = guild_config
+
+    def get(self, guild_id):
+        """Return the guild's config, or None if it is not configured."""
+        return self._configs.get(guild_id)
+
+    def __getitem__(self, guild_id):
+        try:
+            return self._configs[guild_id]
+        except KeyError:
+            raise UnknownGuildError(f"No configuration for guild {guild_id}") from None
+
+    def for_guild(self, guild):
+        """Return the config for a discord.Guild, raising UnknownGuildError if it has none."""
+        if guild is None:
+            raise UnknownGuildError("No guild (direct message?)")
+        return self[guild.id]
+
+    def configured_guilds(self, bot):
+        """Return the configured guilds owned by this process's shards."""
+        return [guild for guild in bot.guilds if guild.id in self._configs and owns_guild(bot, guild)]
+
+    def __contains__(self, guild_id):
+        return guild_id in self._configs
+
+    def __iter__(self):
+        return iter(self._configs.values())
+
+    def __len__(self):
+        return len(self._configs)
+
+
+def owns_guild(bot, guild):
+    """Whether one of the bot's shards receives this guild's events.
+
+    Background jobs only run for owned guilds, so when shards are split across
+    processes each guild's jobs run exactly once.
+    """
+    shard_ids = getattr(bot, "shard_ids", None)
+    return shard_ids is None or guild.shard_id in shard_ids
+
+
+def load_guild_configs(path=None):
+    """Build the registry from GUILDS_CONFIG_FILE, falling back to SERVER_ID with config.py values."""
+    path = config.GUILDS_CONFIG_FILE if path is None else path
+    registry = GuildConfigRegistry()
+    if path and os.path.exists(path):
+        import yaml
+        with open(path) as f:
+            data = yaml.safe_load(f) or {}
+        for guild_id, overrides in (data.get("guilds") or {}).items():
+            registry.add(GuildConfig(guild_id, **(overrides or {})))
+        logger.info(f"Loaded configuration for {len(registry)} guilds from {path}")
+    if not registry:
+        registry.add(GuildConfig(config.SERVER_ID))
+    return registry
+
+
+guild_configs = load_guild_configs()
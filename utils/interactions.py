@@ -0,0 +1,119 @@
+"""Automatic deferral for interaction handlers that may miss Discord's deadline.
+
+Discord drops an interaction that is not acknowledged within 3 seconds. A
+handler tracked with @track(..., auto_defer=True) receives its interaction
+wrapped in a BudgetedInteraction: if the handler has not responded
+INTERACTION_DEFER_AFTER seconds after Discord created the interaction (so
+gateway and dispatch delays count against the budget), it is deferred for it, and the handler's later response calls are routed to what is still
+allowed:
+
+    response.send_message  ->  followup.send
+    response.edit_message  ->  edit_original_response (the message the component is on)
+    response.defer         ->  no-op
+
+so handlers keep calling interaction.response as if nothing happened. Modals
+cannot follow a defer, so handlers that open one should not use auto_defer.
+"""
+import asyncio
+
+import discord
+
+from config import INTERACTION_DEFER_AFTER
+
+# Discord's acknowledgement window, in seconds
+ACK_DEADLINE = 3.0
+
+
+def find_interaction(args):
+    """Index of the interaction among a handler's positional arguments, or None."""
+    return next((i for i, arg in enumerate(args) if hasattr(arg, "response") and hasattr(arg, "followup")), None)
+
+
+class BudgetedResponse:
+    """interaction.response that can be deferred by a timer, with later calls sent as followups."""
+
+    def __init__(self, interaction):
+        self._interaction = interaction
+        self._response = interaction.response
+        self._lock = asyncio.Lock()  # A response and the timer's defer never race
+        self._created_at = getattr(interaction, "created_at", None) or discord.utils.utcnow()
+        self._deferring = False
+        self.auto_deferred = False
+        self.acknowledged_after = None  # Seconds from interaction creation until the first acknowledgement
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+    def is_done(self):
+        return self._response.is_done()
+
+    def age(self):
+        """Seconds since Discord created the interaction."""
+        return (discord.utils.utcnow() - self._created_at).total_seconds()
+
+    def _acknowledged(self):
+        if self.acknowledged_after is None:
+            self.acknowledged_after = self.age()
+
+    async def send_message(self, content=None, **kwargs):
+        async with self._lock:
+            if not self._response.is_done():
+                await self._response.send_message(content, **kwargs)
+                self._acknowledged()
+                return
+        await self._interaction.followup.send(content, **kwargs)
+
+    async def edit_message(self, **kwargs):
+        async with self._lock:
+            if not self._response.is_done():
+                await self._response.edit_message(**kwargs)
+                self._acknowledged()
+                return
+        await self._interaction.edit_original_response(**kwargs)
+
+    async def defer(self, **kwargs):
+        async with self._lock:
+            if not self._response.is_done():
+                await self._response.defer(**kwargs)
+                self._acknowledged()
+
+    async def defer_after(self, delay, ephemeral=True):
+        """Defer the interaction if nothing has acknowledged it `delay` seconds after it was created.
+
+        An interaction that arrives with its budget already used up is deferred at once.
+        """
+        await asyncio.sleep(max(0.0, delay - self.age()))
+        self._deferring = True
+        async with self._lock:
+            if self._response.is_done():
+                return
+            # Components acknowledge silently; commands and modals show "thinking..." until the followup
+            thinking = getattr(self._interaction, "type", None) is not discord.InteractionType.component
+            await self._response.defer(ephemeral=ephemeral, thinking=thinking)
+            self.auto_deferred = True
+            self._acknowledged()
+
+    @property
+    def missed_deadline(self):
+        return self.acknowledged_after is None or self.acknowledged_after > ACK_DEADLINE
+
+
+class BudgetedInteraction:
+    """The handler's interaction with `response` replaced by a BudgetedResponse."""
+
+    def __init__(self, interaction):
+        self._interaction = interaction
+        self.response = BudgetedResponse(interaction)
+        self._timer = asyncio.create_task(self.response.defer_after(INTERACTION_DEFER_AFTER))
+
+    def __getattr__(self, name):
+        return getattr(self._interaction, name)
+
+    async def finish(self):
+        """Stop the defer timer when the handler returns, or wait for a defer already in flight."""
+        if self.response._deferring:
+            # Let the defer land before the outcome is recorded; a failed defer shows as a miss
+            await asyncio.gather(self._timer, return_exceptions=True)
+        else:
+            self._timer.cancel()
+
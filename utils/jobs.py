@@ -0,0 +1,236 @@
+"""Background job helpers and the jobs socket between bot.py and worker.py.
+
+With BACKGROUND_JOBS=worker, bot.py only handles gateway events and
+interactions. worker.py runs the scheduled jobs over REST and talks to bot.py
+through a Unix socket (JOBS_SOCKET) carrying newline-delimited JSON:
+
+    worker -> bot   {"op": "hello"}
+                    {"op": "job_finished", "job": ..., "seconds": ..., "guilds": [[shard, status], ...]}
+                    {"op": "listings_closed", "guild_id": ..., "listings": [{"order_id", "seller_id", "amount"}, ...]}
+    bot -> worker   {"op": "restore_views", "id": 1}
+                    {"op": "run", "id": 2, "job": "generate_market_report", "guild_id": ...}
+    replies         {"op": "result", "reply_to": 1, "result": ..., "error": null}
+
+bot.py listens and the worker reconnects whenever bot.py restarts.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+
+from config import JOB_REQUEST_TIMEOUT
+from utils.metrics import BACKGROUND_RUNS, BACKGROUND_RUN_LATENCY, GUILD_JOB_RUNS
+
+logger = logging.getLogger(__name__)
+
+# restore_views replies list every open listing, so allow long lines
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024
+
+
+class JobError(Exception):
+    """Raised when the other process could not run a requested job."""
+
+
+async def run_for_guilds(guilds, func):
+    """Run func(guild) for every guild concurrently; returns [(guild, result or exception)]."""
+    results = await asyncio.gather(*(func(guild) for guild in guilds), return_exceptions=True)
+    for guild, result in zip(guilds, results):
+        failed = isinstance(result, Exception)
+        GUILD_JOB_RUNS.inc(task=func.__name__, shard=guild.shard_id, status="error" if failed else "ok")
+        if failed:
+            logger.error(f"{func.__name__} failed for guild {guild.id}: {result}")
+    return list(zip(guilds, results))
+
+
+def seconds_until_weekly_report(now=None):
+    """Seconds until the next Monday 09:00 UTC, when the weekly market report is posted."""
+    now = now or datetime.now(timezone.utc)
+    next_monday = now + timedelta(days=(7 - now.weekday()))
+    next_monday = next_monday.replace(hour=9, minute=0, second=0, microsecond=0)
+    return (next_monday - now).total_seconds()
+
+
+class JobConnection:
+    """One end of the jobs socket: sends messages, answers requests and matches replies."""
+
+    def __init__(self, reader, writer, handlers):
+        self.reader = reader
+        self.writer = writer
+        self.handlers = handlers
+        self._ids = itertools.count(1)
+        self._pending = {}
+
+    @property
+    def closed(self):
+        return self.writer.is_closing()
+
+    async def send(self, op, **data):
+        self.writer.write(json.dumps({"op": op, **data}).encode() + b"\n")
+        await self.writer.drain()
+
+    async def request(self, op, timeout=None, **data):
+        """Send a request and wait for its result."""
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            await self.send(op, id=request_id, **data)
+            reply = await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending.pop(request_id, None)
+        if reply.get("error"):
+            raise JobError(reply["error"])
+        return reply.get("result")
+
+    async def serve(self):
+        """Dispatch incoming messages until the other process disconnects."""
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    logger.error(f"Malformed jobs socket message: {line[:200]!r}")
+                    continue
+
+                op = message.get("op")
+                if op == "result":
+                    future = self._pending.get(message.get("reply_to"))
+                    if future and not future.done():
+                        future.set_result(message)
+                elif op in self.handlers:
+                    # Handlers may make requests of their own, so never block the read loop
+                    asyncio.create_task(self._handle(self.handlers[op], message))
+                else:
+                    logger.error(f"No handler for jobs socket op {op}")
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Jobs socket closed"))
+            self.writer.close()
+
+    async def _handle(self, handler, message):
+        result, error = None, None
+        try:
+            result = await handler(message)
+        except Exception as e:
+            logger.error(f"Jobs socket handler for {message.get('op')} failed: {e}")
+            error = str(e) or type(e).__name__
+        if "id" in message and not self.closed:
+            try:
+                await self.send("result", reply_to=message["id"], result=result, error=error)
+            except ConnectionError:
+                pass
+
+
+class JobServer:
+    """bot.py's end of the jobs socket. Accepts one worker connection at a time."""
+
+    def __init__(self):
+        self.handlers = {"hello": self._hello, "job_finished": self._job_finished}
+        self.connection = None
+        self._server = None
+        self._connect_callbacks = []
+
+    @property
+    def connected(self):
+        return self.connection is not None and not self.connection.closed
+
+    def on(self, op, handler):
+        """Handle messages with this op from the worker; handler(message) may return a result."""
+        self.handlers[op] = handler
+
+    def on_connect(self, callback):
+        """Call callback() each time a worker connects (e.g. to hand it startup work)."""
+        self._connect_callbacks.append(callback)
+
+    async def start(self, path):
+        """Listen on the Unix socket at path. Safe to call more than once."""
+        if self._server is not None:
+            return
+        if os.path.exists(path):
+            os.remove(path)  # Left behind by a previous run
+        self._server = await asyncio.start_unix_server(self._accept, path=path, limit=MAX_MESSAGE_BYTES)
+        logger.info(f"Waiting for the job worker on {path}")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def request(self, op, **data):
+        """Ask the worker to do something and return its result."""
+        if not self.connected:
+            raise ConnectionError("Job worker is not connected")
+        return await self.connection.request(op, timeout=JOB_REQUEST_TIMEOUT, **data)
+
+    async def _accept(self, reader, writer):
+        if self.connected:
+            logger.warning("A second job worker connected; replacing the first")
+            self.connection.writer.close()
+        connection = self.connection = JobConnection(reader, writer, self.handlers)
+        try:
+            await connection.serve()
+        except asyncio.CancelledError:
+            pass  # bot.py is shutting down
+        finally:
+            if self.connection is connection:
+                self.connection = None
+                logger.warning("Job worker disconnected")
+
+    async def _hello(self, message):
+        logger.info(f"Job worker connected (pid {message.get('pid')})")
+        for callback in self._connect_callbacks:
+            asyncio.create_task(callback())
+
+    async def _job_finished(self, message):
+        """Record a worker job run in this process's /metrics."""
+        job, seconds = message["job"], message["seconds"]
+        BACKGROUND_RUNS.inc(task=job, status=message.get("status", "ok"))
+        BACKGROUND_RUN_LATENCY.observe(seconds, task=job)
+        for shard, status in message.get("guilds", []):
+            GUILD_JOB_RUNS.inc(task=job, shard=shard, status=status)
+
+
+class JobClient:
+    """worker.py's end of the jobs socket. Reconnects until stopped."""
+
+    def __init__(self, handlers):
+        self.handlers = handlers
+        self.connection = None
+
+    @property
+    def connected(self):
+        return self.connection is not None and not self.connection.closed
+
+    async def run(self, path, retry_interval=5):
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(path, limit=MAX_MESSAGE_BYTES)
+            except OSError:
+                await asyncio.sleep(retry_interval)
+                continue
+            self.connection = JobConnection(reader, writer, self.handlers)
+            logger.info(f"Connected to bot.py on {path}")
+            await self.connection.send("hello", pid=os.getpid())
+            await self.connection.serve()
+            self.connection = None
+            logger.warning("Lost connection to bot.py; reconnecting")
+            await asyncio.sleep(retry_interval)
+
+    async def send(self, op, **data):
+        """Send a message if bot.py is connected; otherwise drop it."""
+        if not self.connected:
+            return
+        try:
+            await self.connection.send(op, **data)
+        except ConnectionError as e:
+            logger.warning(f"Could not send {op} to bot.py: {e}")
+
+
+job_server = JobServer()
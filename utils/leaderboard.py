@@ -0,0 +1,67 @@
+"""Seller rankings kept up to date as votes and archived trades come in.
+
+Each (guild, metric) has a list of (-value, seller id) kept sorted with bisect,
+plus the seller's current value. An update removes the seller's old entry and
+inserts the new one, two binary searches plus a memmove. The top K is a slice,
+so a leaderboard read costs O(K) however many sellers there are.
+
+Decayed scores shrink by the same factor for every seller, so they are ranked
+by their epoch-referenced sums (see utils.reputation) and never need re-sorting
+as time passes.
+"""
+import bisect
+
+METRICS = ("score", "positive", "decayed", "volume")
+
+
+class Ranking:
+    """Sellers ordered by one value, highest first (ties by seller id)."""
+
+    def __init__(self):
+        self.values = {}  # seller id -> value
+        self._order = []  # sorted [(-value, seller id)]
+
+    def __len__(self):
+        return len(self.values)
+
+    def update(self, seller_id, value):
+        old = self.values.get(seller_id)
+        if old == value:
+            return
+        if old is not None:
+            del self._order[bisect.bisect_left(self._order, (-old, seller_id))]
+        self.values[seller_id] = value
+        bisect.insort(self._order, (-value, seller_id))
+
+    def top(self, count):
+        """[(seller id, value)] for the `count` highest values."""
+        return [(seller_id, -negated) for negated, seller_id in self._order[:count]]
+
+    def rank(self, seller_id):
+        """1-based position of a seller, or None if unranked."""
+        if seller_id not in self.values:
+            return None
+        return bisect.bisect_left(self._order, (-self.values[seller_id], seller_id)) + 1
+
+
+class SellerLeaderboard:
+    """Rankings per guild and metric (score, positive, decayed, volume)."""
+
+    def __init__(self):
+        self._rankings = {}  # (guild id, metric) -> Ranking
+
+    def ranking(self, guild_id, metric):
+        if metric not in METRICS:
+            raise ValueError(f"Unknown leaderboard metric {metric}")
+        return self._rankings.setdefault((guild_id, metric), Ranking())
+
+    def update(self, guild_id, seller_id, **values):
+        """Set one or more metrics for a seller, e.g. update(g, s, score=3, positive=5)."""
+        for metric, value in values.items():
+            self.ranking(guild_id, metric).update(seller_id, value)
+
+    def top(self, guild_id, metric, count=10):
+        return self.ranking(guild_id, metric).top(count)
+
+
+seller_leaderboard = SellerLeaderboard()
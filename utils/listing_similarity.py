@@ -0,0 +1,221 @@
+"""Near-duplicate listing detection with MinHash and locality-sensitive hashing.
+
+A listing's payment method, contact and notes are lowercased and cut into
+character 4-grams. MinHash reduces that set to LISTING_MINHASH_BANDS *
+LISTING_MINHASH_ROWS minimums of random hash functions; two listings agree on
+each minimum with probability equal to the Jaccard similarity of their 4-gram
+sets, so a changed phone number or handle still leaves most of them equal.
+Each band of LISTING_MINHASH_ROWS minimums is a bucket key, and a new listing
+is only compared with the listings and scam patterns sharing a bucket with it
+rather than with every open listing.
+
+Open listings are indexed as they are posted and rebuilt from their embeds at
+startup, like the order book, and leave the index when their thread is closed
+or they are archived. Past MAX_INDEXED_LISTINGS the oldest are evicted. Scam
+patterns added by admins are indexed the same way, never evicted, and saved
+to SCAM_PATTERNS_FILE.
+"""
+import json
+import logging
+import os
+import re
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+from config import (
+    SCAM_PATTERNS_FILE, LISTING_SIMILARITY_THRESHOLD, LISTING_MINHASH_BANDS, LISTING_MINHASH_ROWS,
+    MAX_INDEXED_LISTINGS
+)
+from utils.storage import write_json
+
+logger = logging.getLogger(__name__)
+
+SHINGLE_SIZE = 4
+MIN_SHINGLES = 8  # Shorter texts ("PayPal", "dm me") look like too many honest listings
+NUM_HASHES = LISTING_MINHASH_BANDS * LISTING_MINHASH_ROWS
+BAND_BYTES = LISTING_MINHASH_ROWS * 4
+
+# Hash functions (a * x + b) mod p over CRC32s of the shingles; a * x stays below 2**63
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(0x6B616D6173)
+_A = _rng.integers(1, _PRIME, NUM_HASHES, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, NUM_HASHES, dtype=np.uint64)[:, None]
+
+
+def listing_text(payment_method, contact_info, notes):
+    """The free-text parts of a listing, in the order they are compared."""
+    return "\n".join(part for part in (payment_method, contact_info, notes) if part)
+
+
+def shingles(text):
+    text = re.sub(r"\s+", " ", text.lower()).strip()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def signature(text):
+    """MinHash signature as NUM_HASHES uint32s in bytes, or None if the text is too short."""
+    grams = shingles(text)
+    if len(grams) < MIN_SHINGLES:
+        return None
+    hashes = np.fromiter((zlib.crc32(gram.encode()) for gram in grams), dtype=np.uint64, count=len(grams))
+    return ((np.outer(_A, hashes) + _B) % _PRIME).min(axis=1).astype(np.uint32).tobytes()
+
+
+def similarity(first, second):
+    """Estimated Jaccard similarity of the texts behind two signatures."""
+    return int(np.count_nonzero(np.frombuffer(first, np.uint32) == np.frombuffer(second, np.uint32))) / NUM_HASHES
+
+
+class SimilarMatch:
+    """An indexed listing or scam pattern close to a new listing."""
+
+    __slots__ = ("similarity", "listing_id", "user_id", "jump_url", "pattern_id", "pattern")
+
+    def __init__(self, similarity, listing_id=None, user_id=None, jump_url=None, pattern_id=None, pattern=None):
+        self.similarity = similarity
+        self.listing_id = listing_id
+        self.user_id = user_id
+        self.jump_url = jump_url
+        self.pattern_id = pattern_id
+        self.pattern = pattern
+
+    def describe(self):
+        if self.pattern_id is not None:
+            return f"#{self.pattern_id}: {self.pattern[:200]}"
+        return f"<@{self.user_id}>: {self.jump_url}"
+
+
+class ListingSimilarityIndex:
+    """MinHash LSH buckets over open listings and scam patterns, per guild."""
+
+    def __init__(self, path=SCAM_PATTERNS_FILE, max_listings=MAX_INDEXED_LISTINGS,
+                 threshold=LISTING_SIMILARITY_THRESHOLD):
+        self.path = path
+        self.max_listings = max_listings
+        self.threshold = threshold
+        self.listings = OrderedDict()  # listing id -> (guild id, user id, jump url, signature), oldest first
+        self.patterns = {}  # pattern id -> (guild id, text, signature)
+        # hash((guild id, band, band bytes)) -> member or [members]; listing ids, and -pattern id for
+        # patterns. Hash collisions only add candidates, which are checked against the threshold.
+        self._buckets = {}
+        self._next_pattern_id = 1
+        self._load()
+
+    def __len__(self):
+        return len(self.listings)
+
+    def _keys(self, guild_id, sig):
+        return [hash((guild_id, band, sig[band * BAND_BYTES:(band + 1) * BAND_BYTES]))
+                for band in range(LISTING_MINHASH_BANDS)]
+
+    def _index(self, guild_id, sig, member):
+        # Most buckets hold one member, so it is stored bare until a second one arrives
+        for key in self._keys(guild_id, sig):
+            current = self._buckets.get(key)
+            if current is None:
+                self._buckets[key] = member
+            elif isinstance(current, list):
+                current.append(member)
+            else:
+                self._buckets[key] = [current, member]
+
+    def _unindex(self, guild_id, sig, member):
+        for key in self._keys(guild_id, sig):
+            current = self._buckets.get(key)
+            if isinstance(current, list):
+                current.remove(member)
+                if len(current) == 1:
+                    self._buckets[key] = current[0]
+            elif current == member:
+                del self._buckets[key]
+
+    def add(self, listing_id, guild_id, user_id, jump_url, text):
+        """Index an open listing; returns False if its text is too short to compare."""
+        sig = signature(text)
+        if sig is None:
+            return False
+        self.remove(listing_id)
+        self.listings[listing_id] = (guild_id, user_id, jump_url, sig)
+        self._index(guild_id, sig, listing_id)
+        while len(self.listings) > self.max_listings:
+            evicted, (evicted_guild, _, _, evicted_sig) = self.listings.popitem(last=False)
+            self._unindex(evicted_guild, evicted_sig, evicted)
+        return True
+
+    def remove(self, listing_id):
+        entry = self.listings.pop(listing_id, None)
+        if entry:
+            self._unindex(entry[0], entry[3], listing_id)
+
+    def similar(self, guild_id, user_id, text):
+        """Other users' listings and scam patterns at least `threshold` similar to text, closest first."""
+        sig = signature(text)
+        if sig is None:
+            return []
+        candidates = set()
+        for key in self._keys(guild_id, sig):
+            members = self._buckets.get(key)
+            if isinstance(members, list):
+                candidates.update(members)
+            elif members is not None:
+                candidates.add(members)
+
+        matches = []
+        for member in candidates:
+            if member < 0:
+                pattern_guild, pattern, other = self.patterns[-member]
+                if pattern_guild != guild_id:
+                    continue
+                match = SimilarMatch(similarity(sig, other), pattern_id=-member, pattern=pattern)
+            else:
+                listing_guild, listing_user, jump_url, other = self.listings[member]
+                # Sellers reposting their own listing is normal; only other accounts are reported
+                if listing_guild != guild_id or listing_user == user_id:
+                    continue
+                match = SimilarMatch(similarity(sig, other), member, listing_user, jump_url)
+            if match.similarity >= self.threshold:
+                matches.append(match)
+        matches.sort(key=lambda match: match.similarity, reverse=True)
+        return matches
+
+    def add_pattern(self, guild_id, text, pattern_id=None):
+        """Index a known scam text; returns its id, or None if it is too short to compare."""
+        sig = signature(text)
+        if sig is None:
+            return None
+        pattern_id = pattern_id or self._next_pattern_id
+        self._next_pattern_id = max(self._next_pattern_id, pattern_id + 1)
+        self.patterns[pattern_id] = (guild_id, text, sig)
+        self._index(guild_id, sig, -pattern_id)
+        return pattern_id
+
+    def remove_pattern(self, guild_id, pattern_id):
+        entry = self.patterns.get(pattern_id)
+        if entry is None or entry[0] != guild_id:
+            return False
+        del self.patterns[pattern_id]
+        self._unindex(guild_id, entry[2], -pattern_id)
+        return True
+
+    def patterns_for(self, guild_id):
+        """[(pattern id, text)] for one guild."""
+        return [(pattern_id, text) for pattern_id, (pattern_guild, text, _) in self.patterns.items()
+                if pattern_guild == guild_id]
+
+    def save(self):
+        write_json(self.path, [[pattern_id, guild_id, text] for pattern_id, (guild_id, text, _) in self.patterns.items()])
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                for pattern_id, guild_id, text in json.load(f):
+                    self.add_pattern(guild_id, text, pattern_id)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not load scam patterns from {self.path}: {e}")
+
+
+listing_similarity = ListingSimilarityIndex()
@@ -0,0 +1,149 @@
+"""Non-blocking logging pipeline for the Kamas bot.
+
+Log calls on the event loop only render the message and push the record onto
+a queue; a background listener thread formats the lines and does the disk writes.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from config import (
+    LOG_FILE, LOG_LEVEL, LOG_MAX_BYTES, LOG_BACKUP_COUNT,
+    LOG_ROTATE_WHEN, LOG_JSON_FILE
+)
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Extra fields that interaction handlers attach to records
+CONTEXT_FIELDS = ("interaction_id", "user", "command", "latency_ms")
+
+_listener = None
+_exception_formatter = logging.Formatter()
+
+
+class SizedTimedRotatingFileHandler(logging.handlers.TimedRotatingFileHandler):
+    """Rotates on a schedule and whenever the file exceeds max_bytes."""
+
+    def __init__(self, filename, max_bytes=0, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.max_bytes = max_bytes
+
+    def shouldRollover(self, record):
+        if super().shouldRollover(record):
+            return True
+        if self.max_bytes <= 0 or self.stream is None:
+            return False
+        self.stream.seek(0, os.SEEK_END)
+        return self.stream.tell() + len(self.format(record)) + 1 >= self.max_bytes
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues the record itself, keeping its context fields, with only the message and traceback rendered.
+
+    Arguments may be mutated, and traceback frames would stay alive, before the listener gets the record.
+    """
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text  # Rendered by DeferredQueueHandler
+        return json.dumps(entry, default=str)
+
+
+def interaction_context(interaction, started=None, **extra):
+    """Build the `extra` dict for logging calls made from an interaction handler.
+
+    Usage: logger.info("...", extra=interaction_context(interaction, started))
+    """
+    command = None
+    if getattr(interaction, "command", None) is not None:
+        command = interaction.command.qualified_name
+    elif isinstance(getattr(interaction, "data", None), dict):
+        command = interaction.data.get("custom_id")
+
+    context = {
+        "interaction_id": getattr(interaction, "id", None),
+        "user": getattr(getattr(interaction, "user", None), "id", None),
+        "command": command,
+        "latency_ms": round((time.perf_counter() - started) * 1000, 2) if started else None,
+    }
+    context.update(extra)
+    return context
+
+
+def _file_handler(path, formatter):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    handler = SizedTimedRotatingFileHandler(
+        path,
+        max_bytes=LOG_MAX_BYTES,
+        when=LOG_ROTATE_WHEN,
+        backupCount=LOG_BACKUP_COUNT,
+        encoding="utf-8",
+        delay=True
+    )
+    handler.setFormatter(formatter)
+    return handler
+
+
+def setup_logging(log_file=LOG_FILE, json_file=LOG_JSON_FILE):
+    """Route all logging through a queue drained by a background thread."""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    text_formatter = logging.Formatter(TEXT_FORMAT)
+    handlers = [_file_handler(log_file, text_formatter)]
+    if json_file:
+        handlers.append(_file_handler(json_file, JsonLinesFormatter()))
+    console = logging.StreamHandler()
+    console.setFormatter(text_formatter)
+    handlers.append(console)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(DeferredQueueHandler(log_queue))
+    root.setLevel(LOG_LEVEL)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,202 @@
+"""Event-loop lag sampler and slow-callback detector.
+
+Every callback the loop runs goes through asyncio.Handle._run, so timing that
+method catches any task step that blocks the loop. A watchdog thread grabs the
+loop thread's stack while a step is still running, so the report points at the
+blocking line rather than wherever the task was suspended afterwards.
+"""
+import asyncio
+import io
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime, timezone
+
+from utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG = REGISTRY.gauge(
+    "kamasbot_event_loop_lag_seconds",
+    "Delay of the most recent loop-lag probe beyond its scheduled wake-up"
+)
+LOOP_LAG_HISTOGRAM = REGISTRY.histogram(
+    "kamasbot_event_loop_lag_distribution_seconds",
+    "Distribution of loop-lag probe delays",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 3.0, 10.0)
+)
+SLOW_CALLBACKS = REGISTRY.counter(
+    "kamasbot_slow_callbacks_total",
+    "Event-loop steps that exceeded the slow-callback threshold",
+    ("handler",)
+)
+
+MAX_STACK_LINES = 30
+
+
+def describe_handle(handle):
+    """Return a readable name for what a loop handle is about to run."""
+    callback = getattr(handle, "_callback", None)
+    owner = getattr(callback, "__self__", None)
+    if isinstance(owner, asyncio.Task):
+        coro = owner.get_coro()
+        name = getattr(coro, "__qualname__", None) or repr(coro)
+        return f"{name} [{owner.get_name()}]"
+    return getattr(callback, "__qualname__", None) or repr(callback)
+
+
+def _task_stack(handle):
+    owner = getattr(getattr(handle, "_callback", None), "__self__", None)
+    if not isinstance(owner, asyncio.Task) or owner.done():
+        return ""
+    buffer = io.StringIO()
+    owner.print_stack(limit=MAX_STACK_LINES, file=buffer)
+    return buffer.getvalue()
+
+
+def _format_step_stack(frame):
+    """Format the loop thread's stack, starting at the callback the loop is running."""
+    summary = traceback.extract_stack(frame)
+    # Drop the asyncio machinery above our Handle._run hook and asyncio's own _run
+    for index in range(len(summary) - 1, -1, -1):
+        if summary[index].filename == __file__ and summary[index].name == "_run":
+            summary = summary[index + 2:]
+            break
+    return "".join(traceback.format_list(summary[-MAX_STACK_LINES:]))
+
+
+class LoopMonitor:
+    """Samples event-loop lag and records loop steps slower than a threshold."""
+
+    def __init__(self, lag_interval=0.5, slow_threshold=0.25, history=50):
+        self.lag_interval = lag_interval
+        self.slow_threshold = slow_threshold
+        self.slow_callbacks = deque(maxlen=history)
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.started_at = None
+        self._loop = None
+        self._loop_thread_id = None
+        self._lag_task = None
+        self._watchdog = None
+        self._stopping = threading.Event()
+        # (handle, start time) of the step running right now, written on the loop thread
+        self._current = None
+        # Stack captured by the watchdog for the current step
+        self._captured_stack = None
+        self._original_run = None
+
+    def start(self, loop=None):
+        """Install the detector on the running loop. Must be called from the loop thread."""
+        if self._loop is not None:
+            return
+        self._loop = loop or asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self.started_at = datetime.now(timezone.utc)
+        self._install_handle_hook()
+        self._lag_task = self._loop.create_task(self._sample_lag(), name="loop-lag-sampler")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(
+            f"Loop monitor started (probe every {self.lag_interval}s, "
+            f"slow threshold {self.slow_threshold * 1000:.0f}ms)"
+        )
+
+    def stop(self):
+        self._stopping.set()
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+        if self._original_run is not None:
+            asyncio.events.Handle._run = self._original_run
+            self._original_run = None
+        self._loop = None
+
+    def _install_handle_hook(self):
+        monitor = self
+        original_run = asyncio.events.Handle._run
+        self._original_run = original_run
+
+        def _run(handle):
+            if threading.get_ident() != monitor._loop_thread_id:
+                return original_run(handle)
+            start = time.perf_counter()
+            monitor._current = (handle, start)
+            try:
+                return original_run(handle)
+            finally:
+                monitor._current = None
+                duration = time.perf_counter() - start
+                if duration >= monitor.slow_threshold:
+                    monitor._record_slow(handle, duration)
+                monitor._captured_stack = None
+
+        asyncio.events.Handle._run = _run
+
+    def _watch(self):
+        poll = max(self.slow_threshold / 2, 0.01)
+        frames_of = sys._current_frames
+        while not self._stopping.wait(poll):
+            current = self._current
+            if current is None or self._captured_stack is not None:
+                continue
+            handle, start = current
+            if time.perf_counter() - start < self.slow_threshold:
+                continue
+            frame = frames_of().get(self._loop_thread_id)
+            if frame is not None and self._current is current:
+                self._captured_stack = _format_step_stack(frame)
+
+    def _record_slow(self, handle, duration):
+        handler = describe_handle(handle)
+        stack = self._captured_stack
+        if stack is None:
+            resumed = _task_stack(handle)
+            stack = f"(step finished before the watchdog sampled it; task now at)\n{resumed}" if resumed else ""
+        entry = {
+            "handler": handler,
+            "duration": duration,
+            "at": datetime.now(timezone.utc),
+            "stack": stack,
+        }
+        self.slow_callbacks.append(entry)
+        SLOW_CALLBACKS.inc(handler=handler.split(" [")[0])
+        logger.warning(
+            f"Slow event-loop step: {handler} blocked the loop for {duration * 1000:.0f}ms\n{stack}"
+        )
+
+    async def _sample_lag(self):
+        while True:
+            scheduled = self._loop.time() + self.lag_interval
+            await asyncio.sleep(self.lag_interval)
+            lag = max(self._loop.time() - scheduled, 0.0)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            LOOP_LAG.set(lag)
+            LOOP_LAG_HISTOGRAM.observe(lag)
+            if lag >= self.slow_threshold:
+                logger.warning(f"Event loop lag {lag * 1000:.0f}ms")
+
+    def snapshot(self):
+        """Summary for the admin diagnostics command."""
+        return {
+            "running": self._loop is not None,
+            "last_lag": self.last_lag,
+            "max_lag": self.max_lag,
+            "slow_threshold": self.slow_threshold,
+            "slow_callbacks": list(self.slow_callbacks),
+        }
+
+
+monitor = None
+
+
+def get_monitor():
+    """Return the process-wide loop monitor, creating it from config on first use."""
+    global monitor
+    if monitor is None:
+        from config import LOOP_LAG_INTERVAL, SLOW_CALLBACK_THRESHOLD, SLOW_CALLBACK_HISTORY
+        monitor = LoopMonitor(LOOP_LAG_INTERVAL, SLOW_CALLBACK_THRESHOLD, SLOW_CALLBACK_HISTORY)
+    return monitor
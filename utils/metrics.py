@@ -0,0 +1,451 @@
+"""Metrics registry with a Prometheus text-format exposition endpoint."""
+import logging
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+
+from aiohttp import web
+
+from utils.interactions import find_interaction, BudgetedInteraction
+from utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Buckets in seconds; 3.0 is Discord's interaction acknowledgement deadline
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+def _label_key(labelnames, labels):
+    if set(labels) != set(labelnames):
+        raise ValueError(f"Expected labels {labelnames}, got {tuple(labels)}")
+    return tuple(str(labels[name]) for name in labelnames)
+
+
+def _format_labels(labelnames, key, extra=None):
+    pairs = list(zip(labelnames, key))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        name + '="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+class Metric:
+    """Base class for a named metric family with optional labels."""
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    """Monotonically increasing value."""
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(_label_key(self.labelnames, labels), 0)
+
+    def collect(self):
+        lines = self.header()
+        for key, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Gauge(Metric):
+    """Value that can go up and down, or be read from a callback at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+        self._functions = {}
+
+    def set(self, value, **labels):
+        self._values[_label_key(self.labelnames, labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, func, **labels):
+        """Evaluate func() on every scrape instead of storing a value."""
+        self._functions[_label_key(self.labelnames, labels)] = func
+
+    def value(self, **labels):
+        key = _label_key(self.labelnames, labels)
+        if key in self._functions:
+            return self._functions[key]()
+        return self._values.get(key, 0)
+
+    def collect(self):
+        lines = self.header()
+        values = dict(self._values)
+        for key, func in self._functions.items():
+            try:
+                values[key] = func()
+            except Exception as e:
+                logger.error(f"Gauge callback for {self.name} failed: {e}")
+        for key, value in values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram(Metric):
+    """Cumulative bucketed observations, used for latency percentiles."""
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+        series["counts"][bisect_left(self.buckets, value)] += 1
+        series["sum"] += value
+        series["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels):
+        series = self._series.get(_label_key(self.labelnames, labels))
+        return series["count"] if series else 0
+
+    def collect(self):
+        lines = self.header()
+        for key, series in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, series["counts"]):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', repr(bound)))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', '+Inf'))} {series['count']}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series['sum']}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series['count']}")
+        return lines
+
+
+class Registry:
+    """Holds metric families and renders them in Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+INTERACTION_LATENCY = REGISTRY.histogram(
+    "kamasbot_interaction_latency_seconds",
+    "Time spent in slash command, button, select and modal handlers",
+    ("handler",)
+)
+INTERACTION_ERRORS = REGISTRY.counter(
+    "kamasbot_interaction_errors_total",
+    "Interaction handlers that raised",
+    ("handler",)
+)
+INTERACTION_AUTO_DEFERS = REGISTRY.counter(
+    "kamasbot_interaction_auto_defers_total",
+    "Interactions deferred automatically because the handler had not responded in time",
+    ("handler",)
+)
+INTERACTION_DEADLINE_MISSES = REGISTRY.counter(
+    "kamasbot_interaction_deadline_misses_total",
+    "Interactions first acknowledged after Discord's 3-second deadline, or not at all",
+    ("handler",)
+)
+OPERATION_LATENCY = REGISTRY.histogram(
+    "kamasbot_operation_latency_seconds",
+    "Time spent in storage and REST helpers",
+    ("operation",)
+)
+OPERATION_ERRORS = REGISTRY.counter(
+    "kamasbot_operation_errors_total",
+    "Storage and REST helpers that raised",
+    ("operation",)
+)
+BACKGROUND_RUN_LATENCY = REGISTRY.histogram(
+    "kamasbot_background_run_seconds",
+    "Duration of one iteration of a background loop",
+    ("task",)
+)
+BACKGROUND_RUNS = REGISTRY.counter(
+    "kamasbot_background_runs_total",
+    "Background loop iterations by outcome",
+    ("task", "status")
+)
+REST_CALLS = REGISTRY.counter(
+    "kamasbot_rest_calls_total",
+    "Discord REST calls by route",
+    ("endpoint",)
+)
+REST_LATENCY = REGISTRY.histogram(
+    "kamasbot_rest_latency_seconds",
+    "Discord REST call latency by route, including rate-limit waits",
+    ("endpoint",)
+)
+HISTORY_PAGES = REGISTRY.counter(
+    "kamasbot_history_pages_total",
+    "Channel history pages fetched (100 messages per page)",
+    ("channel",)
+)
+HISTORY_MESSAGES = REGISTRY.counter(
+    "kamasbot_history_messages_total",
+    "Messages read from channel history",
+    ("channel",)
+)
+ATTACHMENT_BYTES = REGISTRY.counter(
+    "kamasbot_attachment_bytes_total",
+    "Bytes downloaded from message attachments"
+)
+QUEUE_DEPTH = REGISTRY.gauge(
+    "kamasbot_transaction_queue_depth",
+    "Listings waiting for a free transaction slot"
+)
+OPEN_ORDERS = REGISTRY.gauge(
+    "kamasbot_open_orders",
+    "Open BUY and SELL listings in the order book"
+)
+REPUTATION_VOTES = REGISTRY.counter(
+    "kamasbot_reputation_votes_total",
+    "Listing reaction votes by outcome (accepted, duplicate, withdrawn, ignored)",
+    ("outcome",)
+)
+ALERT_DMS = REGISTRY.counter(
+    "kamasbot_alert_dms_total",
+    "Price alert DMs by outcome",
+    ("status",)
+)
+SHARD_LATENCY = REGISTRY.gauge(
+    "kamasbot_shard_latency_seconds",
+    "Gateway heartbeat latency by shard",
+    ("shard",)
+)
+SHARD_CONNECTED = REGISTRY.gauge(
+    "kamasbot_shard_connected",
+    "1 while the shard's gateway connection is open",
+    ("shard",)
+)
+SHARD_GUILDS = REGISTRY.gauge(
+    "kamasbot_shard_guilds",
+    "Guilds served by each shard",
+    ("shard",)
+)
+SHARD_DISCONNECTS = REGISTRY.counter(
+    "kamasbot_shard_disconnects_total",
+    "Gateway disconnects by shard",
+    ("shard",)
+)
+SHARD_INTERACTIONS = REGISTRY.counter(
+    "kamasbot_shard_interactions_total",
+    "Interactions received by shard",
+    ("shard",)
+)
+GUILD_JOB_RUNS = REGISTRY.counter(
+    "kamasbot_guild_job_runs_total",
+    "Per-guild background job runs by owning shard and outcome",
+    ("task", "shard", "status")
+)
+
+
+def track(handler, auto_defer=False):
+    """Decorator recording latency and errors of an interaction handler.
+
+    Place it directly above the handler and below discord.py's own decorators.
+    With auto_defer, the handler's interaction is deferred for it when its
+    response is running late (see utils/interactions.py), and acknowledgements
+    after Discord's deadline are counted.
+    """
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            budgeted = None
+            index = find_interaction(args) if auto_defer else None
+            if index is not None:
+                budgeted = BudgetedInteraction(args[index])
+                args = args[:index] + (budgeted,) + args[index + 1:]
+            try:
+                with span(handler):
+                    return await func(*args, **kwargs)
+            except Exception:
+                INTERACTION_ERRORS.inc(handler=handler)
+                raise
+            finally:
+                INTERACTION_LATENCY.observe(time.perf_counter() - start, handler=handler)
+                if budgeted is not None:
+                    await budgeted.finish()
+                    _record_deadline(handler, budgeted.response)
+        return wrapper
+    return decorator
+
+
+def _record_deadline(handler, response):
+    if response.auto_deferred:
+        INTERACTION_AUTO_DEFERS.inc(handler=handler)
+    if response.missed_deadline:
+        INTERACTION_DEADLINE_MISSES.inc(handler=handler)
+        if response.acknowledged_after is None:
+            logger.warning(f"{handler} returned without acknowledging its interaction")
+        else:
+            logger.warning(f"{handler} acknowledged its interaction after {response.acknowledged_after:.2f}s")
+
+
+def timed(operation):
+    """Decorator recording latency and errors of an async helper."""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                with span(operation):
+                    return await func(*args, **kwargs)
+            except Exception:
+                OPERATION_ERRORS.inc(operation=operation)
+                raise
+            finally:
+                OPERATION_LATENCY.observe(time.perf_counter() - start, operation=operation)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def background_run(task):
+    """Time one iteration of a background loop and count its outcome."""
+    start = time.perf_counter()
+    try:
+        with span(task):
+            yield
+    except Exception:
+        BACKGROUND_RUNS.inc(task=task, status="error")
+        raise
+    else:
+        BACKGROUND_RUNS.inc(task=task, status="ok")
+    finally:
+        BACKGROUND_RUN_LATENCY.observe(time.perf_counter() - start, task=task)
+
+
+def instrument_http(http):
+    """Count and time every REST request made through a discord.py HTTPClient."""
+    if getattr(http, "_kamasbot_instrumented", False):
+        return
+    original_request = http.request
+
+    async def request(route, **kwargs):
+        endpoint = f"{route.method} {route.path}"
+        REST_CALLS.inc(endpoint=endpoint)
+        with REST_LATENCY.time(endpoint=endpoint), span("rest", endpoint=endpoint):
+            return await original_request(route, **kwargs)
+
+    http.request = request
+    http._kamasbot_instrumented = True
+
+
+def watch_shard(bot, shard_id):
+    """Report latency, connection state and guild count for one shard at scrape time.
+
+    Works for AutoShardedBot and, as shard 0, for a plain Bot. Safe to call again after a reconnect.
+    """
+    get_shard = getattr(bot, "get_shard", None)
+
+    def latency():
+        if get_shard is None:
+            return bot.latency
+        shard = get_shard(shard_id)
+        return shard.latency if shard else float("nan")
+
+    def connected():
+        if get_shard is None:
+            return 0 if bot.is_closed() or bot.ws is None else 1
+        shard = get_shard(shard_id)
+        return 0 if shard is None or shard.is_closed() else 1
+
+    SHARD_LATENCY.set_function(latency, shard=shard_id)
+    SHARD_CONNECTED.set_function(connected, shard=shard_id)
+    SHARD_GUILDS.set_function(lambda: sum(1 for g in bot.guilds if g.shard_id == shard_id), shard=shard_id)
+
+
+async def _handle_metrics(request):
+    return web.Response(text=REGISTRY.render(), content_type="text/plain", charset="utf-8")
+
+
+_runner = None
+
+
+async def start_metrics_server(host, port):
+    """Serve GET /metrics on host:port. Safe to call more than once."""
+    global _runner
+    if _runner is not None:
+        return
+    app = web.Application()
+    app.router.add_get("/metrics", _handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+    except Exception:
+        await runner.cleanup()
+        raise
+    _runner = runner
+    logger.info(f"Metrics endpoint listening on http://{host}:{port}/metrics")
+
+
+async def stop_metrics_server():
+    global _runner
+    if _runner is not None:
+        await _runner.cleanup()
+        _runner = None
@@ -0,0 +1,134 @@
+"""Open BUY and SELL listings indexed by guild, currency and price per million.
+
+Each (guild, currency, side) has a binary heap ordered best price first, then
+oldest first: lowest asks for SELL, highest bids for BUY. Adding a listing and
+finding its best counterparties are O(log n) heap operations. Closing a listing
+only drops it from the orders dict; its heap entry is skipped and discarded
+when it reaches the top (lazy deletion), and a heap is rebuilt once most of it
+is stale.
+"""
+import heapq
+import itertools
+import logging
+
+from config import ORDER_MATCH_SUGGESTIONS
+from utils.metrics import OPEN_ORDERS
+
+logger = logging.getLogger(__name__)
+
+SIDES = ("BUY", "SELL")
+# Rebuild a heap once it has this many stale entries and they outnumber live ones
+COMPACT_MIN_STALE = 64
+
+
+class Order:
+    """One open listing. order_id is the listing message id."""
+
+    __slots__ = ("order_id", "guild_id", "channel_id", "side", "user_id", "currency", "price_per_m", "amount", "seq")
+
+    def __init__(self, order_id, guild_id, channel_id, side, user_id, currency, price_per_m, amount):
+        if side not in SIDES:
+            raise ValueError(f"Unknown order side {side}")
+        self.order_id = int(order_id)
+        self.guild_id = int(guild_id)
+        self.channel_id = int(channel_id)
+        self.side = side
+        self.user_id = int(user_id)
+        self.currency = currency
+        self.price_per_m = float(price_per_m)
+        self.amount = int(amount)
+        self.seq = None  # Set by OrderBook.add(); tells current heap entries from stale ones
+
+    @property
+    def jump_url(self):
+        return f"https://discord.com/channels/{self.guild_id}/{self.channel_id}/{self.order_id}"
+
+    def __repr__(self):
+        return f"<Order {self.side} {self.amount} @ {self.price_per_m} {self.currency} id={self.order_id}>"
+
+
+class OrderBook:
+    """Price-ordered open listings with best-counterparty lookup."""
+
+    def __init__(self):
+        self.orders = {}  # order_id -> Order
+        self._heaps = {}  # (guild_id, currency, side) -> [(sort price, seq, order_id)]
+        self._stale = {}  # (guild_id, currency, side) -> removed orders still in the heap
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self.orders)
+
+    def __contains__(self, order_id):
+        return order_id in self.orders
+
+    @staticmethod
+    def _key(order):
+        return (order.guild_id, order.currency, order.side)
+
+    def add(self, order):
+        """Index an open listing. Re-adding an order id replaces it."""
+        if order.order_id in self.orders:
+            self.remove(order.order_id)
+        self.orders[order.order_id] = order
+        order.seq = next(self._seq)
+        # Negate bids so the highest price pops first from a min-heap
+        price = order.price_per_m if order.side == "SELL" else -order.price_per_m
+        heapq.heappush(self._heaps.setdefault(self._key(order), []), (price, order.seq, order.order_id))
+
+    def _live(self, entry):
+        """The open order a heap entry points at, or None if the entry is stale."""
+        order = self.orders.get(entry[2])
+        return order if order is not None and order.seq == entry[1] else None
+
+    def remove(self, order_id):
+        """Drop a listing (closed, archived or deleted); returns it, or None if it was not open."""
+        order = self.orders.pop(order_id, None)
+        if order is None:
+            return None
+        key = self._key(order)
+        self._stale[key] = self._stale.get(key, 0) + 1
+        heap = self._heaps[key]
+        if self._stale[key] >= COMPACT_MIN_STALE and self._stale[key] * 2 > len(heap):
+            self._heaps[key] = [entry for entry in heap if self._live(entry)]
+            heapq.heapify(self._heaps[key])
+            self._stale[key] = 0
+        return order
+
+    def best(self, guild_id, currency, side, limit=ORDER_MATCH_SUGGESTIONS, price_limit=None, exclude_user=None):
+        """Up to `limit` best-priced open orders on `side`.
+
+        price_limit keeps only asks at or below it (SELL) or bids at or above it
+        (BUY); exclude_user skips one user's own listings.
+        """
+        key = (guild_id, currency, side)
+        heap = self._heaps.get(key, [])
+        found, popped = [], []
+        while heap and len(found) < limit:
+            order = self._live(heap[0])
+            if order is None:
+                heapq.heappop(heap)  # Lazily discard a closed listing
+                self._stale[key] -= 1
+                continue
+            if price_limit is not None and (
+                order.price_per_m > price_limit if side == "SELL" else order.price_per_m < price_limit
+            ):
+                break  # Heap order: nothing after this is compatible either
+            popped.append(heapq.heappop(heap))
+            if order.user_id != exclude_user:
+                found.append(order)
+        for entry in popped:
+            heapq.heappush(heap, entry)
+        return found
+
+    def matches(self, order, limit=ORDER_MATCH_SUGGESTIONS):
+        """Best compatible counterparties for an order: bids at or above an ask, or asks at or below a bid."""
+        other_side = "BUY" if order.side == "SELL" else "SELL"
+        return self.best(
+            order.guild_id, order.currency, other_side,
+            limit=limit, price_limit=order.price_per_m, exclude_user=order.user_id
+        )
+
+
+order_book = OrderBook()
+OPEN_ORDERS.set_function(lambda: len(order_book))
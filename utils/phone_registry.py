@@ -0,0 +1,114 @@
+"""Phone-number hashes from verification applications, for duplicate detection.
+
+Every application registers the SHA-256 of its normalized phone number. A
+Bloom filter answers "never seen" for most new numbers from a few bit tests;
+only possible matches go to the exact index of (guild id, phone hash) -> user
+ids, which is also what is saved to PHONE_REGISTRY_FILE. The filter is rebuilt
+from the index at startup.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+
+from config import PHONE_REGISTRY_FILE, PHONE_BLOOM_CAPACITY, PHONE_BLOOM_ERROR_RATE
+from utils.storage import write_json
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_phone(number):
+    """Digits only, so '+1 (234) 567-890' and '1234567890' hash the same."""
+    return re.sub(r"\D", "", number)
+
+
+def hash_phone(number):
+    return hashlib.sha256(normalize_phone(number).encode()).hexdigest()
+
+
+class BloomFilter:
+    """Set membership with no false negatives, sized for `capacity` items at `error_rate`."""
+
+    def __init__(self, capacity, error_rate):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        # Double hashing over two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class PhoneRegistry:
+    """Users per phone hash in each guild, with a Bloom filter in front."""
+
+    def __init__(self, path=PHONE_REGISTRY_FILE, capacity=PHONE_BLOOM_CAPACITY, error_rate=PHONE_BLOOM_ERROR_RATE):
+        self.path = path
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.users = {}  # (guild id, phone hash) -> [user ids, in application order]
+        self._save_lock = asyncio.Lock()  # Concurrent applications share one temp file
+        self._load()
+
+    def __len__(self):
+        return len(self.users)
+
+    def linked_users(self, guild_id, phone_hash):
+        """User ids that applied with this phone hash in the guild."""
+        if phone_hash not in self.bloom:
+            return []
+        return list(self.users.get((guild_id, phone_hash), ()))
+
+    def register(self, guild_id, phone_hash, user_id):
+        """Link a user to a phone hash; returns False if they already were."""
+        users = self.users.setdefault((guild_id, phone_hash), [])
+        self.bloom.add(phone_hash)
+        if user_id in users:
+            return False
+        users.append(user_id)
+        return True
+
+    def unregister(self, guild_id, phone_hash, user_id):
+        """Undo a register(); the Bloom filter keeps the hash, which only costs an exact lookup."""
+        users = self.users.get((guild_id, phone_hash), [])
+        if user_id in users:
+            users.remove(user_id)
+        if not users:
+            self.users.pop((guild_id, phone_hash), None)
+
+    def _rows(self):
+        return [[guild_id, phone_hash, list(users)] for (guild_id, phone_hash), users in self.users.items()]
+
+    def save(self):
+        write_json(self.path, self._rows())
+
+    async def flush(self):
+        """Save in an executor; the rows are taken on the event loop first."""
+        rows = self._rows()
+        async with self._save_lock:
+            await asyncio.get_running_loop().run_in_executor(None, write_json, self.path, rows)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                for guild_id, phone_hash, users in json.load(f):
+                    self.users[(guild_id, phone_hash)] = users
+                    self.bloom.add(phone_hash)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not load the phone registry from {self.path}: {e}")
+
+
+phone_registry = PhoneRegistry()
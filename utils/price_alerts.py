@@ -0,0 +1,175 @@
+"""Price alert subscriptions and their batched DM notifications.
+
+A subscription watches one side of one currency in one guild: "SELL listings in
+EUR at or below 5 per million and at least 10M kamas", or "BUY listings at or
+above X". Each (guild, currency, side) keeps its subscriptions sorted by price
+limit, so a new listing finds every triggered subscription with one bisect and
+only walks the matching range.
+
+Matches are DMed through DMBatcher, which merges a user's alerts into one
+message per DM_BATCH_SECONDS and sends at most DM_CONCURRENCY DMs at a time.
+"""
+import asyncio
+import bisect
+import json
+import logging
+import os
+
+import discord
+
+from config import PRICE_ALERTS_FILE, DM_BATCH_SECONDS, DM_CONCURRENCY
+from utils.metrics import ALERT_DMS
+from utils.storage import write_json
+
+logger = logging.getLogger(__name__)
+
+# Discord message length limit
+MAX_DM_LENGTH = 2000
+
+
+class PriceAlert:
+    """One user's subscription to listings on `side` in `currency`."""
+
+    __slots__ = ("alert_id", "guild_id", "user_id", "side", "currency", "price_limit", "min_amount")
+
+    def __init__(self, alert_id, guild_id, user_id, side, currency, price_limit, min_amount=0):
+        self.alert_id = int(alert_id)
+        self.guild_id = int(guild_id)
+        self.user_id = int(user_id)
+        self.side = side
+        self.currency = currency
+        self.price_limit = float(price_limit)
+        self.min_amount = int(min_amount)
+
+    def describe(self):
+        comparison = "at or below" if self.side == "SELL" else "at or above"
+        return (f"#{self.alert_id}: {self.side} listings in {self.currency} {comparison} "
+                f"{self.price_limit:g} per M, at least {self.min_amount:,} kamas")
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class PriceAlertIndex:
+    """Subscriptions sorted by price limit per (guild, currency, side)."""
+
+    def __init__(self):
+        self.alerts = {}  # alert_id -> PriceAlert
+        self._limits = {}  # (guild_id, currency, side) -> sorted [(price_limit, alert_id)]
+        self._by_user = {}  # (guild_id, user_id) -> {alert_id}
+        self._next_id = 1
+
+    def __len__(self):
+        return len(self.alerts)
+
+    def subscribe(self, guild_id, user_id, side, currency, price_limit, min_amount=0):
+        alert = PriceAlert(self._next_id, guild_id, user_id, side, currency, price_limit, min_amount)
+        self.add(alert)
+        return alert
+
+    def add(self, alert):
+        self.alerts[alert.alert_id] = alert
+        self._next_id = max(self._next_id, alert.alert_id + 1)
+        bisect.insort(self._limits.setdefault(self._key(alert), []), (alert.price_limit, alert.alert_id))
+        self._by_user.setdefault((alert.guild_id, alert.user_id), set()).add(alert.alert_id)
+
+    def remove(self, alert_id):
+        """Delete a subscription; returns it, or None if it did not exist."""
+        alert = self.alerts.pop(alert_id, None)
+        if alert is None:
+            return None
+        entries = self._limits[self._key(alert)]
+        entry = (alert.price_limit, alert.alert_id)
+        del entries[bisect.bisect_left(entries, entry)]
+        user_alerts = self._by_user[(alert.guild_id, alert.user_id)]
+        user_alerts.discard(alert_id)
+        if not user_alerts:
+            del self._by_user[(alert.guild_id, alert.user_id)]
+        return alert
+
+    def for_user(self, guild_id, user_id):
+        """A user's subscriptions in a guild, oldest first."""
+        return [self.alerts[alert_id] for alert_id in sorted(self._by_user.get((guild_id, user_id), ()))]
+
+    @staticmethod
+    def _key(alert):
+        return (alert.guild_id, alert.currency, alert.side)
+
+    def matching(self, order):
+        """Subscriptions triggered by a new listing (an order_book.Order), except the poster's own."""
+        entries = self._limits.get((order.guild_id, order.currency, order.side), [])
+        if order.side == "SELL":
+            # Limits at or above the asking price
+            triggered = entries[bisect.bisect_left(entries, (order.price_per_m,)):]
+        else:
+            # Limits at or below the bid
+            triggered = entries[:bisect.bisect_right(entries, (order.price_per_m, float("inf")))]
+        alerts = (self.alerts[alert_id] for _, alert_id in triggered)
+        return [a for a in alerts if a.min_amount <= order.amount and a.user_id != order.user_id]
+
+    def save(self, path=PRICE_ALERTS_FILE):
+        """Write to path atomically, so a reader never sees a partial file."""
+        write_json(path, [alert.to_dict() for alert in self.alerts.values()])
+
+    @classmethod
+    def load(cls, path=PRICE_ALERTS_FILE):
+        """Read subscriptions from path; a missing or unreadable file gives none."""
+        index = cls()
+        if not os.path.exists(path):
+            return index
+        try:
+            with open(path) as f:
+                for data in json.load(f):
+                    index.add(PriceAlert(**data))
+        except (OSError, ValueError, TypeError) as e:
+            logger.error(f"Could not load price alerts from {path}: {e}")
+        return index
+
+
+class DMBatcher:
+    """Queues DM lines per user and sends each user one combined message per batch."""
+
+    def __init__(self, interval=DM_BATCH_SECONDS, concurrency=DM_CONCURRENCY):
+        self.interval = interval
+        self.concurrency = concurrency
+        self._pending = {}  # user_id -> [line]
+        self._client = None
+        self._flush_task = None
+
+    def queue(self, client, user_id, line):
+        """Schedule a line for user_id; the batch is sent within `interval` seconds."""
+        self._client = client
+        self._pending.setdefault(user_id, []).append(line)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        # Lines queued while a batch was being sent found this task still running, so they go next
+        while self._pending:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    async def flush(self):
+        """Send everything queued so far, at most `concurrency` DMs at a time."""
+        pending, self._pending = self._pending, {}
+        semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(*(self._send(semaphore, user_id, lines) for user_id, lines in pending.items()))
+
+    async def _send(self, semaphore, user_id, lines):
+        content = "\n".join(lines)
+        if len(content) > MAX_DM_LENGTH:
+            content = content[:MAX_DM_LENGTH - 1] + "…"
+        async with semaphore:
+            try:
+                user = self._client.get_user(user_id) or await self._client.fetch_user(user_id)
+                await user.send(content)
+                ALERT_DMS.inc(status="sent")
+            except discord.Forbidden:
+                ALERT_DMS.inc(status="dms_closed")  # The user does not accept DMs from the bot
+            except Exception as e:
+                ALERT_DMS.inc(status="error")
+                logger.error(f"Price alert DM to {user_id} failed: {e}")
+
+
+price_alerts = PriceAlertIndex.load()
+dm_batcher = DMBatcher()
@@ -0,0 +1,284 @@
+"""Versioned record format for the entities the bot stores as Discord attachments.
+
+A record file is a header line naming the kind and schema version, then one
+JSON array per record with the fields in schema order:
+
+    KBR escrow 1
+    [1217700740949348443, 1217700740949348444, 1217700740949348445, 10000000, 100000, "2026-10-19T12:00:00", "pending", null]
+
+Arrays keep files small, and a whole file decodes with one json.loads call
+(the C parser) instead of splitting strings line by line. Every field has a
+type in SCHEMAS: encode() rejects records that do not match and decode()
+checks each row's length and types.
+
+Schemas only grow by appending optional fields, each tagged with the version
+that added it; rows written by an older version are padded with None. Files
+without a header were written before this format and go to the legacy reader
+for their kind (Key: value text, CSV lines, JSON objects, free text).
+"""
+import json
+import re
+
+HEADER = "KBR"
+NoneType = type(None)
+OPTIONAL_INT = (int, NoneType)
+OPTIONAL_STR = (str, NoneType)
+
+
+class RecordError(ValueError):
+    """Data that does not match its kind's schema."""
+
+
+# kind -> [(field, allowed types, schema version that added it)]
+SCHEMAS = {
+    "verification": [
+        ("user_id", (int,), 1),
+        ("username", (str,), 1),
+        ("social_platform", (str,), 1),
+        ("social_handle", (str,), 1),
+        ("trading_experience", (str,), 1),
+        ("additional_info", OPTIONAL_STR, 1),
+        ("application_date", OPTIONAL_STR, 1),
+        ("verified_date", OPTIONAL_STR, 1),
+        ("verified_by", OPTIONAL_INT, 1),
+    ],
+    "reputation": [  # One ledger change: vote is positive/negative, or -positive/-negative to withdraw
+        ("timestamp", (str,), 1),
+        ("vote", (str,), 1),
+        ("voter_id", OPTIONAL_INT, 1),
+        ("listing_id", OPTIONAL_INT, 1),
+    ],
+    "escrow": [
+        ("buyer_id", (int,), 1),
+        ("seller_id", (int,), 1),
+        ("middleman_id", (int,), 1),
+        ("amount", (int,), 1),
+        ("fee", (int,), 1),
+        ("created_at", (str,), 1),
+        ("status", (str,), 1),
+        ("dispute", (dict, NoneType), 1),  # {"filed_by", "reason", "timestamp"}
+    ],
+    "archive": [
+        ("message_id", OPTIONAL_INT, 1),
+        ("created_at", (str,), 1),
+        ("jump_url", (str,), 1),
+        ("title", OPTIONAL_STR, 1),
+        ("description", OPTIONAL_STR, 1),
+        ("fields", (dict,), 1),  # Embed field name -> value
+        ("attachments", (dict,), 1),  # Filename -> URL
+    ],
+    "language": [
+        ("user_id", OPTIONAL_INT, 1),
+        ("language", (str,), 1),
+    ],
+}
+
+
+class _Schema:
+    def __init__(self, kind, fields):
+        self.kind = kind
+        self.names = tuple(name for name, _, _ in fields)
+        self.types = tuple(types for _, types, _ in fields)
+        self.version = max(since for _, _, since in fields)
+        # Fields present in rows written by each version
+        self.width = {v: sum(1 for _, _, since in fields if since <= v) for v in range(1, self.version + 1)}
+
+
+_SCHEMAS = {kind: _Schema(kind, fields) for kind, fields in SCHEMAS.items()}
+
+
+def _schema(kind):
+    try:
+        return _SCHEMAS[kind]
+    except KeyError:
+        raise RecordError(f"Unknown record kind {kind}") from None
+
+
+def _check(schema, row):
+    if len(row) != len(schema.names) or not all(map(isinstance, row, schema.types)):
+        for name, types, value in zip(schema.names, schema.types, row):
+            if not isinstance(value, types):
+                raise RecordError(f"{schema.kind}.{name} cannot be {value!r}")
+        raise RecordError(f"{schema.kind} record has {len(row)} fields, expected {len(schema.names)}")
+
+
+def encode(kind, records):
+    """Serialize dicts of `kind` as a record file; missing optional fields are stored as None."""
+    schema = _schema(kind)
+    lines = [f"{HEADER} {kind} {schema.version}"]
+    for record in records:
+        unknown = record.keys() - set(schema.names)
+        if unknown:
+            raise RecordError(f"Unknown {kind} fields: {', '.join(sorted(unknown))}")
+        row = [record.get(name) for name in schema.names]
+        _check(schema, row)
+        lines.append(json.dumps(row, separators=(",", ":"), ensure_ascii=False))
+    return "\n".join(lines).encode()
+
+
+def fields(kind):
+    """Field names of `kind` in row order, e.g. fields("reputation").index("vote")."""
+    return _schema(kind).names
+
+
+def decode_rows(kind, data, filename=None):
+    """Read a record file, or a legacy file of `kind`, as lists in field order.
+
+    The fast path for scans: no dict per record. `filename` is only used by
+    legacy readers that keep an id in the name.
+    """
+    schema = _schema(kind)
+    text = data.decode() if isinstance(data, bytes) else data
+    if not text.startswith(HEADER + " "):
+        rows = LEGACY_READERS[kind](text, filename)
+        for row in rows:
+            _check(schema, row)
+        return rows
+
+    header, _, body = text.partition("\n")
+    try:
+        _, file_kind, version = header.split()
+        version = int(version)
+    except ValueError:
+        raise RecordError(f"Bad record header {header!r}") from None
+    if file_kind != kind:
+        raise RecordError(f"Expected {kind} records, got {file_kind}")
+    if version not in schema.width:
+        raise RecordError(f"{kind} records version {version} is newer than this reader")
+
+    try:
+        # json.dumps escapes newlines inside strings, so every line is exactly one row
+        rows = json.loads("[" + ",".join(filter(None, body.split("\n"))) + "]")
+    except ValueError as e:
+        raise RecordError(f"Corrupt {kind} records: {e}") from None
+    missing = len(schema.names) - schema.width[version]
+    width, types = len(schema.names), schema.types
+    for row in rows:
+        if missing:
+            row.extend([None] * missing)
+        if len(row) != width or not all(map(isinstance, row, types)):
+            _check(schema, row)  # Raises with the offending field
+    return rows
+
+
+def decode(kind, data, filename=None):
+    """Read a record file, or a legacy file of `kind`, as a list of dicts."""
+    names = _schema(kind).names
+    return [dict(zip(names, row)) for row in decode_rows(kind, data, filename)]
+
+
+# Legacy readers: text written before the record format -> rows in schema order
+
+VERIFICATION_LABELS = {
+    "User ID": "user_id",
+    "Username": "username",
+    "Social Platform": "social_platform",
+    "Social Handle": "social_handle",
+    "Trading Experience": "trading_experience",
+    "Additional Info": "additional_info",
+    "Application Date": "application_date",
+    "Verified Date": "verified_date",
+    "Verified By": "verified_by",
+}
+
+
+def _optional_int(value):
+    value = (value or "").strip()
+    return int(value) if value.isdigit() else None
+
+
+def _read_legacy_verification(text, filename):
+    """'Key: value' lines as written by store_verification_data."""
+    values = {}
+    for line in text.splitlines():
+        if ':' in line:
+            key, value = line.split(':', 1)
+            if key.strip() in VERIFICATION_LABELS:
+                values[VERIFICATION_LABELS[key.strip()]] = value.strip()
+    if not values.get("user_id", "").isdigit():
+        raise RecordError("Legacy verification file has no User ID")
+    for name in ("additional_info", "application_date", "verified_date"):
+        if values.get(name) in ("None", "Not verified", ""):
+            values[name] = None
+    values["user_id"] = int(values["user_id"])
+    values["verified_by"] = _optional_int(values.get("verified_by"))
+    return [[values.get(name, "Unknown" if types == (str,) else None)
+             for name, types in zip(_SCHEMAS["verification"].names, _SCHEMAS["verification"].types)]]
+
+
+def _read_legacy_reputation(text, filename):
+    """'timestamp,vote[,voter,listing]' lines."""
+    rows = []
+    for line in text.strip().splitlines():
+        parts = line.strip().split(',')
+        if len(parts) < 2:
+            continue
+        rows.append([
+            parts[0], parts[1],
+            _optional_int(parts[2]) if len(parts) > 2 else None,
+            _optional_int(parts[3]) if len(parts) > 3 else None,
+        ])
+    return rows
+
+
+def _read_legacy_escrow(text, filename):
+    """A JSON object; the middleman was stored as 'middleman' or 'middleman_id'."""
+    try:
+        escrow = json.loads(text)
+    except ValueError as e:
+        raise RecordError(f"Corrupt legacy escrow: {e}") from None
+    return [[
+        escrow.get("buyer_id", escrow.get("buyer")),
+        escrow.get("seller_id", escrow.get("seller")),
+        escrow.get("middleman_id", escrow.get("middleman")),
+        escrow.get("amount"), escrow.get("fee"),
+        escrow.get("created_at"), escrow.get("status"),
+        escrow.get("dispute"),
+    ]]
+
+
+def _read_legacy_archive(text, filename):
+    """The free-text file archive_transaction wrote: header lines, embed fields, attachment list."""
+    created_at = jump_url = title = description = None
+    fields, attachments = {}, {}
+    in_attachments = False
+    for line in text.splitlines():
+        if line.startswith("Transaction from ") and created_at is None:
+            created_at = line[len("Transaction from "):]
+        elif line.startswith("Original URL: ") and jump_url is None:
+            jump_url = line[len("Original URL: "):]
+        elif line == "Attachments:":
+            in_attachments = True
+        elif in_attachments and line.startswith("- ") and ": " in line:
+            name, url = line[2:].split(": ", 1)
+            attachments[name] = url
+        elif line.startswith("Title: ") and title is None:
+            title = line[len("Title: "):]
+        elif line.startswith("Description: ") and description is None:
+            description = line[len("Description: "):]
+        elif ": " in line and not in_attachments:
+            name, value = line.split(": ", 1)
+            fields[name] = value
+    if created_at is None or jump_url is None:
+        raise RecordError("Legacy archive is missing its header")
+    message_id = re.search(r"/(\d+)$", jump_url)
+    return [[
+        int(message_id.group(1)) if message_id else None, created_at, jump_url,
+        None if title == "None" else title, None if description == "None" else description,
+        fields, attachments,
+    ]]
+
+
+def _read_legacy_language(text, filename):
+    """The bare language code; the user id is only in the lang_<user>.txt file name."""
+    user_id = re.match(r"lang_(\d+)", filename or "")
+    return [[int(user_id.group(1)) if user_id else None, text.strip()]]
+
+
+LEGACY_READERS = {
+    "verification": _read_legacy_verification,
+    "reputation": _read_legacy_reputation,
+    "escrow": _read_legacy_escrow,
+    "archive": _read_legacy_archive,
+    "language": _read_legacy_language,
+}
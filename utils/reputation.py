@@ -0,0 +1,358 @@
+"""Reaction-vote intake for seller reputation.
+
+👍/👎 reactions on listings arrive as raw gateway events, so votes on listings
+outside discord.py's message cache still count. The seller comes from an index
+of listing message id -> seller filled when listings are posted or restored,
+not from the embed. Each user has at most one vote per listing: repeating a
+reaction is a dictionary lookup, and switching or removing it only changes the
+pending state.
+
+Every REPUTATION_FLUSH_SECONDS the changes since the last flush are written to
+the reputation channel as one message per guild, with one reputation_<seller>.txt
+attachment per seller holding a "reputation" record (utils.records) per change:
+
+    KBR reputation 1
+    ["2026-10-19T12:00:00","positive",<voter id>,<listing id>]
+    ["2026-10-19T12:00:05","-positive",<voter id>,<listing id>]   (vote withdrawn)
+
+Votes already in the ledger are kept in REPUTATION_VOTES_FILE so a restart does
+not let anyone vote twice.
+
+ReputationScores keeps each seller's vote counts plus exponentially decayed
+vote sums (half-life REPUTATION_HALF_LIFE_DAYS). A vote at time t adds
+exp(rate * (t - SCORE_EPOCH)) to a running sum, and the decayed value at `now`
+is that sum times exp(-rate * (now - SCORE_EPOCH)). Every vote is O(1) and
+history is never re-read. It also keeps each seller's archived trade volume and
+pushes every change into the seller leaderboard (utils.leaderboard).
+"""
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from array import array
+from datetime import datetime
+from io import BytesIO
+
+import discord
+
+from config import REPUTATION_FLUSH_SECONDS, REPUTATION_VOTES_FILE, REPUTATION_SCORES_FILE, REPUTATION_HALF_LIFE_DAYS
+from utils.guild_config import guild_configs
+from utils.leaderboard import seller_leaderboard
+from utils.metrics import REPUTATION_VOTES
+from utils import records
+from utils.storage import write_json
+from utils.utils import resolve_channel
+
+logger = logging.getLogger(__name__)
+
+VOTE_EMOJIS = {'👍': "positive", '👎': "negative"}
+# Discord allows at most 10 attachments per message
+MAX_FILES_PER_MESSAGE = 10
+# Reference time for decayed sums (2025-01-01 UTC); keeps the exponents small for centuries
+SCORE_EPOCH = 1735689600
+
+
+class SellerTotals:
+    """One seller's vote counts, decayed vote sums and traded volume."""
+
+    __slots__ = ("positive", "negative", "positive_sum", "negative_sum", "volume")
+
+    def __init__(self, positive=0, negative=0, positive_sum=0.0, negative_sum=0.0, volume=0):
+        self.positive = positive
+        self.negative = negative
+        self.positive_sum = positive_sum
+        self.negative_sum = negative_sum
+        self.volume = volume
+
+    def to_row(self):
+        return [self.positive, self.negative, self.positive_sum, self.negative_sum, self.volume]
+
+
+class ReputationScores:
+    """Per-seller vote counts, exponentially decayed vote sums and traded volume."""
+
+    def __init__(self, path=REPUTATION_SCORES_FILE, half_life_days=REPUTATION_HALF_LIFE_DAYS, leaderboard=seller_leaderboard):
+        self.path = path
+        self.rate = math.log(2) / (half_life_days * 86400)
+        self.leaderboard = leaderboard
+        self.sellers = {}  # (guild id, seller id) -> SellerTotals
+        self._save_lock = asyncio.Lock()  # Vote flushes and archive runs both save the scores
+        self._load()
+
+    def apply(self, guild_id, seller_id, vote, when, sign=1):
+        """Add (sign=1) or withdraw (sign=-1) a vote cast at UNIX time `when`."""
+        totals = self._totals(guild_id, seller_id)
+        weight = sign * math.exp(self.rate * (when - SCORE_EPOCH))
+        if vote == "positive":
+            totals.positive += sign
+            totals.positive_sum += weight
+        else:
+            totals.negative += sign
+            totals.negative_sum += weight
+        self._rank(guild_id, seller_id, totals)
+
+    def add_volume(self, guild_id, seller_id, amount):
+        """Count kamas from an archived listing towards the seller's traded volume."""
+        totals = self._totals(guild_id, seller_id)
+        totals.volume += amount
+        self.leaderboard.update(guild_id, seller_id, volume=totals.volume)
+
+    def _totals(self, guild_id, seller_id):
+        totals = self.sellers.get((guild_id, seller_id))
+        if totals is None:
+            totals = self.sellers[(guild_id, seller_id)] = SellerTotals()
+        return totals
+
+    def _rank(self, guild_id, seller_id, totals):
+        # Every seller's sums decay by the same factor, so the undecayed difference ranks them
+        self.leaderboard.update(
+            guild_id, seller_id,
+            score=totals.positive - totals.negative, positive=totals.positive,
+            decayed=totals.positive_sum - totals.negative_sum
+        )
+
+    def decay(self, now=None):
+        """Factor turning decayed sums into values as of `now` (default: current time)."""
+        return math.exp(-self.rate * ((now or time.time()) - SCORE_EPOCH))
+
+    def get(self, guild_id, seller_id, now=None):
+        """Counts and decayed values as of `now` (default: current time)."""
+        totals = self.sellers.get((guild_id, seller_id)) or SellerTotals()
+        decay = self.decay(now)
+        return {
+            'positive': totals.positive,
+            'negative': totals.negative,
+            'decayed_positive': totals.positive_sum * decay,
+            'decayed_negative': totals.negative_sum * decay,
+            'decayed_score': (totals.positive_sum - totals.negative_sum) * decay,
+            'volume': totals.volume,
+        }
+
+    def _rows(self):
+        return [[guild_id, seller_id, *totals.to_row()] for (guild_id, seller_id), totals in self.sellers.items()]
+
+    async def flush(self):
+        """Save in an executor; the rows are taken on the event loop first, so the write sees one state."""
+        rows = self._rows()
+        async with self._save_lock:
+            await asyncio.get_running_loop().run_in_executor(None, write_json, self.path, rows)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                # Files written before volume was tracked have four totals per seller
+                self.sellers = {(row[0], row[1]): SellerTotals(*row[2:7]) for row in json.load(f)}
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not load reputation scores from {self.path}: {e}")
+            return
+        for (guild_id, seller_id), totals in self.sellers.items():
+            self._rank(guild_id, seller_id, totals)
+            if totals.volume:
+                self.leaderboard.update(guild_id, seller_id, volume=totals.volume)
+
+
+class RecordedVotes:
+    """Votes already written to the ledger, as (listing id, voter id) -> (vote, UNIX time).
+
+    Each listing keeps its voter ids and write times in two arrays, the time
+    negated for negative votes: 16 bytes per vote instead of a dict entry, a
+    key tuple and a value tuple. A listing has few voters, so finding one is
+    a short scan in C.
+    """
+
+    def __init__(self):
+        self._listings = {}  # listing id -> (array of voter ids, array of signed write times)
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def get(self, key):
+        listing_id, voter_id = key
+        columns = self._listings.get(listing_id)
+        if columns is None or voter_id not in columns[0]:
+            return None
+        when = columns[1][columns[0].index(voter_id)]
+        return ("positive", when) if when > 0 else ("negative", -when)
+
+    def set(self, key, vote, when):
+        listing_id, voter_id = key
+        voters, times = self._listings.setdefault(listing_id, (array('q'), array('d')))
+        signed = when if vote == "positive" else -when
+        if voter_id in voters:
+            times[voters.index(voter_id)] = signed
+        else:
+            voters.append(voter_id)
+            times.append(signed)
+            self._count += 1
+
+    def discard(self, key):
+        listing_id, voter_id = key
+        columns = self._listings.get(listing_id)
+        if columns is None or voter_id not in columns[0]:
+            return
+        position = columns[0].index(voter_id)
+        del columns[0][position]
+        del columns[1][position]
+        self._count -= 1
+        if not columns[0]:
+            del self._listings[listing_id]
+
+    def items(self):
+        for listing_id, (voters, times) in self._listings.items():
+            for voter_id, when in zip(voters, times):
+                yield (listing_id, voter_id), ("positive", when) if when > 0 else ("negative", -when)
+
+
+class ReputationVotes:
+    """Deduplicates listing votes and writes them to the ledger in batches."""
+
+    def __init__(self, scores, path=REPUTATION_VOTES_FILE):
+        self.scores = scores
+        self.path = path
+        self.listing_sellers = {}  # listing message id -> (guild id, seller id)
+        self.recorded = RecordedVotes()  # Votes as written to the ledger
+        self.pending = {}  # (listing id, voter id) -> vote to write, None to withdraw
+        self._in_flight = {}  # Drained changes being written: (listing id, voter id) -> vote
+        self._flush_lock = asyncio.Lock()  # The unload flush must not drain while the periodic one is writing
+        self._load()
+
+    def add_listing(self, guild_id, listing_id, seller_id):
+        self.listing_sellers[listing_id] = (guild_id, seller_id)
+
+    def current(self, key):
+        if key in self.pending:
+            return self.pending[key]
+        if key in self._in_flight:
+            return self._in_flight[key]
+        old = self.recorded.get(key)
+        return old[0] if old else None
+
+    def vote(self, listing_id, voter_id, vote):
+        """Record a reaction vote; returns False if it changes nothing."""
+        listing = self.listing_sellers.get(listing_id)
+        if listing is None or listing[1] == voter_id:
+            REPUTATION_VOTES.inc(outcome="ignored")  # Not a listing, or a seller voting for themselves
+            return False
+        key = (listing_id, voter_id)
+        if self.current(key) == vote:
+            REPUTATION_VOTES.inc(outcome="duplicate")
+            return False
+        self.pending[key] = vote
+        REPUTATION_VOTES.inc(outcome="accepted")
+        return True
+
+    def withdraw(self, listing_id, voter_id, vote):
+        """Handle a removed reaction; only withdraws the vote if it is the user's current one."""
+        if listing_id not in self.listing_sellers:
+            return False
+        key = (listing_id, voter_id)
+        if self.current(key) != vote:
+            return False
+        self.pending[key] = None
+        REPUTATION_VOTES.inc(outcome="withdrawn")
+        return True
+
+    def _drain(self):
+        """Take the pending changes as {guild_id: {seller_id: [ledger records]}} plus the vote changes."""
+        now = datetime.now().isoformat()
+        ledger, changes = {}, []
+        pending, self.pending = self.pending, {}
+        for (listing_id, voter_id), vote in pending.items():
+            old = self.recorded.get((listing_id, voter_id))
+            if (old[0] if old else None) == vote:
+                continue  # Switched back before the flush
+            listing = self.listing_sellers.get(listing_id)
+            if listing is None:
+                continue  # Not an indexed listing; nothing to write
+            guild_id, seller_id = listing
+            changed = ledger.setdefault(guild_id, {}).setdefault(seller_id, [])
+            if old:
+                changed.append({'timestamp': now, 'vote': f"-{old[0]}", 'voter_id': voter_id, 'listing_id': listing_id})
+            if vote:
+                changed.append({'timestamp': now, 'vote': vote, 'voter_id': voter_id, 'listing_id': listing_id})
+            changes.append((guild_id, seller_id, (listing_id, voter_id), old, vote))
+            self._in_flight[(listing_id, voter_id)] = vote
+        return ledger, changes
+
+    async def flush(self, client):
+        """Write pending vote changes to each guild's reputation channel."""
+        async with self._flush_lock:
+            ledger, changes = self._drain()
+            if not ledger:
+                return
+            try:
+                await self._flush(client, ledger, changes)
+            finally:
+                self._in_flight.clear()
+
+    async def _flush(self, client, ledger, changes):
+        failed = set()
+        for guild_id, sellers in ledger.items():
+            try:
+                await self._write(client, guild_id, sellers)
+            except Exception as e:
+                failed.add(guild_id)
+                logger.error(f"Reputation ledger write for guild {guild_id} failed: {e}")
+
+        now = time.time()
+        for guild_id, seller_id, key, old, vote in changes:
+            if guild_id in failed:
+                self.pending.setdefault(key, vote)  # Retry with the next flush
+                continue
+            if old:
+                # Withdraw the old vote with the weight it was added with
+                self.scores.apply(guild_id, seller_id, old[0], old[1], sign=-1)
+                self.recorded.discard(key)
+            if vote:
+                self.scores.apply(guild_id, seller_id, vote, now)
+                self.recorded.set(key, vote, now)
+        # Both files are rewritten whole, so the writes run in an executor instead of on the event loop
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            loop.run_in_executor(None, write_json, self.path, self._rows()),
+            self.scores.flush(),
+        )
+
+    async def _write(self, client, guild_id, sellers):
+        channel = await resolve_channel(client, guild_configs[guild_id].reputation_channel_id)
+        sellers = list(sellers.items())
+        for start in range(0, len(sellers), MAX_FILES_PER_MESSAGE):
+            batch = sellers[start:start + MAX_FILES_PER_MESSAGE]
+            await channel.send(
+                "Reputation update for " + " ".join(f"<@{seller_id}>" for seller_id, _ in batch),
+                files=[
+                    discord.File(BytesIO(records.encode("reputation", changes)), filename=f"reputation_{seller_id}.txt")
+                    for seller_id, changes in batch
+                ]
+            )
+
+    async def run(self, client, interval=REPUTATION_FLUSH_SECONDS):
+        """Flush every `interval` seconds until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush(client)
+            except Exception as e:
+                logger.error(f"Reputation flush failed: {e}")
+
+    def _rows(self):
+        return [[listing_id, voter_id, vote, when] for (listing_id, voter_id), (vote, when) in self.recorded.items()]
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                for listing_id, voter_id, vote, when in json.load(f):
+                    self.recorded.set((listing_id, voter_id), vote, when)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not load reputation votes from {self.path}: {e}")
+
+
+reputation_scores = ReputationScores()
+reputation_votes = ReputationVotes(reputation_scores)
@@ -0,0 +1,56 @@
+"""In-memory state for multi-step interaction flows.
+
+A flow such as posting a listing spans several interactions: the modal submit
+stores the form, and the currency select that follows reads it back. Each
+flow gets its own session, keyed by the interaction that started it, so two
+forms from one user never overwrite each other. Sessions expire after a TTL,
+which matches the timeout of the view that continues the flow, and the oldest
+are dropped when the store is full, so abandoned flows cannot pile up.
+"""
+import time
+from collections import OrderedDict
+
+from config import LISTING_SESSION_TTL, MAX_LISTING_SESSIONS
+
+
+class SessionStore:
+    """Session data by key, evicted after `ttl` seconds or oldest-first beyond `max_sessions`."""
+
+    def __init__(self, ttl, max_sessions):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()  # key -> (expires at, data), soonest to expire first
+
+    def __len__(self):
+        self._expire()
+        return len(self._sessions)
+
+    def _expire(self):
+        now = time.monotonic()
+        while self._sessions:
+            key, (expires_at, _) = next(iter(self._sessions.items()))
+            if expires_at > now:
+                break
+            del self._sessions[key]
+
+    def put(self, key, data):
+        self._expire()
+        self._sessions.pop(key, None)
+        self._sessions[key] = (time.monotonic() + self.ttl, data)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def get(self, key):
+        """The session's data, or None if it expired or never existed."""
+        self._expire()
+        entry = self._sessions.get(key)
+        return entry[1] if entry else None
+
+    def pop(self, key):
+        """Remove and return the session's data, so a flow can only be completed once."""
+        self._expire()
+        entry = self._sessions.pop(key, None)
+        return entry[1] if entry else None
+
+
+listing_sessions = SessionStore(LISTING_SESSION_TTL, MAX_LISTING_SESSIONS)
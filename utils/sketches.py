@@ -0,0 +1,204 @@
+"""Streaming price-per-million quantiles per currency and week.
+
+Each (currency, ISO week) window keeps a KLL sketch: a stack of compactors
+where level h holds items standing for 2**h observations. When a level fills
+up it is sorted and every other item is promoted, so memory stays around
+3 * k floats however many listings are added, and rank error stays within a
+few percent for k=200. Sketches of different weeks merge into one for queries
+over several weeks, and serialize to JSON for PRICE_SKETCH_FILE.
+"""
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+from datetime import datetime, timezone
+
+from config import PRICE_SKETCH_FILE, PRICE_SKETCH_K, PRICE_SKETCH_WEEKS, PRICE_SKETCH_FLUSH_SECONDS
+from utils.storage import write_text
+
+logger = logging.getLogger(__name__)
+
+
+def iso_week(when=None):
+    """Report window for a datetime, e.g. "2026-W42"."""
+    year, week, _ = (when or datetime.now(timezone.utc)).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+class KLLSketch:
+    """Mergeable quantile sketch (Karnin, Lang and Liberty)."""
+
+    def __init__(self, k=PRICE_SKETCH_K):
+        self.k = k
+        self.n = 0
+        self.compactors = [[]]
+
+    def _capacity(self, level):
+        depth = len(self.compactors) - level - 1
+        return max(int(math.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def _max_size(self):
+        return sum(self._capacity(level) for level in range(len(self.compactors)))
+
+    def update(self, value):
+        self.compactors[0].append(float(value))
+        self.n += 1
+        if len(self.compactors[0]) >= self._capacity(0):
+            self._compress()
+
+    def merge(self, other):
+        """Fold another sketch into this one."""
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+        for level, items in enumerate(other.compactors):
+            self.compactors[level].extend(items)
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _compress(self):
+        while sum(len(items) for items in self.compactors) >= self._max_size():
+            for level, items in enumerate(self.compactors):
+                if len(items) >= self._capacity(level):
+                    if level + 1 == len(self.compactors):
+                        self.compactors.append([])
+                    items.sort()
+                    # Odd item out stays behind; a random half of the pairs moves up with double weight
+                    kept = [items.pop()] if len(items) % 2 else []
+                    self.compactors[level + 1].extend(items[random.getrandbits(1)::2])
+                    self.compactors[level] = kept
+                    break
+
+    def quantiles(self, qs):
+        """Estimated values at each rank in qs (0..1); None for an empty sketch."""
+        weighted = sorted(
+            (value, 1 << level) for level, items in enumerate(self.compactors) for value in items
+        )
+        if not weighted:
+            return [None for _ in qs]
+        total = sum(weight for _, weight in weighted)
+        results = []
+        for q in qs:
+            target, seen = q * total, 0
+            for value, weight in weighted:
+                seen += weight
+                if seen >= target:
+                    break
+            results.append(value)
+        return results
+
+    def quantile(self, q):
+        return self.quantiles([q])[0]
+
+    def __len__(self):
+        return self.n
+
+    def to_dict(self):
+        return {"k": self.k, "n": self.n, "compactors": self.compactors}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["k"])
+        sketch.n = data["n"]
+        sketch.compactors = [list(items) for items in data["compactors"]] or [[]]
+        return sketch
+
+
+class PriceSketches:
+    """KLL sketches of listed price per million, keyed by currency and ISO week."""
+
+    def __init__(self, keep_weeks=PRICE_SKETCH_WEEKS):
+        self.keep_weeks = keep_weeks
+        self.windows = {}  # (currency, "2026-W42") -> KLLSketch
+        self.dirty = False  # Added to since the last save
+
+    def add(self, currency, price_per_m, when=None):
+        key = (currency, iso_week(when))
+        if key not in self.windows:
+            self.windows[key] = KLLSketch()
+            self._prune()
+        sketch = self.windows.get(key)
+        if sketch is not None:  # None if the week is older than every kept week
+            sketch.update(price_per_m)
+            self.dirty = True
+
+    def _prune(self):
+        """Drop the oldest weeks beyond keep_weeks."""
+        weeks = sorted({week for _, week in self.windows}, reverse=True)
+        for key in [key for key in self.windows if key[1] not in weeks[:self.keep_weeks]]:
+            del self.windows[key]
+
+    def sketch(self, currency, weeks=None):
+        """One sketch covering the given weeks (default: all kept weeks), or None."""
+        merged = None
+        for (sketch_currency, week), sketch in self.windows.items():
+            if sketch_currency == currency and (weeks is None or week in weeks):
+                merged = (merged or KLLSketch(sketch.k)).merge(sketch)
+        return merged
+
+    def quantiles(self, currency, qs=(0.5, 0.95), weeks=None):
+        """[median, p95] (or the ranks in qs) for a currency, or None without data."""
+        sketch = self.sketch(currency, weeks)
+        return sketch.quantiles(qs) if sketch else None
+
+    def currencies(self):
+        return sorted({currency for currency, _ in self.windows})
+
+    def to_dict(self):
+        return {
+            "windows": [
+                {"currency": currency, "week": week, "sketch": sketch.to_dict()}
+                for (currency, week), sketch in self.windows.items()
+            ]
+        }
+
+    @classmethod
+    def from_dict(cls, data, keep_weeks=PRICE_SKETCH_WEEKS):
+        sketches = cls(keep_weeks)
+        for window in data.get("windows", []):
+            sketches.windows[(window["currency"], window["week"])] = KLLSketch.from_dict(window["sketch"])
+        return sketches
+
+    def save(self, path=PRICE_SKETCH_FILE):
+        """Write to path atomically, so a reader never sees a partial file."""
+        write_text(path, json.dumps(self.to_dict()))
+        self.dirty = False
+
+    async def flush(self, path=PRICE_SKETCH_FILE):
+        """Save in an executor if anything was added since the last save."""
+        if not self.dirty:
+            return
+        # Serialized on the event loop, since the compactors keep changing while the file is written
+        text = json.dumps(self.to_dict())
+        self.dirty = False
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, write_text, path, text)
+        except Exception:
+            self.dirty = True  # Retry with the next flush
+            raise
+
+    async def run(self, interval=PRICE_SKETCH_FLUSH_SECONDS):
+        """Flush every `interval` seconds until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Price sketch save failed: {e}")
+
+    @classmethod
+    def load(cls, path=PRICE_SKETCH_FILE):
+        """Read sketches from path; missing or unreadable files give empty sketches."""
+        if not os.path.exists(path):
+            return cls()
+        try:
+            with open(path) as f:
+                return cls.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Could not load price sketches from {path}: {e}")
+            return cls()
+
+
+price_sketches = PriceSketches.load()
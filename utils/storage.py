@@ -0,0 +1,22 @@
+"""Atomic writes for the bot's local state files.
+
+Each file is written to "<path>.tmp" and then moved over the old one with
+os.replace, so a crash or a concurrent reader never sees a partial file.
+Callers that save from an executor build the data on the event loop first.
+"""
+import json
+import os
+
+
+def write_json(path, data):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(temp_path, path)
+
+
+def write_text(path, text):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        f.write(text)
+    os.replace(temp_path, path)
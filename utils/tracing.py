@@ -0,0 +1,234 @@
+"""Lightweight per-interaction tracing.
+
+A span opened while no other span is active starts a new trace; spans opened
+inside it (in the same task or tasks it spawns) become its children. Finished
+traces are kept in memory and slow ones are appended to TRACE_FILE, so they can
+be exported as JSON lines or Chrome trace-event files and read offline.
+"""
+import asyncio
+import contextvars
+import itertools
+import json
+import logging
+import time
+from collections import deque
+from functools import wraps
+from pathlib import Path
+
+from config import TRACING_ENABLED, TRACE_BUFFER_SIZE, TRACE_SLOW_SECONDS, TRACE_FILE, TRACE_MAX_SPANS
+
+logger = logging.getLogger(__name__)
+
+_current_span = contextvars.ContextVar("kamasbot_current_span", default=None)
+_span_ids = itertools.count(1)
+_trace_ids = itertools.count(1)
+
+
+class Trace:
+    """All spans belonging to one root operation."""
+    __slots__ = ("trace_id", "root", "spans", "dropped")
+
+    def __init__(self):
+        self.trace_id = f"{int(time.time() * 1000):x}-{next(_trace_ids)}"
+        self.root = None
+        self.spans = []
+        self.dropped = 0
+
+    def add(self, span):
+        if len(self.spans) >= TRACE_MAX_SPANS:
+            self.dropped += 1
+            return
+        self.spans.append(span)
+
+    @property
+    def duration(self):
+        return self.root.duration if self.root else 0.0
+
+
+class Span:
+    """A timed, named step. Use as a (sync or async) context manager."""
+    __slots__ = ("name", "attrs", "trace", "span_id", "parent_id", "start", "duration", "_perf", "_token")
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.trace = None
+        self.span_id = None
+        self.parent_id = None
+        self.start = None
+        self.duration = None
+        self._perf = None
+        self._token = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        parent = _current_span.get()
+        if parent is None:
+            self.trace = Trace()
+            self.trace.root = self
+        else:
+            self.trace = parent.trace
+            self.parent_id = parent.span_id
+        self.span_id = next(_span_ids)
+        self.start = time.time()
+        self._perf = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self._perf
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # Exited from a different context than it was entered in
+            _current_span.set(None)
+        self.trace.add(self)
+        if self.trace.root is self:
+            tracer.finish(self.trace)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": round(self.duration * 1000, 3),
+            "attrs": self.attrs,
+        }
+
+
+class _NoopSpan:
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name, **attrs):
+    """Open a span: `with span("file_write", path=p):` or `async with span(...)`."""
+    if not TRACING_ENABLED:
+        return _NOOP
+    return Span(name, attrs)
+
+
+def current_span():
+    return _current_span.get()
+
+
+def record_span(name, start, duration, **attrs):
+    """Attach an already-measured child span to the active trace.
+
+    Used where a context manager can't wrap the work, e.g. pages awaited
+    inside an async generator.
+    """
+    parent = _current_span.get()
+    if not TRACING_ENABLED or parent is None:
+        return
+    child = Span(name, attrs)
+    child.trace = parent.trace
+    child.span_id = next(_span_ids)
+    child.parent_id = parent.span_id
+    child.start = start
+    child.duration = duration
+    parent.trace.add(child)
+
+
+def traced(name=None):
+    """Decorator wrapping an async function in a span."""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(span_name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def to_jsonl(traces):
+    """One JSON object per span."""
+    lines = []
+    for trace in traces:
+        for item in sorted(trace.spans, key=lambda s: s.start):
+            lines.append(json.dumps(item.to_dict(), default=str))
+    return "\n".join(lines) + ("\n" if lines else "")
+
+
+def to_chrome(traces):
+    """Chrome trace-event JSON (load in chrome://tracing or Perfetto). One row per trace."""
+    events = []
+    for row, trace in enumerate(traces, 1):
+        events.append({
+            "name": "thread_name", "ph": "M", "pid": 1, "tid": row,
+            "args": {"name": f"{trace.root.name} {trace.trace_id}" if trace.root else trace.trace_id},
+        })
+        for item in sorted(trace.spans, key=lambda s: s.start):
+            events.append({
+                "name": item.name,
+                "ph": "X",
+                "ts": int(item.start * 1_000_000),
+                "dur": int(item.duration * 1_000_000),
+                "pid": 1,
+                "tid": row,
+                "args": dict(item.attrs, span_id=item.span_id, parent_id=item.parent_id),
+            })
+    return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}, default=str)
+
+
+def _append_file(path, text):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+
+
+class Tracer:
+    """Keeps recent finished traces and writes slow ones to disk off the event loop."""
+
+    def __init__(self, buffer_size, slow_seconds, slow_file):
+        self.recent = deque(maxlen=buffer_size)
+        self.slow_seconds = slow_seconds
+        self.slow_file = slow_file
+
+    def finish(self, trace):
+        self.recent.append(trace)
+        if self.slow_file and trace.duration >= self.slow_seconds:
+            text = to_jsonl([trace])
+            try:
+                asyncio.get_running_loop().run_in_executor(None, _append_file, self.slow_file, text)
+            except RuntimeError:
+                _append_file(self.slow_file, text)
+
+    def traces(self, min_duration=0.0, name=None):
+        return [
+            t for t in self.recent
+            if t.duration >= min_duration and (name is None or (t.root and t.root.name == name))
+        ]
+
+
+tracer = Tracer(TRACE_BUFFER_SIZE, TRACE_SLOW_SECONDS, TRACE_FILE)
@@ -5,21 +5,74 @@ import re
 import json
 import time
 from io import BytesIO
-from datetime import datetime
+from datetime import datetime, timezone
 import discord
 from discord import utils
 from functools import wraps
 
-from config import (
-    VERIFIED_DATA_CHANNEL_ID,
-    REPUTATION_CHANNEL_ID, BADGES_CHANNEL_ID,
-    ARCHIVE_CHANNEL_ID, BADGE_COLORS
-)
+from config import BADGE_COLORS, MARKET_HISTORY_LIMIT
 
-from utils.constants import KAMAS_LOGO_URL
+from utils.constants import KAMAS_LOGO_URL, LISTING_SELLER_FIELD, LISTING_AMOUNT_FIELD, LISTING_PRICE_FIELD
+from utils.constants import LISTING_CURRENCY_FIELD, LISTING_METHOD_FIELD
+from utils.analytics import TradeColumns, summarize
+from utils.guild_config import guild_configs
+from utils.charts import render_market_charts, CHART_FILENAME
+from utils.sketches import PriceSketches, iso_week
+from utils.metrics import timed, HISTORY_PAGES, HISTORY_MESSAGES, ATTACHMENT_BYTES, REST_CALLS
+from utils.tracing import span, record_span
+from utils import records
 
 logger = logging.getLogger(__name__)
 
+HISTORY_PAGE_SIZE = 100  # Messages per history request made by discord.py
+REPUTATION_VOTE = records.fields("reputation").index("vote")
+
+async def resolve_channel(source, channel_id):
+    """Return a channel from cache, fetching it over REST if needed.
+
+    `source` can be a guild or a client.
+    """
+    channel = source.get_channel(channel_id)
+    if not channel:
+        with span("fetch_channel", channel_id=channel_id):
+            channel = await source.fetch_channel(channel_id)
+    return channel
+
+async def iter_history(channel, **kwargs):
+    """Iterate over channel.history(**kwargs), counting messages and pages read.
+
+    The wait for the first message of each page (when discord.py fetches it)
+    is recorded as a history_page span on the active trace.
+    """
+    label = getattr(channel, "name", None) or str(channel.id)
+    count = 0
+    messages = channel.history(**kwargs).__aiter__()
+    while True:
+        wait_start = time.time()
+        wait_perf = time.perf_counter()
+        try:
+            message = await messages.__anext__()
+        except StopAsyncIteration:
+            return
+        if count % HISTORY_PAGE_SIZE == 0:
+            HISTORY_PAGES.inc(channel=label)
+            record_span(
+                "history_page", wait_start, time.perf_counter() - wait_perf,
+                channel=label, page=count // HISTORY_PAGE_SIZE
+            )
+        count += 1
+        HISTORY_MESSAGES.inc(channel=label)
+        yield message
+
+async def read_attachment(attachment):
+    """Download an attachment's content."""
+    with span("attachment_read", filename=attachment.filename) as current:
+        data = await attachment.read()
+        current.set(bytes=len(data))
+    REST_CALLS.inc(endpoint="GET attachment")
+    ATTACHMENT_BYTES.inc(len(data))
+    return data
+
 # Rate limiting decorator
 def rate_limited(window_seconds=60, max_requests=5):
     def decorator(func):
@@ -81,6 +134,7 @@ def format_kamas_amount(amount_num):
     else:
         return str(int(amount_num) if amount_num.is_integer() else amount_num)
 
+@timed("fetch_kamas_logo")
 async def fetch_kamas_logo():
     """Returns a BytesIO object with the Kamas logo"""
     if not KAMAS_LOGO_URL:
@@ -98,32 +152,36 @@ def hash_sensitive_data(data: str) -> str:
     import hashlib
     return hashlib.sha256(data.encode()).hexdigest()
 
+@timed("store_verification_data")
 async def store_verification_data(interaction, user_id, verification_data):
     """Store verification data in the verified sellers channel."""
+    from utils.verified_sellers import verified_sellers, SellerProfile
     try:
-        channel = interaction.client.get_channel(VERIFIED_DATA_CHANNEL_ID)
-        if not channel:
-            channel = await interaction.client.fetch_channel(VERIFIED_DATA_CHANNEL_ID)
+        config = guild_configs.for_guild(interaction.guild)
+        channel = await resolve_channel(interaction.guild, config.verified_data_channel_id)
             
-        username = verification_data.get('username', interaction.user.display_name)
-        file_content = f"""Verified Seller Information:
-User ID: {user_id}
-Username: {username}
-Social Platform: {verification_data['social_platform']}
-Social Handle: {verification_data['social_handle']}
-Trading Experience: {verification_data['trading_experience']}
-Additional Info: {verification_data.get('additional_info', 'None')}
-Application Date: {verification_data['application_date']}
-Verified Date: {verification_data.get('verified_date', 'Not verified')}
-Verified By: {verification_data.get('verified_by', 'None')}"""
+        verified_by = verification_data.get('verified_by')
+        record = {
+            'user_id': int(user_id),
+            'username': verification_data.get('username', interaction.user.display_name),
+            'social_platform': verification_data.get('social_platform', 'Unknown'),
+            'social_handle': verification_data.get('social_handle', 'Unknown'),
+            'trading_experience': verification_data.get('trading_experience', 'Unknown'),
+            'additional_info': verification_data.get('additional_info'),
+            'application_date': verification_data.get('application_date'),
+            'verified_date': verification_data.get('verified_date'),
+            'verified_by': int(verified_by) if verified_by else None
+        }
         
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"verified_seller_{user_id}_{timestamp}.txt"
         
-        await channel.send(
+        message = await channel.send(
             f"New verified seller: <@{user_id}>",
-            file=discord.File(BytesIO(file_content.encode()), filename=filename)
+            file=discord.File(BytesIO(records.encode("verification", [record])), filename=filename)
         )
+        if verified_sellers.add(SellerProfile(interaction.guild.id, user_id, record, message.id)):
+            verified_sellers.save()
         
         guild = interaction.guild
         verified_role = await get_verified_role(guild)
@@ -137,6 +195,7 @@ Verified By: {verification_data.get('verified_by', 'None')}"""
         logger.exception(f"Error storing verification data: {e}")
         return False
 
+@timed("get_verified_role")
 async def get_verified_role(guild):
     """Get or create the verified seller role."""
     verified_role = discord.utils.get(guild.roles, name="Verified Seller")
@@ -148,83 +207,44 @@ async def get_verified_role(guild):
         )
     return verified_role
 
+@timed("is_verified_seller")
 async def is_verified_seller(user_id, guild):
     """Check if a user is a verified seller."""
-    verified_role = discord.utils.get(guild.roles, name="Verified Seller")
-    if not verified_role:
-        return False
-    
-    member = await guild.fetch_member(int(user_id))
-    if not member:
-        return False
-    
-    return verified_role in member.roles
+    from utils.verified_sellers import verified_sellers
+    return verified_sellers.is_verified(guild.id, user_id)
 
+@timed("get_seller_profile")
 async def get_seller_profile(user_id, guild):
-    """Get seller profile data from Discord channel."""
-    try:
-        channel = guild.get_channel(VERIFIED_DATA_CHANNEL_ID)
-        if not channel:
-            return {}
-            
-        async for message in channel.history(limit=1000):
-            if message.attachments:
-                for attachment in message.attachments:
-                    if str(attachment.id) == str(user_id):
-                        file_content = await attachment.read()
-                        text = file_content.decode('utf-8')
-                        profile = {}
-                        lines = text.split('\n')
-                        for line in lines:
-                            if ':' in line:
-                                key, value = line.split(':', 1)
-                                profile[key.strip()] = value.strip()
-                        return profile
-        return {}
-    except Exception as e:
-        logger.exception(f"Error getting seller profile: {e}")
-        return {}
-
-async def update_reputation(interaction: discord.Interaction, seller_id: int, positive: bool):
-    """Update seller reputation using reaction-based tracking in a text file."""
-    try:
-        channel = interaction.client.get_channel(REPUTATION_CHANNEL_ID)
-        if not channel:
-            channel = await interaction.client.fetch_channel(REPUTATION_CHANNEL_ID)
-        
-        # Create/update reputation file
-        filename = f"reputation_{seller_id}.txt"
-        content = f"{datetime.now().isoformat()},{'positive' if positive else 'negative'}"
-        
-        await channel.send(
-            f"Reputation update for <@{seller_id}>",
-            file=discord.File(BytesIO(content.encode()), filename=filename)
-        )
-        return True
-    except Exception as e:
-        logger.error(f"Reputation update failed: {e}")
-        return False
+    """Get a verified seller's profile fields, or {} if they are not verified."""
+    from utils.verified_sellers import verified_sellers
+    profile = verified_sellers.get(guild.id, user_id)
+    return dict(profile.record) if profile else {}
 
+@timed("calculate_reputation")
 async def calculate_reputation(seller_id: int, guild: discord.Guild):
     """Calculate reputation score from stored files."""
     try:
-        channel = guild.get_channel(REPUTATION_CHANNEL_ID)
-        if not channel:
-            channel = await guild.fetch_channel(REPUTATION_CHANNEL_ID)
+        channel = await resolve_channel(guild, guild_configs.for_guild(guild).reputation_channel_id)
         
         positive = 0
         negative = 0
         
-        async for message in channel.history(limit=1000):
+        async for message in iter_history(channel, limit=1000):
             if message.attachments:
                 for attachment in message.attachments:
                     if str(seller_id) in attachment.filename:
-                        file_content = await attachment.read()
-                        _, rep_type = file_content.decode().strip().split(',')
-                        if rep_type == 'positive':
-                            positive += 1
-                        else:
-                            negative += 1
+                        file_content = await read_attachment(attachment)
+                        # One record per ledger change; "-vote" withdraws one
+                        for change in records.decode_rows("reputation", file_content, attachment.filename):
+                            rep_type = change[REPUTATION_VOTE]
+                            if rep_type == 'positive':
+                                positive += 1
+                            elif rep_type == 'negative':
+                                negative += 1
+                            elif rep_type == '-positive':
+                                positive -= 1
+                            elif rep_type == '-negative':
+                                negative -= 1
         
         return {
             'score': positive - negative,
@@ -236,12 +256,19 @@ async def calculate_reputation(seller_id: int, guild: discord.Guild):
         logger.error(f"Reputation calculation failed: {e}")
         return None
 
+@timed("update_seller_badges")
 async def update_seller_badges(user_id: int, guild: discord.Guild):
-    """Update seller badges based on transaction count."""
+    """Update seller badges based on the guild's badge_criterion."""
     try:
-        rep = await calculate_reputation(user_id, guild)
-        if not rep:
-            return
+        config = guild_configs.for_guild(guild)
+        if config.badge_criterion == 'decayed':
+            from utils.reputation import reputation_scores
+            value = reputation_scores.get(guild.id, user_id)['decayed_score']
+        else:
+            rep = await calculate_reputation(user_id, guild)
+            if not rep:
+                return
+            value = rep['positive']
             
         member = await guild.fetch_member(user_id)
         if not member:
@@ -253,11 +280,12 @@ async def update_seller_badges(user_id: int, guild: discord.Guild):
                 await member.remove_roles(role)
         
         # Assign new badges
-        if rep['positive'] >= 100:
+        thresholds = config.badge_thresholds
+        if value >= thresholds["GOLD"]:
             role = await get_or_create_role(guild, "Gold Seller", BADGE_COLORS["GOLD"])
-        elif rep['positive'] >= 50:
+        elif value >= thresholds["SILVER"]:
             role = await get_or_create_role(guild, "Silver Seller", BADGE_COLORS["SILVER"])
-        elif rep['positive'] >= 10:
+        elif value >= thresholds["BRONZE"]:
             role = await get_or_create_role(guild, "Bronze Seller", BADGE_COLORS["BRONZE"])
         else:
             return
@@ -269,6 +297,7 @@ async def update_seller_badges(user_id: int, guild: discord.Guild):
         logger.error(f"Badge update failed: {e}")
         return None
 
+@timed("get_or_create_role")
 async def get_or_create_role(guild, name, color):
     """Get or create a badge role."""
     role = discord.utils.get(guild.roles, name=name)
@@ -276,36 +305,31 @@ async def get_or_create_role(guild, name, color):
         role = await guild.create_role(name=name, color=discord.Color(color))
     return role
 
+@timed("archive_transaction")
 async def archive_transaction(message: discord.Message):
     """Move a transaction to the archive channel."""
     try:
-        archive_channel = message.guild.get_channel(ARCHIVE_CHANNEL_ID)
-        if not archive_channel:
-            archive_channel = await message.guild.fetch_channel(ARCHIVE_CHANNEL_ID)
+        config = guild_configs.for_guild(message.guild)
+        archive_channel = await resolve_channel(message.guild, config.archive_channel_id)
         
         # Create archive file
-        content = f"Transaction from {message.created_at}\n"
-        content += f"Original URL: {message.jump_url}\n\n"
-        
-        # Add embed data if exists
-        if message.embeds:
-            embed = message.embeds[0]
-            content += f"Title: {embed.title}\n"
-            content += f"Description: {embed.description}\n"
-            for field in embed.fields:
-                content += f"{field.name}: {field.value}\n"
-        
-        # Add attachments if any
-        if message.attachments:
-            content += "\nAttachments:\n"
-            for att in message.attachments:
-                content += f"- {att.filename}: {att.url}\n"
-        
-        # Send to archive
+        embed = message.embeds[0] if message.embeds else None
+        content = records.encode("archive", [{
+            'message_id': message.id,
+            'created_at': message.created_at.isoformat(),
+            'jump_url': message.jump_url,
+            'title': embed.title if embed else None,
+            'description': embed.description if embed else None,
+            'fields': {field.name: field.value for field in embed.fields} if embed else {},
+            'attachments': {att.filename: att.url for att in message.attachments}
+        }])
+        
+        # Send to archive; the listing embed is kept so market reports can read it without downloads
         filename = f"txn_{message.id}.txt"
         await archive_channel.send(
             f"Archived transaction from {message.author.mention}",
-            file=discord.File(BytesIO(content.encode()), filename=filename)
+            embed=message.embeds[0] if message.embeds else None,
+            file=discord.File(BytesIO(content), filename=filename)
         )
         
         # Delete original if successful
@@ -316,15 +340,14 @@ async def archive_transaction(message: discord.Message):
         logger.error(f"Archive failed: {e}")
         return False
 
+@timed("search_archives")
 async def search_archives(guild: discord.Guild, query: str):
     """Search archived transactions."""
     try:
-        channel = guild.get_channel(ARCHIVE_CHANNEL_ID)
-        if not channel:
-            channel = await guild.fetch_channel(ARCHIVE_CHANNEL_ID)
+        channel = await resolve_channel(guild, guild_configs.for_guild(guild).archive_channel_id)
         
         results = []
-        async for message in channel.history(limit=1000):
+        async for message in iter_history(channel, limit=1000):
             if message.attachments:
                 for att in message.attachments:
                     if query.lower() in att.filename.lower():
@@ -338,83 +361,69 @@ async def search_archives(guild: discord.Guild, query: str):
         logger.error(f"Archive search failed: {e}")
         return []
 
+def _embed_field(embed, name):
+    for field in embed.fields:
+        if field.name == name:
+            return field.value
+    return None
+
+def parse_archived_trade(message):
+    """Return (amount, price_per_m, currency, timestamp, seller, method) for an archived trade, or None.
+
+    Reads the listing embed kept on the archive message. Older archives only
+    have a txn_ID_KAMAS_METHOD attachment name, which gives no price or currency.
+    """
+    mention = re.search(r"<@!?(\d+)>", message.content or "")
+    seller = int(mention.group(1)) if mention else message.author.id
+    timestamp = message.created_at.timestamp()
+
+    for embed in message.embeds:
+        amount = _embed_field(embed, LISTING_AMOUNT_FIELD)
+        if not amount or not validate_kamas_amount(amount):
+            continue
+        price = re.search(r"\d+(?:[.,]\d+)?", _embed_field(embed, LISTING_PRICE_FIELD) or "")
+        seller_id = re.search(r"\d{15,}", _embed_field(embed, LISTING_SELLER_FIELD) or "")
+        return (
+            int(parse_kamas_amount(amount)),
+            float(price.group().replace(",", ".")) if price else None,
+            _embed_field(embed, LISTING_CURRENCY_FIELD) or "UNKNOWN",
+            timestamp,
+            int(seller_id.group()) if seller_id else seller,
+            _embed_field(embed, LISTING_METHOD_FIELD) or "Unknown",
+        )
+
+    for att in message.attachments:
+        parts = att.filename.split('_')
+        if parts[0] == 'txn' and len(parts) >= 4:  # txn_ID_KAMAS_PAYMENTMETHOD
+            try:
+                return (int(parts[2]), None, "UNKNOWN", timestamp, seller, parts[3].split('.')[0])
+            except ValueError:
+                continue
+    return None
+
+@timed("collect_market_data")
 async def collect_market_data(guild: discord.Guild):
     """Collect trading data from archive channel."""
     try:
-        from config import ARCHIVE_CHANNEL_ID
-        channel = guild.get_channel(ARCHIVE_CHANNEL_ID)
-        if not channel:
-            channel = await guild.fetch_channel(ARCHIVE_CHANNEL_ID)
-        
-        data = {
-            'total_transactions': 0,
-            'total_kamas': 0,
-            'payment_methods': {},
-            'daily_volume': {},
-            'seller_stats': {},
-            'price_ranges': {},  # New: Track kamas price ranges
-            'transaction_times': [],  # New: Track time of day
-            'new_sellers': set()  # New: Track new sellers
-        }
-        
-        # Get seller list from previous week for new seller detection
-        prev_sellers = set()
-        async for old_msg in channel.history(after=datetime.now()-timedelta(days=14), limit=500):
-            if old_msg.attachments and old_msg.created_at < datetime.now()-timedelta(days=7):
-                for att in old_msg.attachments:
-                    if 'txn_' in att.filename:
-                        prev_sellers.add(old_msg.author.id)
-        
-        async for message in channel.history(limit=1000):
-            if message.attachments:
-                data['total_transactions'] += 1
-                data['transaction_times'].append(message.created_at.hour)
-                
-                # Parse transaction details from filename
-                for att in message.attachments:
-                    if 'txn_' in att.filename:
-                        parts = att.filename.split('_')
-                        if len(parts) >= 4:  # txn_ID_KAMAS_PAYMENTMETHOD
-                            try:
-                                kamas = int(parts[2])
-                                method = parts[3].split('.')[0]
-                                date = message.created_at.date()
-                                
-                                # Track price ranges
-                                price_range = f"{(kamas // 1000) * 1000}-{(kamas // 1000 + 1) * 1000}"
-                                data['price_ranges'][price_range] = data['price_ranges'].get(price_range, 0) + 1
-                                
-                                # Track new sellers
-                                if message.author.id not in prev_sellers:
-                                    data['new_sellers'].add(message.author.id)
-                                
-                                # Existing tracking
-                                data['total_kamas'] += kamas
-                                data['payment_methods'][method] = data['payment_methods'].get(method, 0) + 1
-                                data['daily_volume'][str(date)] = data['daily_volume'].get(str(date), 0) + kamas
-                                
-                                seller = message.author.id
-                                data['seller_stats'][seller] = data['seller_stats'].get(seller, {'count': 0, 'volume': 0})
-                                data['seller_stats'][seller]['count'] += 1
-                                data['seller_stats'][seller]['volume'] += kamas
-                                
-                            except (ValueError, IndexError):
-                                continue
-        
-        # Calculate additional metrics
-        data['avg_kamas_per_txn'] = data['total_kamas'] / data['total_transactions'] if data['total_transactions'] else 0
-        data['busiest_hour'] = max(set(data['transaction_times']), key=data['transaction_times'].count) if data['transaction_times'] else None
-        data['new_sellers_count'] = len(data['new_sellers'])
-        
-        return data
+        channel = await resolve_channel(guild, guild_configs.for_guild(guild).archive_channel_id)
+
+        rows = []
+        with span("read_archive"):
+            async for message in iter_history(channel, limit=MARKET_HISTORY_LIMIT):
+                row = parse_archived_trade(message)
+                if row:
+                    rows.append(row)
+
+        with span("analyze_trades", trades=len(rows)):
+            return summarize(TradeColumns.from_rows(rows), datetime.now(timezone.utc).timestamp())
     except Exception as e:
         logger.error(f"Market data collection failed: {e}")
         return None
 
+@timed("generate_market_report")
 async def generate_market_report(guild: discord.Guild):
     """Generate weekly market report."""
     try:
-        from config import STATS_CHANNEL_ID
         data = await collect_market_data(guild)
         if not data:
             return False
@@ -483,29 +492,63 @@ async def generate_market_report(guild: discord.Guild):
             value="\n".join(f"<@{s[0]}>: {s[1]:,} kamas" for s in top_sellers),
             inline=True
         )
+
+        # Price per million by currency (volume-weighted average, median and 90th percentile)
+        if data['currency_stats']:
+            embed.add_field(
+                name="Price per M by Currency",
+                value="\n".join(
+                    f"{c}: VWAP {s['vwap']:.2f} · median {s['median']:.2f} · p90 {s['p90']:.2f} ({s['count']} trades)"
+                    for c, s in sorted(data['currency_stats'].items(), key=lambda x: x[1]['volume'], reverse=True)
+                ),
+                inline=False
+            )
+
+        if data['busiest_slot']:
+            day, hour = data['busiest_slot']
+            embed.add_field(name="Busiest Slot", value=f"{day} {hour}:00-{hour+1}:00 UTC", inline=True)
+
+        # Listed prices come from the sketch file, which the worker process can read too
+        week = iso_week()
+        sketches = PriceSketches.load()
+        listed = [(c, sketches.quantiles(c, weeks={week})) for c in sketches.currencies()]
+        listed = [(c, q) for c, q in listed if q]
+        if listed:
+            embed.add_field(
+                name="Listed Price per M This Week",
+                value="\n".join(f"{c}: median {q[0]:.2f} · p95 {q[1]:.2f}" for c, q in listed),
+                inline=False
+            )
+
+        # Charts render in a process pool and are cached per ISO week
+        with span("render_charts"):
+            png = await render_market_charts(data, week)
         
         # Send to stats channel
-        channel = guild.get_channel(STATS_CHANNEL_ID)
-        if not channel:
-            channel = await guild.fetch_channel(STATS_CHANNEL_ID)
+        channel = await resolve_channel(guild, guild_configs.for_guild(guild).stats_channel_id)
             
-        await channel.send(embed=embed)
+        if png:
+            embed.set_image(url=f"attachment://{CHART_FILENAME}")
+            await channel.send(embed=embed, file=discord.File(BytesIO(png), filename=CHART_FILENAME))
+        else:
+            await channel.send(embed=embed)
         return True
         
     except Exception as e:
         logger.error(f"Market report generation failed: {e}")
         return False
 
+@timed("create_escrow")
 async def create_escrow(buyer: discord.Member, seller: discord.Member, middleman: discord.Member, amount: int):
     """Create an escrow transaction file."""
     try:
-        from config import ESCROW_CHANNEL_ID, ESCROW_FEE_PERCENT
-        fee = int(amount * (ESCROW_FEE_PERCENT / 100))
+        config = guild_configs.for_guild(buyer.guild)
+        fee = int(amount * (config.escrow_fee_percent / 100))
         
         escrow_data = {
-            "buyer": buyer.id,
-            "seller": seller.id,
-            "middleman": middleman.id,
+            "buyer_id": buyer.id,
+            "seller_id": seller.id,
+            "middleman_id": middleman.id,
             "amount": amount,
             "fee": fee,
             "created_at": datetime.now().isoformat(),
@@ -513,14 +556,12 @@ async def create_escrow(buyer: discord.Member, seller: discord.Member, middleman
         }
         
         # Store in escrow channel
-        channel = buyer.guild.get_channel(ESCROW_CHANNEL_ID)
-        if not channel:
-            channel = await buyer.guild.fetch_channel(ESCROW_CHANNEL_ID)
+        channel = await resolve_channel(buyer.guild, config.escrow_channel_id)
             
-        filename = f"escrow_{buyer.id}_{seller.id}_{int(datetime.now().timestamp())}.json"
+        filename = f"escrow_{buyer.id}_{seller.id}_{int(datetime.now().timestamp())}.txt"
         await channel.send(
             f"New escrow created for {amount} kamas",
-            file=discord.File(BytesIO(json.dumps(escrow_data).encode()), filename=filename)
+            file=discord.File(BytesIO(records.encode("escrow", [escrow_data])), filename=filename)
         )
         
         return True
@@ -528,39 +569,35 @@ async def create_escrow(buyer: discord.Member, seller: discord.Member, middleman
         logger.error(f"Escrow creation failed: {e}")
         return False
 
+@timed("get_escrow_transactions")
 async def get_escrow_transactions(guild: discord.Guild):
     """Retrieve all active escrow transactions."""
     try:
-        from config import ESCROW_CHANNEL_ID
-        channel = guild.get_channel(ESCROW_CHANNEL_ID)
-        if not channel:
-            channel = await guild.fetch_channel(ESCROW_CHANNEL_ID)
+        channel = await resolve_channel(guild, guild_configs.for_guild(guild).escrow_channel_id)
             
         escrows = []
-        async for message in channel.history(limit=200):
+        async for message in iter_history(channel, limit=200):
             if message.attachments:
                 for att in message.attachments:
                     if att.filename.startswith('escrow_'):
-                        content = await att.read()
-                        escrows.append(json.loads(content.decode()))
+                        content = await read_attachment(att)
+                        escrows.extend(records.decode("escrow", content, att.filename))
         return escrows
     except Exception as e:
         logger.error(f"Escrow retrieval failed: {e}")
         return []
 
+@timed("load_translations")
 async def load_translations(guild: discord.Guild):
     """Load all translations from the translations channel."""
     try:
-        from config import TRANSLATIONS_CHANNEL_ID
-        channel = guild.get_channel(TRANSLATIONS_CHANNEL_ID)
-        if not channel:
-            channel = await guild.fetch_channel(TRANSLATIONS_CHANNEL_ID)
+        channel = await resolve_channel(guild, guild_configs.for_guild(guild).translations_channel_id)
         
         translations = {}
-        async for message in channel.history(limit=200):
+        async for message in iter_history(channel, limit=200):
             if message.attachments and message.attachments[0].filename.endswith('.json'):
                 lang = message.attachments[0].filename.split('.')[0]
-                content = await message.attachments[0].read()
+                content = await read_attachment(message.attachments[0])
                 translations[lang] = json.loads(content.decode())
         
         return translations
@@ -568,33 +605,32 @@ async def load_translations(guild: discord.Guild):
         logger.error(f"Translation loading failed: {e}")
         return {}
 
+@timed("set_user_language")
 async def set_user_language(user_id: int, language: str, guild: discord.Guild):
     """Store a user's language preference."""
     try:
-        from config import VERIFIED_DATA_CHANNEL_ID, SUPPORTED_LANGUAGES
+        from config import SUPPORTED_LANGUAGES
         
         if language not in SUPPORTED_LANGUAGES:
             return False
             
-        channel = guild.get_channel(VERIFIED_DATA_CHANNEL_ID)
-        if not channel:
-            channel = await guild.fetch_channel(VERIFIED_DATA_CHANNEL_ID)
+        channel = await resolve_channel(guild, guild_configs.for_guild(guild).verified_data_channel_id)
             
         # Create/update language file
         filename = f"lang_{user_id}.txt"
-        content = language
+        content = records.encode("language", [{'user_id': int(user_id), 'language': language}])
         
         # Check if existing file exists
-        async for message in channel.history(limit=200):
+        async for message in iter_history(channel, limit=200):
             if message.attachments and message.attachments[0].filename == filename:
                 await message.edit(
-                    attachments=[discord.File(BytesIO(content.encode()), filename=filename)]
+                    attachments=[discord.File(BytesIO(content), filename=filename)]
                 )
                 return True
         
         # Create new if not exists
         await channel.send(
-            file=discord.File(BytesIO(content.encode()), filename=filename)
+            file=discord.File(BytesIO(content), filename=filename)
         )
         return True
         
@@ -602,25 +638,24 @@ async def set_user_language(user_id: int, language: str, guild: discord.Guild):
         logger.error(f"Language setting failed: {e}")
         return False
 
+@timed("get_user_language")
 async def get_user_language(user_id: int, guild: discord.Guild):
     """Get a user's preferred language."""
     try:
-        from config import VERIFIED_DATA_CHANNEL_ID
-        channel = guild.get_channel(VERIFIED_DATA_CHANNEL_ID)
-        if not channel:
-            channel = await guild.fetch_channel(VERIFIED_DATA_CHANNEL_ID)
+        channel = await resolve_channel(guild, guild_configs.for_guild(guild).verified_data_channel_id)
             
         filename = f"lang_{user_id}.txt"
-        async for message in channel.history(limit=200):
+        async for message in iter_history(channel, limit=200):
             if message.attachments and message.attachments[0].filename == filename:
-                content = await message.attachments[0].read()
-                return content.decode().strip()
+                content = await read_attachment(message.attachments[0])
+                return records.decode("language", content, filename)[0]['language']
         
         return 'en'  # Default to English
     except Exception as e:
         logger.error(f"Language retrieval failed: {e}")
         return 'en'
 
+@timed("translate")
 async def translate(key: str, guild: discord.Guild, user_id: int = None, **kwargs):
     """Get a translated string."""
     try:
@@ -637,11 +672,12 @@ async def translate(key: str, guild: discord.Guild, user_id: int = None, **kwarg
         logger.error(f"Translation failed for key {key}: {e}")
         return key
 
+@timed("assign_middleman_badge")
 async def assign_middleman_badge(member: discord.Member, guild: discord.Guild):
     """Assign appropriate middleman badge role."""
     from config import MIDDLEMAN_BADGES
     escrows = await get_escrow_transactions(guild)
-    user_escrows = [e for e in escrows if e['middleman'] == member.id]
+    user_escrows = [e for e in escrows if e['middleman_id'] == member.id]
     
     if not user_escrows:
         return False
@@ -674,6 +710,7 @@ async def assign_middleman_badge(member: discord.Member, guild: discord.Guild):
     
     return False
 
+@timed("set_user_lang")
 async def set_user_lang(interaction: discord.Interaction, lang_code: str):
     """
     Sets the user's language preference
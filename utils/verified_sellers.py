@@ -0,0 +1,148 @@
+"""Verified-seller profiles indexed by guild and user id.
+
+store_verification_data posts one verified_seller_<user>_<time>.txt file (a
+"verification" record, see utils.records) per approval to the verified data
+channel. The index keeps the newest approved profile per user, so listings can
+show a verified badge, and checks can answer, with a dictionary lookup instead
+of a member fetch or a channel scan.
+
+Approvals are added as they are stored. At startup sync() reads only messages
+newer than the last one indexed for each guild (VERIFIED_SELLERS_FILE keeps
+the index and that position), so approvals made while the bot was offline or
+by another process are picked up without re-reading old files.
+"""
+import json
+import logging
+import os
+from datetime import datetime, timezone
+
+from config import VERIFIED_SELLERS_FILE
+from utils.guild_config import guild_configs
+from utils import records
+from utils.storage import write_json
+from utils.utils import resolve_channel, iter_history, read_attachment
+
+logger = logging.getLogger(__name__)
+
+PROFILE_FILE_PREFIX = "verified_seller_"
+VERIFICATION_FIELDS = records.fields("verification")
+VERIFIED_DATE = VERIFICATION_FIELDS.index("verified_date")
+VERIFIED_BY = VERIFICATION_FIELDS.index("verified_by")
+
+
+class SellerProfile:
+    """One verified seller: the record from their newest verification file.
+
+    The record is kept as a tuple in schema order rather than a dict, which
+    roughly halves the memory per profile.
+    """
+
+    __slots__ = ("guild_id", "user_id", "message_id", "_row")
+
+    def __init__(self, guild_id, user_id, record, message_id=0):
+        self.guild_id = int(guild_id)
+        self.user_id = int(user_id)
+        self.message_id = int(message_id)  # Verification file message; newer ones replace older
+        self._row = tuple(record.get(name) for name in VERIFICATION_FIELDS)
+
+    @property
+    def record(self):
+        return dict(zip(VERIFICATION_FIELDS, self._row))
+
+    @property
+    def verified_date(self):
+        try:
+            return datetime.fromisoformat(self._row[VERIFIED_DATE] or "")
+        except ValueError:
+            return None
+
+    @property
+    def verified_by(self):
+        return self._row[VERIFIED_BY]
+
+    def badge(self):
+        """Short text for listings, e.g. '✅ Verified since 2026-10-19'."""
+        if self.verified_date:
+            return f"✅ Verified since {self.verified_date:%Y-%m-%d}"
+        return "✅ Verified"
+
+    def to_dict(self):
+        return {
+            "guild_id": self.guild_id, "user_id": self.user_id,
+            "record": self.record, "message_id": self.message_id
+        }
+
+
+class VerifiedSellerIndex:
+    """Newest verified profile per (guild, user), persisted to a JSON file."""
+
+    def __init__(self, path=VERIFIED_SELLERS_FILE):
+        self.path = path
+        self.profiles = {}  # (guild id, user id) -> SellerProfile
+        self.synced_until = {}  # guild id -> UNIX time of the newest verification file read
+        self._load()
+
+    def __len__(self):
+        return len(self.profiles)
+
+    def get(self, guild_id, user_id):
+        return self.profiles.get((int(guild_id), int(user_id)))
+
+    def is_verified(self, guild_id, user_id):
+        return (int(guild_id), int(user_id)) in self.profiles
+
+    def add(self, profile):
+        """Index a verified profile unless a newer one is already indexed."""
+        if profile.verified_date is None:
+            return False  # An application, not an approval
+        key = (profile.guild_id, profile.user_id)
+        current = self.profiles.get(key)
+        if current and current.message_id > profile.message_id:
+            return False
+        self.profiles[key] = profile
+        return True
+
+    async def sync(self, guild):
+        """Index verification files posted since the last sync; returns how many were added."""
+        config = guild_configs.for_guild(guild)
+        channel = await resolve_channel(guild, config.verified_data_channel_id)
+        since = self.synced_until.get(guild.id)
+        after = datetime.fromtimestamp(since, timezone.utc) if since else None
+
+        added = 0
+        async for message in iter_history(channel, limit=None, after=after):
+            for attachment in message.attachments:
+                if not attachment.filename.startswith(PROFILE_FILE_PREFIX):
+                    continue
+                try:
+                    data = await read_attachment(attachment)
+                    verifications = records.decode("verification", data, attachment.filename)
+                except records.RecordError as e:
+                    logger.error(f"Unreadable verification file {attachment.filename}: {e}")
+                    continue
+                for record in verifications:
+                    added += self.add(SellerProfile(guild.id, record["user_id"], record, message.id))
+            self.synced_until[guild.id] = max(self.synced_until.get(guild.id, 0), message.created_at.timestamp())
+        self.save()
+        return added
+
+    def save(self):
+        write_json(self.path, {
+            "profiles": [profile.to_dict() for profile in self.profiles.values()],
+            "synced_until": [[guild_id, when] for guild_id, when in self.synced_until.items()]
+        })
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            for profile in data["profiles"]:
+                self.add(SellerProfile(**profile))
+            self.synced_until = {guild_id: when for guild_id, when in data["synced_until"]}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error(f"Could not load verified sellers from {self.path}: {e}")
+
+
+verified_sellers = VerifiedSellerIndex()
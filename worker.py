@@ -0,0 +1,141 @@
+"""Background job worker, run next to bot.py with BACKGROUND_JOBS=worker.
+
+Runs the archive sweep, escrow timeouts, weekly market report and middleman
+guideline reminders, plus the startup view restore, using only Discord's REST
+API. It never opens a gateway connection, so long sweeps do not share an event
+loop with interaction handling. bot.py and the worker talk over JOBS_SOCKET
+(see utils/jobs.py); start both from the same working directory.
+
+    BACKGROUND_JOBS=worker python bot.py
+    python worker.py
+"""
+import asyncio
+import logging
+import os
+import time
+
+import discord
+
+from utils.logging_setup import setup_logging
+from utils.guild_config import guild_configs, owns_guild
+from utils.jobs import JobClient, run_for_guilds, seconds_until_weekly_report
+from utils.tracing import span
+from utils.utils import generate_market_report
+from cogs.tickets import restore_views, archive_old_tickets, expire_old_escrows
+from cogs.middleman_verification import send_guideline_reminder
+from config import DISCORD_TOKEN, DISCORD_API_BASE, JOBS_SOCKET, SHARD_COUNT, SHARD_IDS
+from config import WORKER_LOG_FILE, WORKER_LOG_JSON_FILE
+
+# Separate files: two processes must not rotate the same log
+setup_logging(WORKER_LOG_FILE, WORKER_LOG_JSON_FILE)
+logger = logging.getLogger(__name__)
+
+if DISCORD_API_BASE:
+    discord.http.Route.BASE = DISCORD_API_BASE.rstrip('/')
+
+# Jobs bot.py may ask for by name (e.g. /generate_report)
+JOBS = {
+    "check_old_tickets": archive_old_tickets,
+    "check_escrow_timeouts": expire_old_escrows,
+    "weekly_market_report": generate_market_report,
+    "generate_market_report": generate_market_report,
+    "send_guideline_reminders": send_guideline_reminder,
+}
+
+
+class Worker:
+    """Runs bot.py's scheduled jobs over REST."""
+
+    def __init__(self):
+        if SHARD_COUNT.isdigit():
+            # Never connected; it only gives fetched guilds the right shard_id for ownership
+            self.client = discord.AutoShardedClient(
+                intents=discord.Intents.none(), shard_count=int(SHARD_COUNT), shard_ids=SHARD_IDS or None
+            )
+        else:
+            self.client = discord.Client(intents=discord.Intents.none())
+        self.jobs = JobClient({"restore_views": self.handle_restore_views, "run": self.handle_run})
+        self.guilds = []
+
+    async def fetch_guilds(self):
+        """Fetch the configured guilds owned by the same shards as the paired bot.py."""
+        guilds = []
+        for config in guild_configs:
+            try:
+                guild = await self.client.fetch_guild(config.guild_id)
+            except discord.HTTPException as e:
+                logger.error(f"Could not fetch guild {config.guild_id}: {e}")
+                continue
+            if owns_guild(self.client, guild):
+                guilds.append(guild)
+        return guilds
+
+    async def run_job(self, job, func, guilds):
+        """Run one job for the given guilds and report the run to bot.py's metrics."""
+        start = time.perf_counter()
+        with span(job):
+            results = await run_for_guilds(guilds, func)
+        outcomes = [[guild.shard_id, "error" if isinstance(r, Exception) else "ok"] for guild, r in results]
+        status = "error" if any(s == "error" for _, s in outcomes) else "ok"
+        await self.jobs.send("job_finished", job=job, status=status, seconds=time.perf_counter() - start,
+                             guilds=outcomes)
+        if job == "check_old_tickets":
+            # Archived listings must leave bot.py's order book and count towards seller volume
+            for guild, archived in results:
+                if isinstance(archived, list) and archived:
+                    await self.jobs.send("listings_closed", guild_id=guild.id, listings=archived)
+        return results
+
+    async def every(self, job, interval):
+        while True:
+            await self.run_job(job, JOBS[job], self.guilds)
+            await asyncio.sleep(interval)
+
+    async def weekly(self, job):
+        while True:
+            await asyncio.sleep(seconds_until_weekly_report())
+            await self.run_job(job, JOBS[job], self.guilds)
+
+    async def guideline_reminders(self, guild):
+        interval = guild_configs.for_guild(guild).guideline_reminder_freq_days * 86400
+        while True:
+            await self.run_job("send_guideline_reminders", send_guideline_reminder, [guild])
+            await asyncio.sleep(interval)
+
+    async def handle_restore_views(self, message):
+        """Restore listing and thread views; bot.py registers the returned listings."""
+        start = time.perf_counter()
+        with span("restore_active_views"):
+            restored = await restore_views(self.client, self.guilds)
+        await self.jobs.send("job_finished", job="restore_active_views", seconds=time.perf_counter() - start)
+        return restored
+
+    async def handle_run(self, message):
+        """Run a job bot.py asked for in one guild and return its result."""
+        guild = next((g for g in self.guilds if g.id == message["guild_id"]), None)
+        if guild is None:
+            raise ValueError(f"Guild {message['guild_id']} is not served by this worker")
+        (_, result), = await self.run_job(message["job"], JOBS[message["job"]], [guild])
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def start(self):
+        async with self.client:
+            await self.client.login(DISCORD_TOKEN)
+            self.guilds = await self.fetch_guilds()
+            logger.info(f"Worker {os.getpid()} serving {len(self.guilds)} guilds")
+            await asyncio.gather(
+                self.jobs.run(JOBS_SOCKET),
+                self.every("check_old_tickets", 86400),
+                self.every("check_escrow_timeouts", 3600),
+                self.weekly("weekly_market_report"),
+                *(self.guideline_reminders(guild) for guild in self.guilds)
+            )
+
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(Worker().start())
+    except KeyboardInterrupt:
+        pass